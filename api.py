@@ -10,6 +10,7 @@ import os
 
 from biz.api import api_app, init_app
 from biz.api.scheduler import setup_scheduler
+from biz.api.warmup import warm_up
 from biz.utils.config_checker import check_config
 
 # 初始化应用并注册路由
@@ -17,6 +18,8 @@ init_app(api_app)
 
 if __name__ == '__main__':
     check_config()
+    # 预热 tokenizer、提示词模板与 LLM 客户端，完成后再开始接收 webhook
+    warm_up()
     # 启动定时任务调度器
     setup_scheduler()
 
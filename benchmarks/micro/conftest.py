@@ -0,0 +1,101 @@
+"""``benchmark`` fixture and baseline handling for ``python -m pytest benchmarks/micro``."""
+import os
+import warnings
+from pathlib import Path
+
+import pytest
+
+from benchmarks.micro.harness import (BASELINE_FILE, DEFAULT_THRESHOLD, Runner, check_regression, format_table,
+                                      load_baselines, missing_baseline, save_baselines)
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("microbenchmarks")
+    group.addoption("--bench-save", action="store_true",
+                    help="write the measured results into the baseline file instead of comparing")
+    group.addoption("--bench-baseline", default=str(BASELINE_FILE), help="baseline file")
+    group.addoption("--bench-threshold", type=float,
+                    default=float(os.getenv("BENCH_REGRESSION_THRESHOLD", DEFAULT_THRESHOLD)),
+                    help="allowed slowdown vs the baseline, e.g. 0.5 = +50%%")
+    group.addoption("--bench-require-baseline", action="store_true",
+                    default=os.getenv("BENCH_REQUIRE_BASELINE", "0") == "1",
+                    help="fail, instead of warning, for benchmarks without a baseline")
+    group.addoption("--bench-max-time", type=float, default=1.0, help="seconds spent measuring each benchmark")
+
+
+class Benchmark:
+    """Callable like pytest-benchmark's fixture: ``benchmark(func, *args, **kwargs)``."""
+
+    def __init__(self, name: str, runner: Runner, session_results: dict, baselines: dict, threshold: float,
+                 compare: bool, require_baseline: bool = False):
+        self.name = name
+        self._runner = runner
+        self._results = session_results
+        self._baselines = baselines
+        self._threshold = threshold
+        self._compare = compare
+        self._require_baseline = require_baseline
+        self.stats = None
+        self.failure = None
+
+    def __call__(self, func, *args, **kwargs):
+        result = func(*args, **kwargs)
+        self.stats = self._runner.measure(lambda: func(*args, **kwargs))
+        if self._compare and check_regression(self.name, self.stats, self._baselines, self._threshold):
+            # Measure once more before failing, so a burst of load elsewhere on the machine doesn't fail the run.
+            retry = self._runner.measure(lambda: func(*args, **kwargs))
+            self.stats = min(self.stats, retry, key=lambda stats: stats.min)
+            self.failure = check_regression(self.name, self.stats, self._baselines, self._threshold)
+        self._results[self.name] = self.stats
+        if self._compare and not self.failure:
+            # A benchmark without a baseline is not gated, e.g. the [tiktoken] variants when the tracked
+            # baselines were recorded offline: say so loudly, and fail where the gate has to be complete.
+            missing = missing_baseline(self.name, self._baselines)
+            if missing and self._require_baseline:
+                self.failure = missing
+            elif missing:
+                warnings.warn(missing)
+        if self.failure:
+            pytest.fail(self.failure, pytrace=False)
+        return result
+
+
+def pytest_configure(config):
+    config._bench_results = {}
+    config._bench_baselines = load_baselines(Path(config.getoption("--bench-baseline")))
+
+
+@pytest.fixture
+def benchmark(request):
+    config = request.config
+    return Benchmark(request.node.name, Runner(max_time=config.getoption("--bench-max-time")),
+                     config._bench_results, config._bench_baselines, config.getoption("--bench-threshold"),
+                     compare=not config.getoption("--bench-save"),
+                     require_baseline=config.getoption("--bench-require-baseline"))
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    results = config._bench_results
+    if not results:
+        return
+    terminalreporter.section("microbenchmarks")
+    terminalreporter.write_line(format_table(results, config._bench_baselines))
+    ungated = [name for name in results if name not in config._bench_baselines]
+    if ungated and not config.getoption("--bench-save"):
+        terminalreporter.write_line(f"NOT GATED (no baseline): {', '.join(ungated)}", yellow=True, bold=True)
+    if config.getoption("--bench-save"):
+        path = Path(config.getoption("--bench-baseline"))
+        save_baselines(results, path)
+        terminalreporter.write_line(f"baselines written to {path}")
+
+
+def pytest_generate_tests(metafunc):
+    """Token-bound benchmarks are parametrized with the active token backend.
+
+    tiktoken and the offline estimator differ by orders of magnitude, so each
+    keeps its own baseline (``test_count_tokens[tiktoken]`` / ``[estimate]``).
+    """
+    if "token_backend" in metafunc.fixturenames:
+        from biz.utils.token_util import _get_encoding_cached
+
+        metafunc.parametrize("token_backend", ["tiktoken" if _get_encoding_cached() is not None else "estimate"])
@@ -0,0 +1,140 @@
+"""Timing, statistics and baseline comparison for the microbenchmarks.
+
+A small stand-in for pytest-benchmark (not a dependency of this repo): the
+``benchmark`` fixture in ``conftest.py`` wraps a ``Runner``, results are
+compared with the tracked baselines in ``baselines.json`` and a benchmark
+fails when even its best round is slower than the baseline median by more
+than the threshold. Comparing the current ``min`` with the baseline
+``median`` keeps both a lucky baseline round and a burst of load during the
+run from producing false failures, while a real slowdown moves both.
+"""
+from __future__ import annotations
+
+import gc
+import json
+import platform
+import statistics
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+BASELINE_FILE = Path(__file__).with_name("baselines.json")
+DEFAULT_THRESHOLD = 0.5
+
+
+@dataclass
+class Stats:
+    rounds: int
+    iterations: int
+    min: float
+    median: float
+    mean: float
+    stddev: float
+
+    @classmethod
+    def from_samples(cls, samples: List[float], iterations: int) -> "Stats":
+        return cls(rounds=len(samples), iterations=iterations, min=min(samples),
+                   median=statistics.median(samples), mean=statistics.fmean(samples),
+                   stddev=statistics.stdev(samples) if len(samples) > 1 else 0.0)
+
+
+@dataclass
+class Runner:
+    """Calls a function repeatedly and reports per-call timings in seconds.
+
+    Each round runs ``iterations`` calls (calibrated so a round takes at least
+    `min_round_time`), and rounds repeat until `max_time` is spent or
+    `max_rounds` is reached, with at least `min_rounds`.
+    """
+    min_rounds: int = 5
+    max_rounds: int = 200
+    max_time: float = 1.0
+    min_round_time: float = 0.005
+    warmup: int = 1
+
+    def _calibrate(self, func: Callable[[], object]) -> int:
+        iterations = 1
+        while True:
+            start = time.perf_counter()
+            for _ in range(iterations):
+                func()
+            elapsed = time.perf_counter() - start
+            if elapsed >= self.min_round_time or iterations >= 1 << 20:
+                return iterations
+            iterations *= 2 if elapsed <= 0 else max(2, int(self.min_round_time / elapsed * 1.2))
+
+    def measure(self, func: Callable[[], object]) -> Stats:
+        for _ in range(self.warmup):
+            func()
+        iterations = self._calibrate(func)
+        samples: List[float] = []
+        deadline = time.perf_counter() + self.max_time
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            while len(samples) < self.max_rounds and (len(samples) < self.min_rounds
+                                                      or time.perf_counter() < deadline):
+                start = time.perf_counter()
+                for _ in range(iterations):
+                    func()
+                samples.append((time.perf_counter() - start) / iterations)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+        return Stats.from_samples(samples, iterations)
+
+
+def load_baselines(path: Path = BASELINE_FILE) -> Dict[str, Dict]:
+    try:
+        return json.loads(Path(path).read_text(encoding="utf-8")).get("benchmarks", {})
+    except FileNotFoundError:
+        return {}
+
+
+def save_baselines(results: Dict[str, Stats], path: Path = BASELINE_FILE) -> None:
+    """Merge `results` into the baseline file (other entries are kept)."""
+    benchmarks = load_baselines(path)
+    benchmarks.update({name: {k: round(v, 9) for k, v in asdict(stats).items()} for name, stats in results.items()})
+    data = {
+        "machine": {"python": platform.python_version(), "implementation": platform.python_implementation(),
+                    "system": platform.system(), "machine": platform.machine(), "processor": platform.processor()},
+        "benchmarks": dict(sorted(benchmarks.items())),
+    }
+    Path(path).write_text(json.dumps(data, indent=2) + "\n", encoding="utf-8")
+
+
+def check_regression(name: str, stats: Stats, baselines: Dict[str, Dict], threshold: float) -> Optional[str]:
+    """Failure message if `stats` regressed beyond `threshold` against the baseline, else None."""
+    baseline = baselines.get(name)
+    if not baseline:
+        return None
+    if stats.min <= baseline["median"] * (1 + threshold):
+        return None
+    return (f"{name}: best round {format_time(stats.min)} is {stats.min / baseline['median']:.2f}x the baseline "
+            f"median {format_time(baseline['median'])} (threshold +{threshold:.0%})")
+
+
+def missing_baseline(name: str, baselines: Dict[str, Dict]) -> Optional[str]:
+    """Message if `name` has no baseline and so cannot be checked for regressions, else None."""
+    if name in baselines:
+        return None
+    return f"{name}: no baseline recorded, so it is not gated; record one with --bench-save"
+
+
+def format_time(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3g}{unit}"
+    return f"{seconds / 1e-9:.3g}ns"
+
+
+def format_table(results: Dict[str, Stats], baselines: Dict[str, Dict]) -> str:
+    width = max([len(name) for name in results] + [9])
+    lines = [f"{'benchmark':<{width}}  {'median':>9}  {'min':>9}  {'stddev':>9}  {'rounds':>6}  {'min/base':>8}"]
+    for name, stats in results.items():
+        base = baselines.get(name)
+        ratio = f"{stats.min / base['median']:.2f}x" if base else "new"
+        lines.append(f"{name:<{width}}  {format_time(stats.median):>9}  {format_time(stats.min):>9}  "
+                     f"{format_time(stats.stddev):>9}  {stats.rounds:>6}  {ratio:>8}")
+    return "\n".join(lines)
@@ -0,0 +1,74 @@
+"""LLMAdapter JSON-protocol parsing and the AgentRunner loop with a scripted adapter."""
+import json
+
+from biz.agent.llm_adapter import LLMAdapter, LLMResponse, ToolCall
+from biz.agent.runner import AgentRunner
+from biz.agent.tool import Tool, ToolResult
+from biz.agent.tool_registry import ToolRegistry
+
+_FILE_BODY = "\n".join(f"    value_{i} = compute_checked({i}, limit={i % 7})" for i in range(400))
+
+
+class _ScriptedClient:
+    """Legacy (text-only) client answering with a fixed completion."""
+
+    def __init__(self, text):
+        self.text = text
+
+    def completions(self, messages, model=None):
+        return self.text
+
+
+class _ScriptedAdapter:
+    """Native-mode adapter replaying `rounds` tool-call rounds, then a final review."""
+
+    def __init__(self, rounds: int, calls_per_round: int):
+        self.rounds = rounds
+        self.calls_per_round = calls_per_round
+        self.capabilities = None
+        self._round = 0
+        self._native = LLMAdapter(object(), use_native=True)
+
+    def completions_with_tools(self, messages, tools=None):
+        self._round += 1
+        if self._round > self.rounds:
+            return LLMResponse(content="总分:80分", tool_calls=[])
+        return LLMResponse(content="reading files", tool_calls=[
+            ToolCall(id=f"c{self._round}_{i}", name="read_file", arguments={"path": f"src/file_{i}.py"})
+            for i in range(self.calls_per_round)])
+
+    def build_assistant_message(self, resp):
+        return self._native.build_assistant_message(resp)
+
+    def build_tool_message(self, call, result):
+        return self._native.build_tool_message(call, result)
+
+
+class _ReadFileTool(Tool):
+    name = "read_file"
+    description = "Read a file"
+    parameters = {"type": "object", "properties": {"path": {"type": "string"}}, "required": ["path"]}
+
+    def execute(self, **kwargs):
+        return ToolResult(True, f"# {kwargs['path']}\n{_FILE_BODY}")
+
+
+def test_json_fallback_parsing(benchmark):
+    blocks = "\n".join(json.dumps({"tool": "read_file", "args": {"path": f"src/file_{i}.py"}, "id": f"c{i}"})
+                       for i in range(20))
+    text = f"{'Let me look at the changed files first. ' * 50}\n{blocks}\n{'Then summarize. ' * 50}"
+    adapter = LLMAdapter(_ScriptedClient(text), use_native=False)
+    messages = [{"role": "system", "content": "review"}, {"role": "user", "content": _FILE_BODY}]
+    assert len(benchmark(adapter._json_fallback, messages, None).tool_calls) == 20
+
+
+def test_agent_runner_run(benchmark, token_backend):
+    registry = ToolRegistry()
+    registry.register(_ReadFileTool())
+
+    def run():
+        runner = AgentRunner(adapter=_ScriptedAdapter(rounds=6, calls_per_round=3), registry=registry,
+                             max_iterations=10, total_token_cap=10_000_000)
+        return runner.run([{"role": "system", "content": "review"}, {"role": "user", "content": _FILE_BODY}])
+
+    assert benchmark(run) == "总分:80分"
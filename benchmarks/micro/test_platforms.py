@@ -0,0 +1,35 @@
+"""filter_changes of each platform on a large merge request."""
+import pytest
+
+from benchmarks.stubs.platform_server import PlatformConfig, generate_files
+
+# 500 files x 4 hunks x 60 lines: a large but realistic MR.
+_FILES = generate_files(PlatformConfig(files=500, hunks_per_file=4, hunk_lines=60), "bench/large-mr")
+
+
+@pytest.fixture(autouse=True)
+def _extensions(monkeypatch):
+    monkeypatch.setenv("SUPPORTED_EXTENSIONS", ".py,.java,.go,.ts")
+
+
+def test_gitlab_filter_changes(benchmark):
+    from biz.platforms.gitlab.webhook_handler import filter_changes
+
+    changes = [{"old_path": f.path, "new_path": f.path, "diff": f.diff, "deleted_file": False} for f in _FILES]
+    assert len(benchmark(filter_changes, changes)) == 400
+
+
+def test_github_filter_changes(benchmark):
+    from biz.platforms.github.webhook_handler import filter_changes
+
+    changes = [{"new_path": f.path, "diff": f.diff, "status": "modified", "additions": f.additions,
+                "deletions": f.deletions} for f in _FILES]
+    assert len(benchmark(filter_changes, changes)) == 400
+
+
+def test_gitea_filter_changes(benchmark):
+    from biz.platforms.gitea.webhook_handler import filter_changes
+
+    changes = [{"new_path": f.path, "diff": f.diff, "status": "modified", "additions": f.additions,
+                "deletions": f.deletions} for f in _FILES]
+    assert len(benchmark(filter_changes, changes)) == 400
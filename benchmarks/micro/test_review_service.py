@@ -0,0 +1,70 @@
+"""ReviewService inserts and range queries on a populated review log.
+
+The table is filled once per session (``BENCH_REVIEW_ROWS``, default 1M rows)
+in a temporary database.
+"""
+import os
+import random
+import sqlite3
+
+import pytest
+
+from biz.entity.review_entity import MergeRequestReviewEntity
+from biz.service.review_service import ReviewService
+
+ROWS = int(os.getenv("BENCH_REVIEW_ROWS", "1000000"))
+_START = 1_700_000_000
+# One row per ~30s, so ROWS rows span ROWS * 30 seconds.
+_STEP = 30
+_PROJECTS = [f"project-{i}" for i in range(50)]
+_AUTHORS = [f"dev-{i}" for i in range(200)]
+
+
+@pytest.fixture(scope="module", autouse=True)
+def populated_db(tmp_path_factory):
+    db_file = str(tmp_path_factory.mktemp("review_db") / "data.db")
+    original = ReviewService.DB_FILE
+    ReviewService.DB_FILE = db_file
+    ReviewService.init_db()
+    rng = random.Random(0)
+    rows = ((rng.choice(_PROJECTS), rng.choice(_AUTHORS), f"feature/{i % 997}", "main", _START + i * _STEP,
+             "feat: change", rng.randint(40, 100), f"https://gitlab.example.com/mr/{i}", "总分:80分 " * 8,
+             rng.randint(0, 400), rng.randint(0, 200), f"{i:040x}")
+            for i in range(ROWS))
+    with sqlite3.connect(db_file) as conn:
+        conn.executemany("INSERT INTO mr_review_log (project_name, author, source_branch, target_branch, updated_at, "
+                         "commit_messages, score, url, review_result, additions, deletions, last_commit_id) "
+                         "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    yield db_file
+    ReviewService.DB_FILE = original
+
+
+def _entity(index: int) -> MergeRequestReviewEntity:
+    return MergeRequestReviewEntity(
+        project_name="project-1", author="dev-1", source_branch="feature/x", target_branch="main",
+        updated_at=_START + ROWS * _STEP + index, commits=[{"message": "feat: change"}], score=80,
+        url="https://gitlab.example.com/mr/x", review_result="总分:80分", url_slug="gitlab_example_com",
+        webhook_data={}, additions=10, deletions=2, last_commit_id=f"new{index}")
+
+
+def test_insert_mr_review_log(benchmark):
+    counter = iter(range(10 ** 9))
+    benchmark(lambda: ReviewService.insert_mr_review_log(_entity(next(counter))))
+
+
+def test_get_mr_review_logs_one_day(benchmark):
+    end = _START + ROWS * _STEP
+    df = benchmark(ReviewService.get_mr_review_logs, updated_at_gte=end - 86400, updated_at_lte=end)
+    assert len(df) >= 86400 // _STEP
+
+
+def test_get_mr_review_logs_one_day_by_author(benchmark):
+    end = _START + ROWS * _STEP
+    df = benchmark(ReviewService.get_mr_review_logs, authors=["dev-1", "dev-2"], updated_at_gte=end - 86400,
+                   updated_at_lte=end)
+    assert len(df) > 0
+
+
+def test_check_mr_last_commit_id_exists(benchmark):
+    last = f"{ROWS - 1:040x}"
+    assert benchmark(ReviewService.check_mr_last_commit_id_exists, "project-0", "feature/0", "main", last) in (True, False)
@@ -0,0 +1,61 @@
+"""Token counting/truncation, directory tree rendering and IM message splitting."""
+import pytest
+from pathspec import GitIgnorePattern, PathSpec
+
+from benchmarks.stubs.platform_server import PlatformConfig, generate_files
+from biz.utils import token_util
+from biz.utils.dir_util import get_directory_tree
+from biz.utils.im.wecom import WeComNotifier
+
+_DIFF_TEXT = "".join(f.diff for f in generate_files(PlatformConfig(files=40, hunk_lines=60), "bench/tokens"))
+_REVIEW_TEXT = ("### 问题点\n1. `src/app.py` 中缺少对异常输入的校验，可能导致运行时错误。\n" * 400)
+
+
+_LARGE_OUTPUT = _DIFF_TEXT * 40
+
+
+def test_count_tokens(benchmark, token_backend):
+    def count():
+        token_util._count_memo.clear()
+        return token_util.count_tokens(_DIFF_TEXT)
+
+    assert benchmark(count) > 0
+
+
+def test_count_tokens_memoised(benchmark, token_backend):
+    assert benchmark(token_util.count_tokens, _DIFF_TEXT) > 0
+
+
+def test_truncate_text_by_tokens(benchmark, token_backend):
+    assert len(benchmark(token_util.truncate_text_by_tokens, _DIFF_TEXT, 2000)) < len(_DIFF_TEXT)
+
+
+def test_truncate_large_output(benchmark, token_backend):
+    # Several MB of tool output cut to the runner's default budget.
+    assert len(benchmark(token_util.truncate_text_by_tokens, _LARGE_OUTPUT, 10_000)) < len(_LARGE_OUTPUT)
+
+
+@pytest.fixture(scope="module")
+def source_tree(tmp_path_factory):
+    root = tmp_path_factory.mktemp("tree")
+    for package in range(20):
+        for module in range(5):
+            directory = root / f"pkg_{package}" / f"module_{module}"
+            directory.mkdir(parents=True)
+            for index in range(10):
+                (directory / f"file_{index}.py").write_text("")
+            (directory / "build").mkdir()
+            (directory / "build" / "out.o").write_text("")
+    return root
+
+
+def test_get_directory_tree(benchmark, source_tree):
+    spec = PathSpec.from_lines(GitIgnorePattern, ["build/", "*.pyc"])
+    tree = benchmark(get_directory_tree, str(source_tree), spec, 3)
+    assert "file_9.py" in tree and "build" not in tree
+
+
+@pytest.mark.parametrize("max_bytes", [2048, 4096])
+def test_wecom_split_content(benchmark, max_bytes):
+    chunks = benchmark(WeComNotifier(webhook_url="http://localhost")._split_content, _REVIEW_TEXT, max_bytes)
+    assert "".join(chunks) == _REVIEW_TEXT
@@ -0,0 +1 @@
+"""Local stand-ins for external services (LLM providers, Git platforms) used by the benchmarks."""
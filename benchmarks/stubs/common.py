@@ -0,0 +1,117 @@
+"""Building blocks shared by the stub servers: latency models, rate limiting, stats, serving."""
+from __future__ import annotations
+
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from werkzeug.serving import BaseWSGIServer, make_server
+
+
+@dataclass
+class LatencyModel:
+    """A latency distribution in milliseconds.
+
+    Parsed from ``kind:params``:
+      - ``fixed:500``
+      - ``uniform:200,2000``        (low, high)
+      - ``normal:800,200``          (mean, stddev; clamped at 0)
+      - ``lognormal:800,0.5``       (median, sigma) — long-tailed, closest to real LLM APIs
+    """
+    kind: str = "fixed"
+    a: float = 0.0
+    b: float = 0.0
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyModel":
+        kind, _, params = (spec or "fixed:0").partition(":")
+        values = [float(v) for v in params.split(",") if v.strip()] or [0.0]
+        if kind not in ("fixed", "uniform", "normal", "lognormal"):
+            raise ValueError(f"unknown latency distribution: {kind}")
+        return cls(kind, values[0], values[1] if len(values) > 1 else 0.0)
+
+    def sample(self, rng: random.Random) -> float:
+        """One latency sample in seconds."""
+        if self.kind == "uniform":
+            ms = rng.uniform(self.a, self.b)
+        elif self.kind == "normal":
+            ms = rng.gauss(self.a, self.b)
+        elif self.kind == "lognormal":
+            ms = self.a * rng.lognormvariate(0.0, self.b) if self.a > 0 else 0.0
+        else:
+            ms = self.a
+        return max(ms, 0.0) / 1000.0
+
+
+class RateLimiter:
+    """Token bucket: `rate` requests per second with bursts up to `burst`; rate <= 0 disables it."""
+
+    def __init__(self, rate: float = 0.0, burst: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate, 1.0)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> Tuple[bool, float]:
+        """Take one token. Returns ``(allowed, retry_after_seconds)``."""
+        if self.rate <= 0:
+            return True, 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True, 0.0
+            return False, (1 - self._tokens) / self.rate
+
+
+class StubStats:
+    """Thread-safe request counters exposed by the stubs at ``GET /stats``."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.requests = Counter()
+            self.statuses = Counter()
+            self.in_flight = 0
+            self.max_in_flight = 0
+
+    def begin(self, endpoint: str) -> None:
+        with self._lock:
+            self.requests[endpoint] += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def end(self, status: int) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self.statuses[str(status)] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "requests": dict(self.requests),
+                "statuses": dict(self.statuses),
+                "in_flight": self.in_flight,
+                "max_in_flight": self.max_in_flight,
+            }
+
+
+def serve_in_thread(app, host: str = "127.0.0.1", port: int = 0) -> Tuple[BaseWSGIServer, str]:
+    """Serve a WSGI app from a daemon thread (threaded server).
+
+    Returns the server (call ``shutdown()`` to stop it) and its base URL;
+    ``port=0`` picks a free port.
+    """
+    server = make_server(host, port, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, name=f"stub-{server.port}", daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.port}"
@@ -0,0 +1,423 @@
+"""OpenAI / Anthropic / Ollama compatible LLM stub server.
+
+Answers chat requests with canned code reviews (ending in ``总分:XX分``) and,
+when the request offers tools, with tool calls for the first few rounds, so
+both the diff-only and the agentic review paths can be load-tested without
+spending tokens. Latency, error injection and rate limits are configurable.
+
+Endpoints (point the clients at it via their usual base URL variables):
+
+    OpenAI chat completions   POST /v1/chat/completions, /chat/completions
+        OPENAI_API_BASE_URL=http://127.0.0.1:8900/v1
+        DEEPSEEK_API_BASE_URL=http://127.0.0.1:8900
+        QWEN_API_BASE_URL=http://127.0.0.1:8900/v1
+        ZHIPUAI_BASE_URL=http://127.0.0.1:8900/v1   (read by the ZhipuAI SDK)
+    Anthropic messages        POST /v1/messages
+        ANTHROPIC_API_BASE_URL=http://127.0.0.1:8900
+    Ollama chat               POST /api/chat
+        OLLAMA_API_BASE_URL=http://127.0.0.1:8900
+
+    GET /stats, POST /stats/reset
+
+Both streaming and non-streaming responses are supported. Run with::
+
+    python -m benchmarks.stubs.llm_server --port 8900 --latency lognormal:800,0.5 \\
+        --error-rate 0.02 --rate-limit 20 --score 60-95 --tool-rounds 2
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from flask import Flask, Response, jsonify, request
+
+from benchmarks.stubs.common import LatencyModel, RateLimiter, StubStats, serve_in_thread
+
+# Changed files as serialized by biz.utils.diff_serializer ("### path (+a -d)").
+_CHANGED_PATH_RE = re.compile(r"^### (\S+) \(\+\d+ -\d+\)", re.MULTILINE)
+
+_REVIEW_TEMPLATE = """### 😀代码评分：总分:{score}分
+
+#### ✅代码优点：
+- 改动范围清晰，命名与现有代码保持一致。
+
+#### 🤔问题点：
+1. `{path}` 中缺少对异常输入的校验，可能导致运行时错误。
+2. 部分新增逻辑没有对应的单元测试。
+{padding}
+#### 💡建议：
+- 补充边界条件的处理与测试用例。
+
+总分:{score}分"""
+
+
+@dataclass
+class StubConfig:
+    latency: LatencyModel = field(default_factory=LatencyModel)
+    # Output pacing in tokens/second (≈4 chars per token); 0 sends the reply at once.
+    token_rate: float = 0.0
+    error_rate: float = 0.0
+    error_statuses: Tuple[int, ...] = (500, 502, 503, 529)
+    rate_limit: float = 0.0
+    rate_burst: Optional[float] = None
+    score_range: Tuple[int, int] = (60, 95)
+    # Rounds answered with tool calls before the final review (agentic runs).
+    tool_rounds: int = 2
+    parallel_tool_calls: int = 2
+    # Extra filler lines in the review, to simulate longer outputs.
+    review_padding_lines: int = 0
+    stream_chunk_chars: int = 24
+    seed: Optional[int] = None
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _text_of(content: Any) -> str:
+    """Flatten OpenAI / Anthropic message content (string or block list) to text."""
+    if isinstance(content, str):
+        return content
+    parts = []
+    for block in content or []:
+        if isinstance(block, dict):
+            for key in ("text", "content", "input"):
+                if key in block:
+                    value = block[key]
+                    parts.append(value if isinstance(value, str) else json.dumps(value, ensure_ascii=False))
+    return "\n".join(parts)
+
+
+class LLMStub:
+    def __init__(self, config: StubConfig):
+        self.config = config
+        self.stats = StubStats()
+        self.limiter = RateLimiter(config.rate_limit, config.rate_burst)
+        self._rng = random.Random(config.seed)
+        self._rng_lock = threading.Lock()
+        self._seen_prefixes: set = set()
+
+    # ---- scenario -----------------------------------------------------------
+
+    def _random(self) -> float:
+        with self._rng_lock:
+            return self._rng.random()
+
+    def _latency(self) -> float:
+        with self._rng_lock:
+            return self.config.latency.sample(self._rng)
+
+    def _injected_error(self) -> Optional[Tuple[int, float]]:
+        """(status, retry_after) if this request should fail, else None."""
+        allowed, retry_after = self.limiter.acquire()
+        if not allowed:
+            return 429, retry_after
+        if self.config.error_rate > 0 and self._random() < self.config.error_rate:
+            with self._rng_lock:
+                return self._rng.choice(self.config.error_statuses), 0.0
+        return None
+
+    def review_text(self, prompt: str) -> str:
+        low, high = self.config.score_range
+        with self._rng_lock:
+            score = self._rng.randint(low, high)
+        paths = _CHANGED_PATH_RE.findall(prompt)
+        padding = "".join(f"{i + 3}. 第 {i + 3} 处可读性问题：建议拆分过长的函数。\n"
+                          for i in range(self.config.review_padding_lines))
+        return _REVIEW_TEMPLATE.format(score=score, path=paths[0] if paths else "main.py", padding=padding)
+
+    def tool_calls(self, tools: List[Dict], prompt: str, round_index: int) -> List[Dict]:
+        """Plausible calls to the offered tools: ``[{"id", "name", "arguments"}]``."""
+        paths = _CHANGED_PATH_RE.findall(prompt) or ["README.md"]
+        calls = []
+        for i in range(max(1, self.config.parallel_tool_calls)):
+            tool = tools[(round_index + i) % len(tools)]
+            name = tool["name"]
+            path = paths[(round_index + i) % len(paths)]
+            if name == "read_file":
+                arguments = {"path": path}
+            elif name == "run_command":
+                arguments = {"cmd": f"grep -rn \"{path.rsplit('/', 1)[-1].split('.')[0]}\" . | head -20"}
+            else:
+                arguments = {}
+                schema = tool.get("schema") or {}
+                for prop in schema.get("required", []):
+                    kind = (schema.get("properties", {}).get(prop) or {}).get("type")
+                    arguments[prop] = {"integer": 1, "number": 1, "boolean": False}.get(kind, path)
+            calls.append({"id": f"call_{uuid.uuid4().hex[:12]}", "name": name, "arguments": arguments})
+        return calls
+
+    def cached_tokens(self, prefix: str, prompt_tokens: int) -> int:
+        """Simulated prefix cache: a repeated system prompt is served from cache."""
+        if not prefix:
+            return 0
+        key = hashlib.sha1(prefix.encode("utf-8")).hexdigest()
+        with self._rng_lock:
+            hit = key in self._seen_prefixes
+            self._seen_prefixes.add(key)
+        return min(_estimate_tokens(prefix), prompt_tokens) if hit else 0
+
+    def plan(self, prompt: str, tools: List[Dict], tool_rounds_done: int) -> Tuple[str, List[Dict]]:
+        if tools and tool_rounds_done < self.config.tool_rounds:
+            return "", self.tool_calls(tools, prompt, tool_rounds_done)
+        return self.review_text(prompt), []
+
+    def chunks(self, text: str) -> Iterator[str]:
+        size = max(1, self.config.stream_chunk_chars)
+        delay = size / 4 / self.config.token_rate if self.config.token_rate > 0 else 0.0
+        for start in range(0, len(text), size):
+            if delay and start:
+                time.sleep(delay)
+            yield text[start:start + size]
+
+    def generation_delay(self, text: str) -> float:
+        return _estimate_tokens(text) / self.config.token_rate if self.config.token_rate > 0 and text else 0.0
+
+
+def _sse(data: Any, event: Optional[str] = None) -> str:
+    payload = data if isinstance(data, str) else json.dumps(data, ensure_ascii=False)
+    return (f"event: {event}\n" if event else "") + f"data: {payload}\n\n"
+
+
+def create_app(config: Optional[StubConfig] = None) -> Flask:
+    stub = LLMStub(config or StubConfig())
+    app = Flask(__name__)
+    app.config["stub"] = stub
+
+    def _error(protocol: str, status: int, retry_after: float) -> Response:
+        message = "rate limited by stub" if status == 429 else f"injected error {status}"
+        if protocol == "anthropic":
+            kind = {429: "rate_limit_error", 529: "overloaded_error"}.get(status, "api_error")
+            body = {"type": "error", "error": {"type": kind, "message": message}}
+        elif protocol == "ollama":
+            body = {"error": message}
+        else:
+            body = {"error": {"message": message, "type": "server_error", "code": status}}
+        response = jsonify(body)
+        response.status_code = status
+        if retry_after:
+            response.headers["retry-after-ms"] = str(int(retry_after * 1000))
+            response.headers["retry-after"] = str(max(1, int(retry_after + 0.999)))
+        return response
+
+    def _handle(protocol: str, handler) -> Response:
+        stub.stats.begin(protocol)
+        status = 200
+        try:
+            failure = stub._injected_error()
+            time.sleep(stub._latency())
+            if failure:
+                status = failure[0]
+                return _error(protocol, *failure)
+            return handler(request.get_json(force=True, silent=True) or {})
+        finally:
+            stub.stats.end(status)
+
+    # ---- OpenAI -------------------------------------------------------------
+
+    def _openai(body: Dict) -> Response:
+        messages = body.get("messages") or []
+        tools = [{"name": t["function"]["name"], "schema": t["function"].get("parameters")}
+                 for t in body.get("tools") or [] if t.get("function")]
+        prompt = "\n".join(_text_of(m.get("content")) for m in messages)
+        system = "\n".join(_text_of(m.get("content")) for m in messages if m.get("role") == "system")
+        rounds_done = sum(1 for m in messages if m.get("role") == "assistant" and m.get("tool_calls"))
+        text, calls = stub.plan(prompt, tools, rounds_done)
+        model = body.get("model") or "stub-model"
+        prompt_tokens = _estimate_tokens(prompt)
+        completion_tokens = _estimate_tokens(text + json.dumps([c["arguments"] for c in calls]))
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                 "total_tokens": prompt_tokens + completion_tokens,
+                 "prompt_tokens_details": {"cached_tokens": stub.cached_tokens(system, prompt_tokens)}}
+        tool_calls = [{"id": c["id"], "type": "function",
+                       "function": {"name": c["name"], "arguments": json.dumps(c["arguments"])}} for c in calls]
+        finish_reason = "tool_calls" if calls else "stop"
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:16]}"
+        created = int(time.time())
+
+        if not body.get("stream"):
+            time.sleep(stub.generation_delay(text))
+            message = {"role": "assistant", "content": text or None}
+            if tool_calls:
+                message["tool_calls"] = tool_calls
+            return jsonify({"id": completion_id, "object": "chat.completion", "created": created, "model": model,
+                            "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+                            "usage": usage})
+
+        include_usage = (body.get("stream_options") or {}).get("include_usage")
+
+        def chunk(delta: Dict, finish: Optional[str] = None, with_usage: bool = False) -> str:
+            data = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                    "choices": [] if with_usage else [{"index": 0, "delta": delta, "finish_reason": finish}]}
+            if with_usage:
+                data["usage"] = usage
+            return _sse(data)
+
+        def events() -> Iterator[str]:
+            yield chunk({"role": "assistant", "content": ""})
+            for piece in stub.chunks(text):
+                yield chunk({"content": piece})
+            for index, call in enumerate(tool_calls):
+                yield chunk({"tool_calls": [{"index": index, **call}]})
+            yield chunk({}, finish_reason)
+            if include_usage:
+                yield chunk({}, with_usage=True)
+            yield _sse("[DONE]")
+
+        return Response(events(), mimetype="text/event-stream")
+
+    app.add_url_rule("/v1/chat/completions", "openai_v1", lambda: _handle("openai", _openai), methods=["POST"])
+    app.add_url_rule("/chat/completions", "openai", lambda: _handle("openai", _openai), methods=["POST"])
+
+    # ---- Anthropic ----------------------------------------------------------
+
+    def _anthropic(body: Dict) -> Response:
+        messages = body.get("messages") or []
+        system = _text_of(body.get("system") or "")
+        tools = [{"name": t["name"], "schema": t.get("input_schema")} for t in body.get("tools") or []]
+        prompt = system + "\n" + "\n".join(_text_of(m.get("content")) for m in messages)
+        rounds_done = sum(1 for m in messages if m.get("role") == "assistant" and isinstance(m.get("content"), list)
+                          and any(b.get("type") == "tool_use" for b in m["content"] if isinstance(b, dict)))
+        text, calls = stub.plan(prompt, tools, rounds_done)
+        model = body.get("model") or "stub-model"
+        prompt_tokens = _estimate_tokens(prompt)
+        cached = stub.cached_tokens(system, prompt_tokens)
+        usage = {"input_tokens": prompt_tokens - cached, "output_tokens": _estimate_tokens(text or "x"),
+                 "cache_read_input_tokens": cached,
+                 "cache_creation_input_tokens": 0 if cached or not system else _estimate_tokens(system)}
+        content = ([{"type": "text", "text": text}] if text else []) + [
+            {"type": "tool_use", "id": c["id"].replace("call_", "toolu_"), "name": c["name"], "input": c["arguments"]}
+            for c in calls]
+        stop_reason = "tool_use" if calls else "end_turn"
+        message_id = f"msg_{uuid.uuid4().hex[:16]}"
+
+        if not body.get("stream"):
+            time.sleep(stub.generation_delay(text))
+            return jsonify({"id": message_id, "type": "message", "role": "assistant", "model": model,
+                            "content": content, "stop_reason": stop_reason, "stop_sequence": None,
+                            "usage": usage})
+
+        def events() -> Iterator[str]:
+            start_usage = dict(usage, output_tokens=1)
+            yield _sse({"type": "message_start", "message": {
+                "id": message_id, "type": "message", "role": "assistant", "model": model, "content": [],
+                "stop_reason": None, "stop_sequence": None, "usage": start_usage}}, "message_start")
+            for index, block in enumerate(content):
+                if block["type"] == "text":
+                    yield _sse({"type": "content_block_start", "index": index,
+                                "content_block": {"type": "text", "text": ""}}, "content_block_start")
+                    for piece in stub.chunks(block["text"]):
+                        yield _sse({"type": "content_block_delta", "index": index,
+                                    "delta": {"type": "text_delta", "text": piece}}, "content_block_delta")
+                else:
+                    yield _sse({"type": "content_block_start", "index": index,
+                                "content_block": {**block, "input": {}}}, "content_block_start")
+                    yield _sse({"type": "content_block_delta", "index": index,
+                                "delta": {"type": "input_json_delta", "partial_json": json.dumps(block["input"])}},
+                               "content_block_delta")
+                yield _sse({"type": "content_block_stop", "index": index}, "content_block_stop")
+            yield _sse({"type": "message_delta", "delta": {"stop_reason": stop_reason, "stop_sequence": None},
+                        "usage": {"output_tokens": usage["output_tokens"]}}, "message_delta")
+            yield _sse({"type": "message_stop"}, "message_stop")
+
+        return Response(events(), mimetype="text/event-stream")
+
+    app.add_url_rule("/v1/messages", "anthropic", lambda: _handle("anthropic", _anthropic), methods=["POST"])
+
+    # ---- Ollama -------------------------------------------------------------
+
+    def _ollama(body: Dict) -> Response:
+        messages = body.get("messages") or []
+        prompt = "\n".join(_text_of(m.get("content")) for m in messages)
+        text = stub.review_text(prompt)
+        model = body.get("model") or "stub-model"
+        counts = {"prompt_eval_count": _estimate_tokens(prompt), "eval_count": _estimate_tokens(text)}
+        created_at = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+        if body.get("stream") is False:
+            time.sleep(stub.generation_delay(text))
+            return jsonify({"model": model, "created_at": created_at, "done": True, "done_reason": "stop",
+                            "message": {"role": "assistant", "content": text}, **counts})
+
+        def lines() -> Iterator[str]:
+            for piece in stub.chunks(text):
+                yield json.dumps({"model": model, "created_at": created_at, "done": False,
+                                  "message": {"role": "assistant", "content": piece}}, ensure_ascii=False) + "\n"
+            yield json.dumps({"model": model, "created_at": created_at, "done": True, "done_reason": "stop",
+                              "message": {"role": "assistant", "content": ""}, **counts}) + "\n"
+
+        return Response(lines(), mimetype="application/x-ndjson")
+
+    app.add_url_rule("/api/chat", "ollama", lambda: _handle("ollama", _ollama), methods=["POST"])
+
+    # ---- stats --------------------------------------------------------------
+
+    @app.get("/stats")
+    def stats():
+        return jsonify(stub.stats.snapshot())
+
+    @app.post("/stats/reset")
+    def reset_stats():
+        stub.stats.reset()
+        return jsonify({"ok": True})
+
+    return app
+
+
+def _parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", default="fixed:0",
+                        help="time to first byte, e.g. fixed:500, uniform:200,2000, lognormal:800,0.5")
+    parser.add_argument("--token-rate", type=float, default=0.0, help="output tokens/second (0 = instant)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="probability of an injected 5xx")
+    parser.add_argument("--error-statuses", default="500,502,503,529")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="requests/second before 429 (0 = off)")
+    parser.add_argument("--rate-burst", type=float, default=None)
+    parser.add_argument("--score", default="60-95", help="range of the canned 总分, e.g. 60-95")
+    parser.add_argument("--tool-rounds", type=int, default=2)
+    parser.add_argument("--parallel-tool-calls", type=int, default=2)
+    parser.add_argument("--review-padding-lines", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=None)
+    return parser.parse_args(argv)
+
+
+def config_from_args(args: argparse.Namespace) -> StubConfig:
+    low, _, high = args.score.partition("-")
+    return StubConfig(
+        latency=LatencyModel.parse(args.latency),
+        token_rate=args.token_rate,
+        error_rate=args.error_rate,
+        error_statuses=tuple(int(s) for s in args.error_statuses.split(",") if s.strip()),
+        rate_limit=args.rate_limit,
+        rate_burst=args.rate_burst,
+        score_range=(int(low), int(high or low)),
+        tool_rounds=args.tool_rounds,
+        parallel_tool_calls=args.parallel_tool_calls,
+        review_padding_lines=args.review_padding_lines,
+        seed=args.seed,
+    )
+
+
+def main(argv=None) -> None:
+    args = _parse_args(argv)
+    server, url = serve_in_thread(create_app(config_from_args(args)), args.host, args.port)
+    print(f"LLM stub listening on {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
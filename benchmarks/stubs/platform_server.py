@@ -0,0 +1,410 @@
+"""GitLab / GitHub / Gitea API stub.
+
+Serves the endpoints the webhook handlers in ``biz/platforms`` call, backed by
+deterministic generated changes (the same project + MR/PR number always
+yields the same files, diffs and commits), so the whole pipeline can be
+benchmarked offline over real HTTP. Latency and rate limits are injectable;
+posted notes/comments are kept in memory, and every request is appended to a
+timeline (``app.config["stub_events"]``) keyed by MR/PR, which the load
+generator uses to split end-to-end latency into stages.
+
+    GitLab   /api/v4/...          GITLAB_URL=http://127.0.0.1:8901 (or the webhook's project URL)
+    GitHub   /repos/...           GITHUB_API_URL=http://127.0.0.1:8901
+    Gitea    /api/v1/...          GITEA_URL=http://127.0.0.1:8901
+
+    GET /stats, POST /stats/reset, GET /_notes
+
+Run with::
+
+    python -m benchmarks.stubs.platform_server --port 8901 --files 20 --hunk-lines 40 \\
+        --latency lognormal:80,0.4 --rate-limit 50
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import itertools
+import random
+import re
+import threading
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from flask import Flask, Response, jsonify, request
+
+from benchmarks.stubs.common import LatencyModel, RateLimiter, StubStats, serve_in_thread
+
+_EXTENSIONS = (".py", ".java", ".go", ".ts", ".php")
+_COMMENT_PREFIX = {".py": "#", ".php": "//", ".java": "//", ".go": "//", ".ts": "//"}
+_GITLAB_MR_PATH_RE = re.compile(r"^/api/v4/projects/([^/]+)/merge_requests/(\d+)(?:/|$)")
+_HUB_PR_PATH_RE = re.compile(r"^(/api/v1)?/repos/([^/]+)/([^/]+)/(?:pulls|issues)/(\d+)(?:/|$)")
+
+
+@dataclass
+class PlatformConfig:
+    latency: LatencyModel = field(default_factory=LatencyModel)
+    rate_limit: float = 0.0
+    rate_burst: Optional[float] = None
+    # Shape of every generated change set.
+    files: int = 20
+    hunk_lines: int = 30
+    hunks_per_file: int = 2
+    commits: int = 3
+    # GitLab's /changes truncates to this many files and sets "overflow".
+    overflow_files: int = 1000
+    protected_branches: Tuple[str, ...] = ("main", "master", "release/*")
+
+
+@dataclass
+class FakeFile:
+    path: str
+    diff: str
+    additions: int
+    deletions: int
+
+
+def job_key(path: str) -> Optional[str]:
+    """MR/PR key of an API path (``gitlab/<project>/mr/<iid>``, ``github|gitea/<owner>/<repo>/pr/<n>``)."""
+    match = _GITLAB_MR_PATH_RE.match(path)
+    if match:
+        return f"gitlab/{match.group(1)}/mr/{match.group(2)}"
+    match = _HUB_PR_PATH_RE.match(path)
+    if match:
+        platform = "gitea" if match.group(1) else "github"
+        return f"{platform}/{match.group(2)}/{match.group(3)}/pr/{match.group(4)}"
+    return None
+
+
+def _sha(*parts) -> str:
+    return hashlib.sha1("/".join(str(p) for p in parts).encode()).hexdigest()
+
+
+def generate_files(config: PlatformConfig, key: str) -> List[FakeFile]:
+    """Deterministic change set for `key` (e.g. ``"gitlab/12/mr/3"``)."""
+    rng = random.Random(key)
+    files = []
+    for index in range(config.files):
+        ext = _EXTENSIONS[index % len(_EXTENSIONS)]
+        path = f"src/module_{index // 5}/file_{index}{ext}"
+        comment = _COMMENT_PREFIX[ext]
+        hunks = []
+        additions = deletions = 0
+        for h in range(config.hunks_per_file):
+            start = 10 + h * (config.hunk_lines + 20)
+            removed = max(1, config.hunk_lines // 4)
+            added = config.hunk_lines - removed
+            lines = [f" {comment} context line {start}"]
+            lines += [f"-    value_{h}_{i} = compute({rng.randint(0, 999)})" for i in range(removed)]
+            lines += [f"+    value_{h}_{i} = compute_checked({rng.randint(0, 999)}, limit={i})" for i in range(added)]
+            hunks.append(f"@@ -{start},{removed + 1} +{start},{added + 1} @@ def handler_{h}():\n" + "\n".join(lines))
+            additions += added
+            deletions += removed
+        files.append(FakeFile(path, "\n".join(hunks) + "\n", additions, deletions))
+    return files
+
+
+def generate_commits(config: PlatformConfig, key: str) -> List[Dict]:
+    base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return [{
+        "sha": _sha(key, "commit", i),
+        "message": f"feat: change set {key} part {i + 1}\n\nGenerated by the platform stub.",
+        "author": "bench", "email": "bench@example.com",
+        "date": (base + timedelta(minutes=i)).isoformat(),
+    } for i in range(config.commits)]
+
+
+def _page_args(default_per_page: int) -> Tuple[int, int]:
+    page = max(1, request.args.get("page", 1, type=int))
+    per_page = max(1, min(100, request.args.get("per_page", default_per_page, type=int)))
+    return page, per_page
+
+
+def _paginate(items: List, default_per_page: int, link_style: bool) -> Response:
+    """GitLab-style X-* headers, or GitHub/Gitea-style Link + X-Total-Count."""
+    page, per_page = _page_args(default_per_page)
+    chunk = items[(page - 1) * per_page: page * per_page]
+    response = jsonify(chunk)
+    total_pages = max(1, -(-len(items) // per_page))
+    response.headers["X-Total"] = str(len(items))
+    response.headers["X-Total-Count"] = str(len(items))
+    if link_style:
+        base = request.base_url
+        links = [f'<{base}?page={p}&per_page={per_page}>; rel="{rel}"'
+                 for p, rel in ((page + 1, "next"), (total_pages, "last")) if page < total_pages]
+        if links:
+            response.headers["Link"] = ", ".join(links)
+    else:
+        response.headers["X-Page"] = str(page)
+        response.headers["X-Per-Page"] = str(per_page)
+        response.headers["X-Total-Pages"] = str(total_pages)
+        response.headers["X-Next-Page"] = str(page + 1) if page < total_pages else ""
+    return response
+
+
+def create_app(config: Optional[PlatformConfig] = None) -> Flask:
+    config = config or PlatformConfig()
+    app = Flask(__name__)
+    stats = StubStats()
+    limiter = RateLimiter(config.rate_limit, config.rate_burst)
+    rng = random.Random()
+    rng_lock = threading.Lock()
+    notes: Dict[str, List[Dict]] = defaultdict(list)
+    notes_lock = threading.Lock()
+    note_ids = itertools.count(1)
+    # deque.append is atomic, so request threads append without a lock.
+    events = deque(maxlen=1_000_000)
+    app.config.update(stub_stats=stats, stub_notes=notes, stub_events=events)
+
+    def platform_of(path: str) -> str:
+        if path.startswith("/api/v4/"):
+            return "gitlab"
+        if path.startswith("/api/v1/"):
+            return "gitea"
+        return "github"
+
+    @app.before_request
+    def _inject():
+        if request.path in ("/stats", "/stats/reset", "/_notes"):
+            return None
+        platform = platform_of(request.path)
+        stats.begin(f"{platform} {request.method} {request.url_rule.rule if request.url_rule else request.path}")
+        request.environ["stub.counted"] = True
+        with rng_lock:
+            delay = config.latency.sample(rng)
+        time.sleep(delay)
+        allowed, retry_after = limiter.acquire()
+        if allowed:
+            return None
+        reset = int(time.time() + retry_after) + 1
+        response = jsonify({"message": "API rate limit exceeded (stub)"})
+        # GitHub reports primary rate limits as 403 with x-ratelimit-remaining: 0.
+        response.status_code = 403 if platform == "github" else 429
+        response.headers.update({"Retry-After": str(max(1, int(retry_after + 0.999))),
+                                 "RateLimit-Remaining": "0", "X-RateLimit-Remaining": "0",
+                                 "RateLimit-Reset": str(reset), "X-RateLimit-Reset": str(reset)})
+        return response
+
+    @app.after_request
+    def _count(response):
+        if request.environ.get("stub.counted"):
+            stats.end(response.status_code)
+            events.append({"t": time.time(), "key": job_key(request.path), "method": request.method,
+                           "path": request.path, "status": response.status_code})
+        return response
+
+    def _add_note(key: str, body: str) -> Dict:
+        note = {"id": next(note_ids), "body": body, "created_at": datetime.now(timezone.utc).isoformat(),
+                "updated_ts": time.time()}
+        with notes_lock:
+            notes[key].append(note)
+        return note
+
+    def _update_note(key: str, note_id: int, body: str) -> Optional[Dict]:
+        with notes_lock:
+            for note in notes.get(key, []):
+                if note["id"] == note_id:
+                    note["body"] = body
+                    note["updated_ts"] = time.time()
+                    return note
+        return None
+
+    # ---- GitLab -------------------------------------------------------------
+
+    def _gitlab_diff(f: FakeFile) -> Dict:
+        return {"old_path": f.path, "new_path": f.path, "diff": f.diff, "new_file": False,
+                "renamed_file": False, "deleted_file": False, "a_mode": "100644", "b_mode": "100644"}
+
+    def _gitlab_commit(c: Dict) -> Dict:
+        return {"id": c["sha"], "short_id": c["sha"][:8], "title": c["message"].split("\n")[0],
+                "message": c["message"], "author_name": c["author"], "author_email": c["email"],
+                "created_at": c["date"], "web_url": f"{request.host_url}commit/{c['sha']}"}
+
+    @app.get("/api/v4/projects/<project>/merge_requests/<int:iid>/changes")
+    def gitlab_mr_changes(project, iid):
+        files = generate_files(config, f"gitlab/{project}/mr/{iid}")
+        shown = files[:config.overflow_files]
+        return jsonify({"iid": iid, "project_id": project, "state": "opened",
+                        "changes": [_gitlab_diff(f) for f in shown],
+                        "changes_count": str(len(shown)) + ("+" if len(files) > len(shown) else ""),
+                        "overflow": len(files) > len(shown)})
+
+    @app.get("/api/v4/projects/<project>/merge_requests/<int:iid>/diffs")
+    def gitlab_mr_diffs(project, iid):
+        files = generate_files(config, f"gitlab/{project}/mr/{iid}")
+        return _paginate([_gitlab_diff(f) for f in files], 20, link_style=False)
+
+    @app.get("/api/v4/projects/<project>/merge_requests/<int:iid>/commits")
+    def gitlab_mr_commits(project, iid):
+        commits = generate_commits(config, f"gitlab/{project}/mr/{iid}")
+        return _paginate([_gitlab_commit(c) for c in commits], 20, link_style=False)
+
+    @app.post("/api/v4/projects/<project>/merge_requests/<int:iid>/notes")
+    def gitlab_mr_add_note(project, iid):
+        body = (request.get_json(silent=True) or {}).get("body", "")
+        return jsonify(_add_note(f"gitlab/{project}/mr/{iid}", body)), 201
+
+    @app.put("/api/v4/projects/<project>/merge_requests/<int:iid>/notes/<int:note_id>")
+    def gitlab_mr_update_note(project, iid, note_id):
+        body = (request.get_json(silent=True) or {}).get("body", "")
+        note = _update_note(f"gitlab/{project}/mr/{iid}", note_id, body)
+        return (jsonify(note), 200) if note else (jsonify({"message": "404 Not found"}), 404)
+
+    @app.get("/api/v4/projects/<project>/protected_branches")
+    def gitlab_protected_branches(project):
+        return jsonify([{"id": i + 1, "name": name} for i, name in enumerate(config.protected_branches)])
+
+    @app.get("/api/v4/projects/<project>/repository/commits")
+    def gitlab_repository_commits(project):
+        ref = request.args.get("ref_name", "main")
+        commits = generate_commits(config, f"gitlab/{project}/ref/{ref}")
+        return _paginate([_gitlab_commit(c) for c in commits], 20, link_style=False)
+
+    @app.get("/api/v4/projects/<project>/repository/compare")
+    def gitlab_repository_compare(project):
+        key = f"gitlab/{project}/compare/{request.args.get('from')}/{request.args.get('to')}"
+        return jsonify({"commits": [_gitlab_commit(c) for c in generate_commits(config, key)],
+                        "diffs": [_gitlab_diff(f) for f in generate_files(config, key)],
+                        "compare_timeout": False, "compare_same_ref": False})
+
+    @app.get("/api/v4/projects/<project>/repository/commits/<sha>/diff")
+    def gitlab_commit_diff(project, sha):
+        files = generate_files(config, f"gitlab/{project}/commit/{sha}")
+        return _paginate([_gitlab_diff(f) for f in files], 20, link_style=False)
+
+    @app.post("/api/v4/projects/<project>/repository/commits/<sha>/comments")
+    def gitlab_commit_comment(project, sha):
+        body = (request.get_json(silent=True) or {}).get("note", "")
+        return jsonify(_add_note(f"gitlab/{project}/commit/{sha}", body)), 201
+
+    # ---- GitHub / Gitea (same REST shapes for what the handlers use) --------
+
+    def _hub_file(f: FakeFile) -> Dict:
+        return {"sha": _sha(f.path, f.diff), "filename": f.path, "status": "modified",
+                "additions": f.additions, "deletions": f.deletions, "changes": f.additions + f.deletions,
+                "patch": f.diff}
+
+    def _hub_commit(c: Dict) -> Dict:
+        author = {"name": c["author"], "email": c["email"], "date": c["date"]}
+        return {"sha": c["sha"], "html_url": f"{request.host_url}commit/{c['sha']}",
+                "commit": {"message": c["message"], "author": author, "committer": author}}
+
+    def _register_hub(prefix: str, name: str):
+        def rule(path: str) -> str:
+            return f"{prefix}/repos/<owner>/<repo>{path}"
+
+        def pr_files(owner, repo, number):
+            files = generate_files(config, f"{name}/{owner}/{repo}/pr/{number}")
+            return _paginate([_hub_file(f) for f in files], 30, link_style=True)
+
+        def pr_commits(owner, repo, number):
+            commits = generate_commits(config, f"{name}/{owner}/{repo}/pr/{number}")
+            return _paginate([_hub_commit(c) for c in commits], 30, link_style=True)
+
+        def issue_comment(owner, repo, number):
+            body = (request.get_json(silent=True) or {}).get("body", "")
+            return jsonify(_add_note(f"{name}/{owner}/{repo}/pr/{number}", body)), 201
+
+        def branches(owner, repo):
+            protected = request.args.get("protected") == "true"
+            names = list(config.protected_branches) + ([] if protected else ["develop"])
+            return jsonify([{"name": n, "protected": n in config.protected_branches} for n in names])
+
+        def commits(owner, repo):
+            sha = request.args.get("sha", "main")
+            items = generate_commits(config, f"{name}/{owner}/{repo}/ref/{sha}")
+            return _paginate([_hub_commit(c) for c in items], 30, link_style=True)
+
+        def commit(owner, repo, sha):
+            files = generate_files(config, f"{name}/{owner}/{repo}/commit/{sha}")
+            data = _hub_commit(generate_commits(config, f"{name}/{owner}/{repo}/commit/{sha}")[0])
+            return jsonify({**data, "sha": sha, "files": [_hub_file(f) for f in files]})
+
+        def commit_comment(owner, repo, sha):
+            body = (request.get_json(silent=True) or {}).get("body", "")
+            return jsonify(_add_note(f"{name}/{owner}/{repo}/commit/{sha}", body)), 201
+
+        def compare(owner, repo, base, head):
+            key = f"{name}/{owner}/{repo}/compare/{base}/{head}"
+            return jsonify({"status": "ahead", "commits": [_hub_commit(c) for c in generate_commits(config, key)],
+                            "files": [_hub_file(f) for f in generate_files(config, key)]})
+
+        def commit_diff(owner, repo, sha):
+            files = generate_files(config, f"{name}/{owner}/{repo}/commit/{sha}")
+            text = "".join(f"diff --git a/{f.path} b/{f.path}\n--- a/{f.path}\n+++ b/{f.path}\n{f.diff}"
+                           for f in files)
+            return Response(text, mimetype="text/plain")
+
+        app.add_url_rule(rule("/pulls/<int:number>/files"), f"{name}_pr_files", pr_files)
+        app.add_url_rule(rule("/pulls/<int:number>/commits"), f"{name}_pr_commits", pr_commits)
+        app.add_url_rule(rule("/issues/<int:number>/comments"), f"{name}_issue_comment", issue_comment,
+                         methods=["POST"])
+        app.add_url_rule(rule("/branches"), f"{name}_branches", branches)
+        app.add_url_rule(rule("/commits"), f"{name}_commits", commits)
+        app.add_url_rule(rule("/commits/<sha>"), f"{name}_commit", commit)
+        app.add_url_rule(rule("/commits/<sha>/comments"), f"{name}_commit_comment", commit_comment,
+                         methods=["POST"])
+        app.add_url_rule(rule("/compare/<base>...<head>"), f"{name}_compare", compare)
+        app.add_url_rule(rule("/git/commits/<sha>.diff"), f"{name}_commit_diff", commit_diff)
+
+    _register_hub("", "github")
+    _register_hub("/api/v1", "gitea")
+
+    # ---- stats --------------------------------------------------------------
+
+    @app.get("/stats")
+    def get_stats():
+        with notes_lock:
+            note_count = sum(len(v) for v in notes.values())
+        return jsonify({**stats.snapshot(), "notes": note_count})
+
+    @app.post("/stats/reset")
+    def reset_stats():
+        stats.reset()
+        with notes_lock:
+            notes.clear()
+        events.clear()
+        return jsonify({"ok": True})
+
+    @app.get("/_notes")
+    def list_notes():
+        with notes_lock:
+            return jsonify({key: list(items) for key, items in notes.items()})
+
+    return app
+
+
+def _parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8901)
+    parser.add_argument("--latency", default="fixed:0", help="e.g. fixed:50, lognormal:80,0.4")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="requests/second before 429/403 (0 = off)")
+    parser.add_argument("--rate-burst", type=float, default=None)
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--hunk-lines", type=int, default=30)
+    parser.add_argument("--hunks-per-file", type=int, default=2)
+    parser.add_argument("--commits", type=int, default=3)
+    parser.add_argument("--overflow-files", type=int, default=1000)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = _parse_args(argv)
+    config = PlatformConfig(latency=LatencyModel.parse(args.latency), rate_limit=args.rate_limit,
+                            rate_burst=args.rate_burst, files=args.files, hunk_lines=args.hunk_lines,
+                            hunks_per_file=args.hunks_per_file, commits=args.commits,
+                            overflow_files=args.overflow_files)
+    server, url = serve_in_thread(create_app(config), args.host, args.port)
+    print(f"Platform stub listening on {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,537 @@
+"""Webhook load generator and pipeline benchmark.
+
+Replays generated (or recorded) GitLab / GitHub / Gitea webhook payloads
+against ``POST /review/webhook`` at a target rate and reports, per job:
+
+    ingest      time for the webhook request to be acknowledged
+    queue_wait  acknowledged -> first platform API call of the worker process
+    fetch       first -> last platform read (changes, commits, ...)
+    review      last platform read -> final review note (LLM + packing)
+    e2e         webhook sent -> final review note
+
+plus throughput, memory (RSS) and process counts of the server.
+
+The platform and LLM stubs (``benchmarks/stubs``) run in this process, so the
+stage boundaries come from the platform stub's request timeline. By default
+the review service itself is started as a child process (``api.py`` in a
+scratch working directory, with every platform and the OpenAI client pointed
+at the stubs); ``--target`` benchmarks an already running server instead,
+which then has to be configured against the stubs started here (their URLs
+are printed at start-up; ``--platform-port`` / ``--llm-port`` pin them).
+
+    python -m benchmarks.webhook_load --rate 2 --duration 60 --platforms gitlab,github \\
+        --llm-latency lognormal:1500,0.5 --platform-latency fixed:50 --output report.json
+"""
+from __future__ import annotations
+
+import argparse
+import copy
+import json
+import logging
+import math
+import os
+import random
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+from benchmarks.stubs.common import LatencyModel, serve_in_thread
+from benchmarks.stubs.llm_server import StubConfig, create_app as create_llm_app
+from benchmarks.stubs.platform_server import PlatformConfig, create_app as create_platform_app
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+PLATFORMS = ("gitlab", "github", "gitea")
+STAGES = ("ingest", "queue_wait", "fetch", "review", "e2e")
+# Bodies of the "in progress" note written when REVIEW_PROGRESS_NOTE_ENABLED=1.
+_PROGRESS_MARKERS = ("进行中", "生成中")
+
+
+@dataclass
+class Job:
+    index: int
+    platform: str
+    payload: Dict
+    headers: Dict[str, str]
+    key: str
+    sent_at: Optional[float] = None
+    acked_at: Optional[float] = None
+    status: Optional[int] = None
+    error: Optional[str] = None
+    stages: Dict[str, float] = field(default_factory=dict)
+
+
+# ---- payloads -----------------------------------------------------------------
+
+def _gitlab_payload(iid: int, sha: str, platform_url: str) -> Dict:
+    return {
+        "object_kind": "merge_request",
+        "user": {"username": "bench"},
+        "project": {"id": 1, "name": "shop", "path_with_namespace": "bench/shop",
+                    "web_url": f"{platform_url}/bench/shop", "homepage": f"{platform_url}/bench/shop"},
+        "object_attributes": {
+            "iid": iid, "target_project_id": 1, "action": "open", "state": "opened",
+            "source_branch": f"feature/load-{iid}", "target_branch": "main",
+            "last_commit": {"id": sha}, "url": f"{platform_url}/bench/shop/-/merge_requests/{iid}",
+        },
+    }
+
+
+def _hub_payload(number: int, sha: str, platform_url: str, action: str) -> Dict:
+    return {
+        "action": action,
+        "number": number,
+        "pull_request": {
+            "number": number, "html_url": f"{platform_url}/bench/shop/pull/{number}",
+            "user": {"login": "bench"},
+            "head": {"ref": f"feature/load-{number}", "sha": sha},
+            "base": {"ref": "main"},
+        },
+        "repository": {"name": "shop", "full_name": "bench/shop", "owner": {"login": "bench"}},
+        "sender": {"login": "bench"},
+    }
+
+
+def _retarget(platform: str, payload: Dict, number: int, sha: str) -> Dict:
+    """Give a recorded payload a fresh MR/PR number and head SHA.
+
+    Recorded payloads repeat; without this the worker's last-commit dedup
+    would skip every replay after the first, and jobs couldn't be told apart.
+    """
+    payload = copy.deepcopy(payload)
+    if platform == "gitlab":
+        attrs = payload.setdefault("object_attributes", {})
+        attrs["iid"] = number
+        attrs.setdefault("action", "open")
+        attrs["last_commit"] = {**(attrs.get("last_commit") or {}), "id": sha}
+    else:
+        pull_request = payload.setdefault("pull_request", {})
+        pull_request["number"] = number
+        pull_request.pop("index", None)
+        pull_request["head"] = {**(pull_request.get("head") or {}), "sha": sha}
+    return payload
+
+
+def _job_key(platform: str, payload: Dict) -> str:
+    """Same key the platform stub derives from the worker's API paths."""
+    if platform == "gitlab":
+        attrs = payload["object_attributes"]
+        return f"gitlab/{attrs['target_project_id']}/mr/{attrs['iid']}"
+    repository = payload.get("repository", {})
+    return f"{platform}/{repository['full_name']}/pr/{payload['pull_request']['number']}"
+
+
+def load_recorded(path: str) -> List[Tuple[str, Dict]]:
+    """Read recorded payloads from a .json file or a directory of them.
+
+    Each file holds a payload, or ``{"platform": ..., "payload": ...}``.
+    Bare payloads are GitLab when they have ``object_kind``, else GitHub.
+    """
+    root = Path(path)
+    files = sorted(root.glob("*.json")) if root.is_dir() else [root]
+    recorded = []
+    for file in files:
+        data = json.loads(file.read_text(encoding="utf-8"))
+        if isinstance(data, dict) and "payload" in data:
+            recorded.append((data.get("platform", "github"), data["payload"]))
+        else:
+            recorded.append(("gitlab" if "object_kind" in data else "github", data))
+    return recorded
+
+
+def build_job(index: int, platform: str, run_id: str, platform_url: str,
+              recorded: Optional[Dict] = None) -> Job:
+    # Numbers are unique per run so concurrent jobs never share an MR/PR.
+    number = 100_000 + index
+    sha = f"{run_id}{index:08x}".ljust(40, "0")[:40]
+    if recorded is not None:
+        payload = _retarget(platform, recorded, number, sha)
+    elif platform == "gitlab":
+        payload = _gitlab_payload(number, sha, platform_url)
+    else:
+        payload = _hub_payload(number, sha, platform_url, "opened")
+    headers = {"Content-Type": "application/json"}
+    if platform == "gitlab":
+        headers.update({"X-Gitlab-Event": "Merge Request Hook", "X-Gitlab-Instance": platform_url,
+                        "X-Gitlab-Token": "bench"})
+    elif platform == "github":
+        headers.update({"X-GitHub-Event": "pull_request", "X-GitHub-Token": "bench"})
+    else:
+        headers.update({"X-Gitea-Event": "pull_request", "X-Gitea-Token": "bench"})
+    return Job(index, platform, payload, headers, _job_key(platform, payload))
+
+
+# ---- server under test ----------------------------------------------------------
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def server_env(platform_url: str, llm_url: str, port: int, extra: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """Environment that points every platform and the OpenAI client at the stubs."""
+    env = dict(os.environ)
+    env.update({
+        "PYTHONPATH": os.pathsep.join(filter(None, [str(REPO_ROOT), env.get("PYTHONPATH")])),
+        "SERVER_PORT": str(port),
+        "LLM_PROVIDER": "openai",
+        "LLM_FALLBACK_PROVIDERS": "",
+        "OPENAI_API_KEY": "bench",
+        "OPENAI_API_BASE_URL": f"{llm_url}/v1",
+        "GITLAB_URL": platform_url,
+        "GITLAB_ACCESS_TOKEN": "bench",
+        "GITHUB_ACCESS_TOKEN": "bench",
+        "GITHUB_API_URL": platform_url,
+        "GITEA_URL": platform_url,
+        "GITEA_ACCESS_TOKEN": "bench",
+        "DINGTALK_ENABLED": "0",
+        "WECOM_ENABLED": "0",
+        "FEISHU_ENABLED": "0",
+        "EXTRA_WEBHOOK_ENABLED": "0",
+        "LOG_LEVEL": env.get("LOG_LEVEL", "WARNING"),
+    })
+    env.update(extra or {})
+    return env
+
+
+def spawn_server(env: Dict[str, str], workdir: str, ready_timeout: float = 60.0) -> Tuple[subprocess.Popen, str]:
+    """Start ``api.py`` in `workdir` (own data/, log/ and conf/ without .env) and wait until it answers."""
+    for sub in ("data", "log"):
+        os.makedirs(os.path.join(workdir, sub), exist_ok=True)
+    # Prompt templates etc. are read relative to the working directory; the
+    # local conf/.env is left out so only `env` configures the server.
+    shutil.copytree(REPO_ROOT / "conf", os.path.join(workdir, "conf"), dirs_exist_ok=True,
+                    ignore=shutil.ignore_patterns(".env"))
+    url = f"http://127.0.0.1:{env['SERVER_PORT']}"
+    log = open(os.path.join(workdir, "log", "server.out"), "ab")
+    process = subprocess.Popen([sys.executable, str(REPO_ROOT / "api.py")], cwd=workdir, env=env,
+                               stdout=log, stderr=subprocess.STDOUT, start_new_session=True)
+    log.close()
+    deadline = time.monotonic() + ready_timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"review server exited with {process.returncode}, see {workdir}/log/server.out")
+        try:
+            requests.get(url, timeout=1)
+            return process, url
+        except requests.RequestException:
+            time.sleep(0.2)
+    stop_server(process)
+    raise RuntimeError(f"review server not ready after {ready_timeout:.0f}s")
+
+
+def stop_server(process: subprocess.Popen) -> None:
+    # The server forks one worker per webhook; take the whole session down.
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=10)
+    except (ProcessLookupError, subprocess.TimeoutExpired):
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+
+# ---- process sampling -----------------------------------------------------------
+
+def _read_proc_tree() -> Dict[int, Tuple[int, int]]:
+    """pid -> (ppid, rss_kb) for every process visible in /proc."""
+    table = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/status", encoding="utf-8") as f:
+                fields = dict(line.split(":", 1) for line in f if ":" in line)
+        except OSError:
+            continue
+        rss = fields.get("VmRSS", "0 kB").split()[0]
+        table[int(entry)] = (int(fields.get("PPid", "0").strip()), int(rss))
+    return table
+
+
+def process_tree_usage(root_pid: int) -> Optional[Tuple[int, float]]:
+    """(process count, total RSS in MB) of `root_pid` and its descendants; None without /proc."""
+    if not os.path.isdir("/proc"):
+        return None
+    table = _read_proc_tree()
+    if root_pid not in table:
+        return None
+    children: Dict[int, List[int]] = {}
+    for pid, (ppid, _) in table.items():
+        children.setdefault(ppid, []).append(pid)
+    pending, count, rss_kb = [root_pid], 0, 0
+    while pending:
+        pid = pending.pop()
+        count += 1
+        rss_kb += table[pid][1]
+        pending.extend(children.get(pid, []))
+    return count, rss_kb / 1024
+
+
+class ProcessSampler(threading.Thread):
+    def __init__(self, pid: int, interval: float = 0.5):
+        super().__init__(name="process-sampler", daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.samples: List[Tuple[float, int, float]] = []
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            usage = process_tree_usage(self.pid)
+            if usage:
+                self.samples.append((time.time(), *usage))
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join(timeout=5)
+
+    def summary(self) -> Optional[Dict]:
+        if not self.samples:
+            return None
+        counts = [s[1] for s in self.samples]
+        rss = [s[2] for s in self.samples]
+        return {"samples": len(self.samples), "processes_max": max(counts),
+                "processes_mean": round(sum(counts) / len(counts), 1),
+                "rss_mb_max": round(max(rss), 1), "rss_mb_mean": round(sum(rss) / len(rss), 1),
+                "rss_mb_final": round(rss[-1], 1)}
+
+
+# ---- measurement ----------------------------------------------------------------
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    """Nearest-rank percentile; None for an empty list."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def summarize(values: List[float]) -> Dict:
+    if not values:
+        return {"count": 0}
+    return {"count": len(values), "mean": round(sum(values) / len(values), 1),
+            "p50": round(percentile(values, 50), 1), "p95": round(percentile(values, 95), 1),
+            "p99": round(percentile(values, 99), 1), "max": round(max(values), 1)}
+
+
+def final_note_time(notes: List[Dict]) -> Optional[float]:
+    finals = [n["updated_ts"] for n in notes if not any(m in n.get("body", "") for m in _PROGRESS_MARKERS)]
+    return max(finals) if finals else None
+
+
+def compute_stages(job: Job, events: List[Dict], notes: List[Dict]) -> None:
+    """Fill ``job.stages`` (milliseconds) from the platform timeline of its MR/PR."""
+    if job.sent_at is None or job.acked_at is None:
+        return
+    job.stages["ingest"] = (job.acked_at - job.sent_at) * 1000
+    if events:
+        first = min(e["t"] for e in events)
+        job.stages["queue_wait"] = max(0.0, first - job.acked_at) * 1000
+        reads = [e["t"] for e in events if e["method"] == "GET"]
+        if reads:
+            job.stages["fetch"] = (max(reads) - first) * 1000
+    done = final_note_time(notes)
+    if done is not None:
+        job.stages["e2e"] = (done - job.sent_at) * 1000
+        reads = [e["t"] for e in events if e["method"] == "GET"]
+        if reads:
+            job.stages["review"] = max(0.0, done - max(reads)) * 1000
+
+
+def send_job(session: requests.Session, target: str, job: Job, timeout: float) -> None:
+    job.sent_at = time.time()
+    try:
+        response = session.post(f"{target}/review/webhook", json=job.payload, headers=job.headers, timeout=timeout)
+        job.status = response.status_code
+        if response.status_code != 200:
+            job.error = response.text[:200]
+    except requests.RequestException as e:
+        job.error = str(e)
+    job.acked_at = time.time()
+
+
+def run_load(target: str, jobs: List[Job], rate: float, notes: Dict, events, arrival: str = "constant",
+             concurrency: int = 64, drain_timeout: float = 300.0, request_timeout: float = 30.0,
+             seed: Optional[int] = None) -> float:
+    """Send `jobs` open-loop at `rate`/s, then wait for their final notes. Returns the send phase length."""
+    rng = random.Random(seed)
+    session = requests.Session()
+    session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=concurrency))
+    start = time.monotonic()
+    next_at = 0.0
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="webhook-load") as pool:
+        for job in jobs:
+            delay = start + next_at - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(send_job, session, target, job, request_timeout)
+            next_at += rng.expovariate(rate) if arrival == "poisson" else 1.0 / rate
+    send_seconds = time.monotonic() - start
+
+    pending = {job.key for job in jobs if job.status == 200}
+    deadline = time.monotonic() + drain_timeout
+    while pending and time.monotonic() < deadline:
+        pending = {key for key in pending if final_note_time(list(notes.get(key, []))) is None}
+        time.sleep(0.2)
+    return send_seconds
+
+
+def build_report(jobs: List[Job], events, notes: Dict, send_seconds: float,
+                 process: Optional[Dict], platform_stats: Dict, llm_stats: Dict) -> Dict:
+    by_key: Dict[str, List[Dict]] = {}
+    for event in list(events):
+        if event.get("key"):
+            by_key.setdefault(event["key"], []).append(event)
+    for job in jobs:
+        compute_stages(job, by_key.get(job.key, []), list(notes.get(job.key, [])))
+
+    accepted = [j for j in jobs if j.status == 200]
+    completed = [j for j in accepted if "e2e" in j.stages]
+    report = {
+        "jobs": {"sent": len(jobs), "accepted": len(accepted), "completed": len(completed),
+                 "rejected": len(jobs) - len(accepted), "incomplete": len(accepted) - len(completed),
+                 "by_platform": {p: sum(1 for j in jobs if j.platform == p) for p in PLATFORMS}},
+        "send_seconds": round(send_seconds, 2),
+        "offered_per_minute": round(len(jobs) / send_seconds * 60, 1) if send_seconds else None,
+        "stages_ms": {stage: summarize([j.stages[stage] for j in jobs if stage in j.stages]) for stage in STAGES},
+        "process": process,
+        "platform_stub": platform_stats,
+        "llm_stub": llm_stats,
+    }
+    if completed:
+        window = max(j.sent_at + j.stages["e2e"] / 1000 for j in completed) - min(j.sent_at for j in jobs)
+        report["completed_per_minute"] = round(len(completed) / window * 60, 1) if window > 0 else None
+    errors = [j.error for j in jobs if j.error]
+    if errors:
+        report["errors"] = errors[:10]
+    return report
+
+
+def format_report(report: Dict) -> str:
+    jobs = report["jobs"]
+    lines = [f"jobs: sent={jobs['sent']} accepted={jobs['accepted']} completed={jobs['completed']} "
+             f"incomplete={jobs['incomplete']} rejected={jobs['rejected']}",
+             f"offered={report['offered_per_minute']}/min completed={report.get('completed_per_minute')}/min",
+             f"{'stage (ms)':<12}{'count':>7}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}"]
+    for stage, s in report["stages_ms"].items():
+        if s["count"]:
+            lines.append(f"{stage:<12}{s['count']:>7}{s['mean']:>10}{s['p50']:>10}{s['p95']:>10}"
+                         f"{s['p99']:>10}{s['max']:>10}")
+        else:
+            lines.append(f"{stage:<12}{0:>7}")
+    if report.get("process"):
+        p = report["process"]
+        lines.append(f"processes max={p['processes_max']} mean={p['processes_mean']}  "
+                     f"rss MB max={p['rss_mb_max']} mean={p['rss_mb_mean']} final={p['rss_mb_final']}")
+    return "\n".join(lines)
+
+
+# ---- CLI ------------------------------------------------------------------------
+
+def _parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rate", type=float, default=1.0, help="webhooks per second")
+    parser.add_argument("--arrival", choices=("constant", "poisson"), default="constant")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of sending (ignored with --count)")
+    parser.add_argument("--count", type=int, default=None, help="number of webhooks to send")
+    parser.add_argument("--platforms", default="gitlab", help="comma separated: gitlab,github,gitea")
+    parser.add_argument("--payloads", default=None, help="recorded payload .json file or directory to replay")
+    parser.add_argument("--target", default=None, help="URL of a running review server (default: spawn api.py)")
+    parser.add_argument("--server-pid", type=int, default=None, help="pid to sample with --target")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="extra environment for the spawned server, e.g. REVIEW_STRATEGY=auto")
+    parser.add_argument("--concurrency", type=int, default=64, help="max in-flight webhook requests")
+    parser.add_argument("--drain-timeout", type=float, default=300.0)
+    parser.add_argument("--platform-port", type=int, default=0)
+    parser.add_argument("--platform-latency", default="fixed:0")
+    parser.add_argument("--platform-rate-limit", type=float, default=0.0)
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--hunk-lines", type=int, default=30)
+    parser.add_argument("--llm-port", type=int, default=0)
+    parser.add_argument("--llm-latency", default="lognormal:800,0.5")
+    parser.add_argument("--llm-token-rate", type=float, default=0.0)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", default=None, help="write the JSON report here")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> Dict:
+    args = _parse_args(argv)
+    platforms = [p.strip() for p in args.platforms.split(",") if p.strip()]
+    unknown = set(platforms) - set(PLATFORMS)
+    if unknown:
+        raise SystemExit(f"unknown platform(s): {', '.join(sorted(unknown))}")
+
+    platform_app = create_platform_app(PlatformConfig(latency=LatencyModel.parse(args.platform_latency),
+                                                      rate_limit=args.platform_rate_limit, files=args.files,
+                                                      hunk_lines=args.hunk_lines))
+    llm_app = create_llm_app(StubConfig(latency=LatencyModel.parse(args.llm_latency), token_rate=args.llm_token_rate,
+                                        error_rate=args.llm_error_rate, tool_rounds=1, seed=args.seed))
+    # One access-log line per stub request would drown the report.
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    platform_server, platform_url = serve_in_thread(platform_app, port=args.platform_port)
+    llm_server, llm_url = serve_in_thread(llm_app, port=args.llm_port)
+    print(f"platform stub: {platform_url}  llm stub: {llm_url}", flush=True)
+
+    process, workdir, target, sampler = None, None, args.target, None
+    try:
+        if target is None:
+            workdir = tempfile.mkdtemp(prefix="webhook-load-")
+            extra = dict(item.split("=", 1) for item in args.env)
+            process, target = spawn_server(server_env(platform_url, llm_url, _free_port(), extra), workdir)
+            print(f"review server: {target} (pid {process.pid}, workdir {workdir})", flush=True)
+        pid = process.pid if process else args.server_pid
+        if pid:
+            sampler = ProcessSampler(pid)
+            sampler.start()
+
+        count = args.count or max(1, int(args.rate * args.duration))
+        recorded = load_recorded(args.payloads) if args.payloads else None
+        run_id = f"{int(time.time()):x}"
+        jobs = []
+        for index in range(count):
+            if recorded:
+                platform, payload = recorded[index % len(recorded)]
+                jobs.append(build_job(index, platform, run_id, platform_url, payload))
+            else:
+                jobs.append(build_job(index, platforms[index % len(platforms)], run_id, platform_url))
+
+        notes = platform_app.config["stub_notes"]
+        events = platform_app.config["stub_events"]
+        send_seconds = run_load(target, jobs, args.rate, notes, events, arrival=args.arrival,
+                                concurrency=args.concurrency, drain_timeout=args.drain_timeout, seed=args.seed)
+        if sampler:
+            sampler.stop()
+        report = build_report(jobs, events, notes, send_seconds, sampler.summary() if sampler else None,
+                              platform_app.config["stub_stats"].snapshot(), llm_app.config["stub"].stats.snapshot())
+    finally:
+        if sampler:
+            sampler.stop()
+        if process:
+            stop_server(process)
+        platform_server.shutdown()
+        llm_server.shutdown()
+
+    print(format_report(report))
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -11,11 +11,13 @@ from typing import Any
 
 from biz.agent.llm_adapter import LLMAdapter
 from biz.agent.prompts import load_prompt
+from biz.agent.repo_cache import RepoCacheManager
 from biz.agent.repo_syncer import LocalRepoSyncer
 from biz.agent.runner import AgentRunner
 from biz.agent.tools import register_default_tools
 from biz.agent.tool_registry import ToolRegistry
 from biz.llm.factory import Factory
+from biz.llm.usage import collect_usage
 from biz.utils.code_reviewer import CodeReviewer
 from biz.utils.log import logger
 from biz.utils.im import notifier
@@ -53,24 +55,17 @@ class ReviewLog:
     ref: str
     strategy: str
     iterations: int
-    total_tokens_est: int
+    llm_calls: int
+    input_tokens: int
+    output_tokens: int
+    cached_tokens: int
+    llm_latency_ms: int
     duration_ms: int
     review_result_length: int
     score: int
     degraded: bool
     tool_calls: list[dict]
-
-
-def _estimate_tokens(messages: list[dict]) -> int:
-    """Rough token estimate: sum of len(content)//4 over assistant messages."""
-    total = 0
-    for m in messages:
-        if m.get("role") != "assistant":
-            continue
-        content = m.get("content") or ""
-        if isinstance(content, str):
-            total += len(content) // 4
-    return total
+    compacted_tool_outputs: int = 0
 
 
 def _collect_tool_calls(messages: list[dict]) -> list[dict]:
@@ -93,22 +88,34 @@ class AgenticReviewer:
         ref: str,
         cache_root: Path | str,
         adapter: LLMAdapter | None = None,
-        max_iterations: int = 20,
-        total_token_cap: int = 80_000,
+        max_iterations: int | None = None,
+        total_token_cap: int | None = None,
+        model: str | None = None,
+        changed_paths: list[str] | None = None,
+        base_ref: str | None = None,
     ) -> None:
         self.repo_url = repo_url
         self.repo_key = repo_key
         self.ref = ref
         self.cache_root = Path(cache_root)
         self.adapter = adapter
-        self.max_iterations = max_iterations
-        self.total_token_cap = total_token_cap
+        self.max_iterations = (
+            max_iterations if max_iterations is not None else int(os.getenv("AGENT_MAX_ITERATIONS", "20"))
+        )
+        self.total_token_cap = (
+            total_token_cap if total_token_cap is not None else int(os.getenv("AGENT_TOTAL_TOKEN_CAP", "80000"))
+        )
+        self.model = model
+        # Files touched by the MR; seeds the sparse checkout when REPO_SPARSE_CHECKOUT=1.
+        self.changed_paths = changed_paths or []
+        # MR target branch, fetched alongside `ref` so the agent can diff against it.
+        self.base_ref = base_ref
 
     def _build_adapter(self) -> LLMAdapter:
         if self.adapter is not None:
             return self.adapter
         client = Factory().getClient()
-        return LLMAdapter(client)
+        return LLMAdapter(client, model=self.model)
 
     def _build_registry(self, repo_root: Path) -> ToolRegistry:
         registry = ToolRegistry()
@@ -126,12 +133,24 @@ class AgenticReviewer:
         # 1. Sync repo locally.
         try:
             syncer = LocalRepoSyncer(cache_root=self.cache_root)
-            repo_root = syncer.sync_to(url=self.repo_url, key=self.repo_key, ref=self.ref)
+            sparse_paths = self.changed_paths if os.getenv("REPO_SPARSE_CHECKOUT", "0") == "1" else None
+            repo_root = syncer.sync_to(url=self.repo_url, key=self.repo_key, ref=self.ref,
+                                       sparse_paths=sparse_paths, base_ref=self.base_ref)
         except Exception as e:
             logger.error("agentic repo sync failed, degrading: %s", e)
             notifier.send_notification(content=f"[agentic] repo sync failed: {e}; falling back to diff_only")
-            return CodeReviewer().review_and_strip_code(diffs_text, commits_text)
+            return CodeReviewer(model=self.model).review_and_strip_code(diffs_text, commits_text)
+        try:
+            RepoCacheManager(self.cache_root).record_sync(self.repo_key, syncer.last_outcome)
+        except Exception as e:
+            logger.warning("repo cache accounting failed: %s", e)
+        # The worktree belongs to this job only; drop it once the review is done.
+        try:
+            return self._review_in(repo_root, diffs_text, commits_text, start)
+        finally:
+            syncer.release(repo_root)
 
+    def _review_in(self, repo_root: Path, diffs_text: str, commits_text: str, start: float) -> str:
         # 2. Build adapter, registry, runner.
         adapter = self._build_adapter()
         registry = self._build_registry(repo_root)
@@ -156,12 +175,13 @@ class AgenticReviewer:
         result: str
         degraded = False
         try:
-            result = runner.run(messages, out=run_meta)
+            with collect_usage() as usage:
+                result = runner.run(messages, out=run_meta)
         except Exception as e:
             logger.error("agentic run failed, degrading to diff_only: %s", e)
             notifier.send_notification(content=f"[agentic] run failed: {e}; falling back to diff_only")
             degraded = True
-            result = CodeReviewer().review_and_strip_code(diffs_text, commits_text)
+            result = CodeReviewer(model=self.model).review_and_strip_code(diffs_text, commits_text)
 
         # 4b. Defense-in-depth: if the agent's text doesn't look like a review
         # (missing the `总分:XX分` marker), treat the leak as a failure and
@@ -177,7 +197,7 @@ class AgenticReviewer:
                 content="[agentic] output missing 总分 marker; falling back to diff_only"
             )
             degraded = True
-            result = CodeReviewer().review_and_strip_code(diffs_text, commits_text)
+            result = CodeReviewer(model=self.model).review_and_strip_code(diffs_text, commits_text)
 
         # 5. Emit structured per-review log line.
         run_messages = run_meta.get("messages", messages)
@@ -187,12 +207,17 @@ class AgenticReviewer:
             ref=self.ref,
             strategy="agentic",
             iterations=run_meta.get("iterations", 0),
-            total_tokens_est=_estimate_tokens(run_messages),
+            llm_calls=usage.calls,
+            input_tokens=usage.input_tokens,
+            output_tokens=usage.output_tokens,
+            cached_tokens=usage.cached_tokens,
+            llm_latency_ms=usage.llm_latency_ms,
             duration_ms=int((time.monotonic() - start) * 1000),
             review_result_length=len(result),
             score=CodeReviewer.parse_review_score(review_text=result),
             degraded=degraded,
             tool_calls=_collect_tool_calls(run_messages),
+            compacted_tool_outputs=run_meta.get("compacted", 0),
         )
         logger.info(json.dumps(asdict(log_entry), ensure_ascii=False))
         return result
\ No newline at end of file
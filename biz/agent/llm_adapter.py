@@ -1,7 +1,8 @@
 """LLM output normalization + tool-use protocol across providers.
 
 Wraps an existing ``BaseClient`` (from ``biz.llm.factory``) and:
-  - calls ``chat_with_tools()`` if the provider supports it natively
+  - calls ``chat_with_tools()`` if the provider supports it natively (per
+    ``biz.llm.capabilities``)
   - otherwise falls back to JSON-protocol: instructs the model to emit
     ``{"tool": "<name>", "args": {...}, "id": "<id>"}`` JSON blocks in its
     content and parses them.
@@ -14,6 +15,8 @@ from dataclasses import dataclass
 from typing import Any
 
 from biz.agent.tool import ToolResult
+from biz.llm.capabilities import resolve_capabilities
+from biz.llm.usage import LLMUsage
 from biz.utils.log import logger
 
 
@@ -29,6 +32,8 @@ class LLMResponse:
     content: str | None
     tool_calls: list[ToolCall]
     raw: Any = None
+    # Provider-reported usage of the call, when the client exposes it.
+    usage: LLMUsage | None = None
 
 
 # Matches a JSON object with "tool" / "args" / optional "id".
@@ -50,25 +55,14 @@ _JSON_PROTOCOL_INSTRUCTION = (
 class LLMAdapter:
     """Wrap a BaseClient and provide a uniform ``completions_with_tools``."""
 
-    def __init__(self, client, use_native: bool | None = None):
+    def __init__(self, client, use_native: bool | None = None, model: str | None = None):
         self.client = client
-        # If use_native is None, auto-detect: True if chat_with_tools exists
-        # and isn't just the base default.
+        # Optional model override passed on every call; None uses the client's default.
+        self.model = model
+        # Static lookup; see biz.llm.capabilities. Never probes the provider.
+        self.capabilities = resolve_capabilities(client, model)
         if use_native is None:
-            use_native = hasattr(client, "chat_with_tools") and callable(
-                getattr(client, "chat_with_tools", None)
-            )
-            # Some clients have chat_with_tools but it's the base NotImpl — detect by checking override.
-            if use_native:
-                method = getattr(client, "chat_with_tools")
-                # Heuristic: if the method is the base class's, fall back.
-                # We can detect this by checking if calling it raises NotImplementedError on a stub.
-                try:
-                    method(messages=[], tools=None)
-                except NotImplementedError:
-                    use_native = False
-                except Exception:
-                    pass  # any other error means the method is actually overridden
+            use_native = self.capabilities.tools
         self.use_native = use_native
 
     # ---- public API --------------------------------------------------------
@@ -116,8 +110,11 @@ class LLMAdapter:
 
     # ---- internals ---------------------------------------------------------
 
+    def _model_kwargs(self) -> dict:
+        return {"model": self.model} if self.model else {}
+
     def _native(self, messages, tools):
-        raw = self.client.chat_with_tools(messages=messages, tools=tools)
+        raw = self.client.chat_with_tools(messages=messages, tools=tools, **self._model_kwargs())
         return LLMResponse(
             content=raw.get("content"),
             tool_calls=[
@@ -125,6 +122,7 @@ class LLMAdapter:
                 for tc in raw.get("tool_calls", [])
             ],
             raw=raw.get("raw"),
+            usage=_usage_from(raw.get("usage")),
         )
 
     def _json_fallback(self, messages, tools):
@@ -134,7 +132,7 @@ class LLMAdapter:
             messages[0] = {**messages[0], "content": messages[0]["content"] + _JSON_PROTOCOL_INSTRUCTION}
         else:
             messages = [{"role": "system", "content": _JSON_PROTOCOL_INSTRUCTION.lstrip()}] + list(messages)
-        text = self.client.completions(messages=messages)
+        text = self.client.completions(messages=messages, **self._model_kwargs())
         tool_calls: list[ToolCall] = []
         for m in _JSON_TOOL_BLOCK.finditer(text):
             block = m.group(0)
@@ -153,4 +151,14 @@ class LLMAdapter:
         # Strip the tool blocks from the content we return (so the next assistant
         # turn in messages has clean prose).
         cleaned = _JSON_TOOL_BLOCK.sub("", text).strip()
-        return LLMResponse(content=cleaned, tool_calls=tool_calls, raw=text)
+        return LLMResponse(content=cleaned, tool_calls=tool_calls, raw=text,
+                           usage=_usage_from(getattr(self.client, "last_usage", None)))
+
+
+def _usage_from(value: Any) -> LLMUsage | None:
+    """Normalize a client's reported usage; None when absent or empty."""
+    if isinstance(value, dict):
+        value = LLMUsage(**{k: v for k, v in value.items() if k in LLMUsage.__dataclass_fields__})
+    if isinstance(value, LLMUsage) and value.input_tokens > 0:
+        return value
+    return None
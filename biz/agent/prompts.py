@@ -1,12 +1,10 @@
 """Load Jinja2-rendered prompt templates for the agent."""
 from __future__ import annotations
 
-import os
 from pathlib import Path
 from typing import Any
 
-import yaml
-from jinja2 import Template
+from biz.utils.code_reviewer import load_prompt_templates, render_template
 
 
 def load_prompt(prompt_key: str, style: str = "professional") -> dict[str, Any]:
@@ -16,13 +14,8 @@ def load_prompt(prompt_key: str, style: str = "professional") -> dict[str, Any]:
     """
     # Locate conf/ relative to project root (one level above biz/).
     conf_path = Path(__file__).resolve().parents[2] / "conf" / "prompt_templates.yml"
-    with open(conf_path, "r", encoding="utf-8") as f:
-        prompts = yaml.safe_load(f).get(prompt_key, {})
-
-    def render(s: str) -> str:
-        return Template(s).render(style=style)
-
+    prompts = load_prompt_templates(str(conf_path)).get(prompt_key, {})
     return {
-        "system_message": {"role": "system", "content": render(prompts["system_prompt"])},
-        "user_message": {"role": "user", "content": render(prompts["user_prompt"])},
+        "system_message": {"role": "system", "content": render_template(prompts["system_prompt"], style=style)},
+        "user_message": {"role": "user", "content": render_template(prompts["user_prompt"], style=style)},
     }
\ No newline at end of file
@@ -0,0 +1,206 @@
+"""Disk quota, LRU eviction and statistics for the agentic repo cache.
+
+``LocalRepoSyncer`` adds an object store per reviewed project and never
+removes one. ``RepoCacheManager`` keeps the stores under a size quota by
+deleting the least recently reviewed ones, and counts how syncs were
+served. Its state is shared by the worker processes through a
+``JsonStateStore`` next to the stores.
+"""
+from __future__ import annotations
+
+import errno
+import fcntl
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from biz.agent.repo_syncer import _LAST_USED, _sanitize_key
+from biz.utils.log import logger
+from biz.utils.state_store import JsonStateStore
+
+_GB = 1024 ** 3
+
+
+def _dir_size(path: Path) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                continue
+    return total
+
+
+class RepoCacheManager:
+    """Track per-project store size and last use; evict LRU stores over the quota.
+
+    The quota (``REPO_CACHE_QUOTA_GB``, 0 = unlimited) covers the object
+    stores; worktrees are short-lived and removed after each review. A
+    project is never evicted while its lock is held or it has a worktree
+    younger than ``stale_worktree_seconds``, i.e. while a review uses it.
+    ``maintain`` also deletes idle full clones left by the pre-worktree
+    ``<cache_root>/<key>/`` layout, which nothing reads any more.
+    """
+
+    def __init__(
+        self,
+        cache_root: Path | str | None = None,
+        *,
+        quota_bytes: int | None = None,
+        stats_path: Path | str | None = None,
+        stale_worktree_seconds: int = 6 * 3600,
+    ) -> None:
+        self.cache_root = Path(cache_root if cache_root is not None else os.getenv("REPO_CACHE_DIR", "data/repo_cache"))
+        self.quota_bytes = (
+            quota_bytes if quota_bytes is not None else int(float(os.getenv("REPO_CACHE_QUOTA_GB", "50")) * _GB)
+        )
+        self.store = JsonStateStore(stats_path or os.getenv("REPO_CACHE_STATS_FILE")
+                                    or self.cache_root / "cache_stats.json")
+        self.stale_worktree_seconds = stale_worktree_seconds
+
+    def record_sync(self, key: str, outcome: str | None) -> list[str]:
+        """Count a review's sync (``LocalRepoSyncer.last_outcome``), update its size, enforce the quota.
+
+        Returns the keys evicted to get back under the quota.
+        """
+        safe = _sanitize_key(key)
+        size = _dir_size(self.cache_root / f"{safe}.git")
+        with self.store.transaction() as state:
+            counters = state.setdefault("counters", {})
+            if outcome in ("hit", "fetch", "miss"):
+                counters[outcome] = counters.get(outcome, 0) + 1
+            state.setdefault("repos", {})[safe] = {"size_bytes": size, "last_used": time.time()}
+        return self.enforce_quota(keep=(safe,))
+
+    def refresh(self) -> dict[str, dict]:
+        """Re-measure every store on disk (and forget deleted ones); returns the per-project entries."""
+        repos = {}
+        for store in self.cache_root.glob("*.git"):
+            try:
+                last_used = (store / _LAST_USED).stat().st_mtime
+            except OSError:
+                last_used = 0.0
+            repos[store.name[:-len(".git")]] = {"size_bytes": _dir_size(store), "last_used": last_used}
+        with self.store.transaction() as state:
+            state["repos"] = repos
+        return repos
+
+    def enforce_quota(self, keep: tuple[str, ...] = ()) -> list[str]:
+        """Evict least recently used stores until the recorded total fits the quota."""
+        if self.quota_bytes <= 0:
+            return []
+        repos = self.store.read().get("repos", {})
+        total = sum(entry["size_bytes"] for entry in repos.values())
+        evicted = []
+        for safe, entry in sorted(repos.items(), key=lambda item: item[1]["last_used"]):
+            if total <= self.quota_bytes:
+                break
+            if safe in keep:
+                continue
+            if self._evict(safe, entry["size_bytes"]):
+                evicted.append(safe)
+                total -= entry["size_bytes"]
+        if total > self.quota_bytes:
+            logger.warning("repo cache is %.1f GB, over its %.1f GB quota, with nothing evictable",
+                           total / _GB, self.quota_bytes / _GB)
+        return evicted
+
+    def maintain(self) -> list[str]:
+        """Remove legacy checkouts, re-measure the cache and enforce the quota; for the periodic scheduler job."""
+        removed = self.remove_legacy_checkouts()
+        self.refresh()
+        return removed + self.enforce_quota()
+
+    def remove_legacy_checkouts(self) -> list[str]:
+        """Delete full clones from the old ``<cache_root>/<key>/`` layout, which syncs no longer use.
+
+        A checkout touched within ``stale_worktree_seconds`` may still be in
+        use by a worker running the old code and is left for a later run.
+        """
+        if not self.cache_root.is_dir():
+            return []
+        cutoff = time.time() - self.stale_worktree_seconds
+        removed = []
+        for path in self.cache_root.iterdir():
+            if path.name == "worktrees" or path.suffix == ".git" or not (path / ".git").is_dir():
+                continue
+            try:
+                last_used = max(p.stat().st_mtime for p in (path / ".git", path / ".git" / "FETCH_HEAD")
+                                if p.exists())
+            except OSError:
+                continue
+            if last_used >= cutoff:
+                continue
+            size = _dir_size(path)
+            with self._project_lock(path.name) as locked:
+                if not locked:
+                    continue
+                shutil.rmtree(path, ignore_errors=True)
+            self._count_eviction(size)
+            logger.info("removed legacy checkout %s from the repo cache (%d bytes)", path, size)
+            removed.append(path.name)
+        return removed
+
+    def summary(self) -> dict:
+        state = self.store.read()
+        counters = state.get("counters", {})
+        repos = state.get("repos", {})
+        syncs = sum(counters.get(k, 0) for k in ("hit", "fetch", "miss"))
+        return {
+            "repos": len(repos),
+            "size_bytes": sum(entry["size_bytes"] for entry in repos.values()),
+            "quota_bytes": self.quota_bytes,
+            "hits": counters.get("hit", 0),
+            "fetches": counters.get("fetch", 0),
+            "misses": counters.get("miss", 0),
+            # Syncs served from an existing store, with or without a fetch.
+            "hit_rate": round((syncs - counters.get("miss", 0)) / syncs, 4) if syncs else 0.0,
+            "evictions": counters.get("evictions", 0),
+            "evicted_bytes": counters.get("evicted_bytes", 0),
+        }
+
+    def _in_use(self, safe: str) -> bool:
+        worktrees = self.cache_root / "worktrees" / safe
+        cutoff = time.time() - self.stale_worktree_seconds
+        try:
+            return any(path.stat().st_mtime >= cutoff for path in worktrees.iterdir())
+        except OSError:
+            return False
+
+    @contextmanager
+    def _project_lock(self, safe: str):
+        """Yield whether the project's syncer lock could be taken without waiting."""
+        with open(self.cache_root / f"{safe}.lock", "a") as f:
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError as e:
+                if e.errno not in (errno.EWOULDBLOCK, errno.EAGAIN):
+                    raise
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def _count_eviction(self, size: int, safe: str | None = None) -> None:
+        with self.store.transaction() as state:
+            if safe is not None:
+                state.setdefault("repos", {}).pop(safe, None)
+            counters = state.setdefault("counters", {})
+            counters["evictions"] = counters.get("evictions", 0) + 1
+            counters["evicted_bytes"] = counters.get("evicted_bytes", 0) + size
+
+    def _evict(self, safe: str, size: int) -> bool:
+        with self._project_lock(safe) as locked:
+            if not locked or self._in_use(safe):
+                return False
+            # The lock file itself stays: a syncer waiting on it must not end up holding a stale inode.
+            shutil.rmtree(self.cache_root / "worktrees" / safe, ignore_errors=True)
+            shutil.rmtree(self.cache_root / f"{safe}.git", ignore_errors=True)
+        self._count_eviction(size, safe)
+        logger.info("evicted %s from the repo cache (%d bytes)", safe, size)
+        return True
@@ -0,0 +1,57 @@
+"""Background pre-warming of the agentic repo cache.
+
+Projects reviewed recently are likely to be reviewed again soon. Fetching
+them periodically means a review's own sync usually finds the commit and
+target branch already in the store and skips the fetch altogether.
+"""
+from __future__ import annotations
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from biz.agent.repo_syncer import LocalRepoSyncer
+from biz.utils.log import logger
+
+
+def prewarm_repo_cache(
+    cache_root: Path | str | None = None,
+    *,
+    active_hours: float | None = None,
+    max_projects: int | None = None,
+    concurrency: int | None = None,
+) -> dict[str, str]:
+    """Fetch the most recently reviewed projects in the cache.
+
+    At most `max_projects` projects reviewed within `active_hours` are
+    fetched, `concurrency` at a time. A project whose lock is held (a
+    review is syncing it right now) is skipped rather than waited for.
+    Returns ``{key: "ok" | error message}``; never raises.
+    """
+    cache_root = cache_root if cache_root is not None else os.getenv("REPO_CACHE_DIR", "data/repo_cache")
+    active_hours = active_hours if active_hours is not None else float(os.getenv("REPO_PREWARM_ACTIVE_HOURS", "24"))
+    max_projects = max_projects if max_projects is not None else int(os.getenv("REPO_PREWARM_MAX_PROJECTS", "20"))
+    concurrency = concurrency if concurrency is not None else int(os.getenv("REPO_PREWARM_CONCURRENCY", "2"))
+
+    try:
+        syncer = LocalRepoSyncer(cache_root=cache_root, lock_wait_seconds=0)
+        keys = syncer.recently_used(active_hours * 3600)[:max_projects]
+    except Exception as e:
+        logger.warning("repo cache pre-warm skipped: %s", e)
+        return {}
+    if not keys:
+        return {}
+
+    def warm(key: str) -> str:
+        try:
+            syncer.prewarm(key)
+            return "ok"
+        except Exception as e:
+            return str(e)
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="repo-prewarm") as pool:
+        results = dict(zip(keys, pool.map(warm, keys)))
+    failed = {key: error for key, error in results.items() if error != "ok"}
+    logger.info("repo cache pre-warm: %d/%d project(s) fetched%s", len(keys) - len(failed), len(keys),
+                f", not fetched: {failed}" if failed else "")
+    return results
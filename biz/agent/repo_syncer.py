@@ -4,16 +4,29 @@ from __future__ import annotations
 import errno
 import fcntl
 import os
+import posixpath
 import re
+import shutil
+import signal
 import subprocess
 import time
+import uuid
 from contextlib import contextmanager
 from pathlib import Path
+from typing import Callable
 from urllib.parse import quote, urlparse, urlunparse
 
 from biz.utils.log import logger
 
 
+# Touched after every full `fetch --prune`; its mtime schedules the next one.
+_PRUNE_STAMP = "last_prune"
+# Touched by every review's sync (not by pre-warming); marks the project as recently active.
+_LAST_USED = "last_used"
+# Touched by a review while it waits for a project lock; pre-warming gives the lock up when it sees it.
+_WAITING_SUFFIX = ".waiting"
+
+
 def _sanitize_key(key: str) -> str:
     """Turn a project key into a safe directory name."""
     return re.sub(r"[^A-Za-z0-9._-]", "_", key)
@@ -59,12 +72,34 @@ def _auth_url(url: str) -> str:
     return urlunparse(parsed._replace(netloc=f"{userinfo}@{parsed.netloc}"))
 
 
+def _sparse_directories(paths: list[str]) -> list[str]:
+    """Cone-mode sparse-checkout directories covering `paths` (top-level files are always included)."""
+    directories = {posixpath.dirname(p.strip("/")) for p in paths if p}
+    return sorted(d for d in directories if d)
+
+
 class LocalRepoSyncer:
-    """Lazily clone (first sync) or fetch+checkout (subsequent) a remote repo.
+    """Check out a remote repo at a given ref in a disposable per-job worktree.
 
     State lives under `cache_root`. Each project has:
-        cache_root/<safe_key>/        — git working tree
-        cache_root/<safe_key>.lock    — fcntl file lock
+        cache_root/<safe_key>.git/                 — shared bare object store
+        cache_root/<safe_key>.lock                 — fcntl lock guarding the store
+        cache_root/worktrees/<safe_key>/<job>/     — one detached worktree per job
+
+    The lock is held only while fetching into the store and adding or
+    removing a worktree, so concurrent reviews of one project run in
+    parallel, each in its own worktree at exactly its own commit.
+
+    The store is a partial clone by default (``clone_filter="blob:none"``):
+    history and trees are fetched up front, file contents only when a
+    worktree checks them out. ``clone_depth`` additionally truncates
+    history, and ``sparse_paths`` limits a worktree to the directories
+    of the given files.
+
+    Each sync fetches only what the review needs — the branch or SHA
+    under review and the MR target branch — and skips the fetch when
+    those are already in the store. A full ``fetch --prune`` of every
+    branch runs at most once per ``prune_interval_seconds``.
     """
 
     def __init__(
@@ -72,29 +107,129 @@ class LocalRepoSyncer:
         cache_root: Path | str,
         *,
         clone_timeout: int = 300,
-        lock_wait_seconds: int = 60,
+        lock_wait_seconds: int | None = None,
+        stale_worktree_seconds: int = 6 * 3600,
+        clone_filter: str | None = None,
+        clone_depth: int | None = None,
+        prune_interval_seconds: int | None = None,
     ) -> None:
         self.cache_root = Path(cache_root)
         self.cache_root.mkdir(parents=True, exist_ok=True)
         self.clone_timeout = clone_timeout
-        self.lock_wait_seconds = lock_wait_seconds
+        # By default long enough to wait out another job's fetch (e.g. a cold clone) instead of degrading.
+        self.lock_wait_seconds = lock_wait_seconds if lock_wait_seconds is not None else clone_timeout + 60
+        # Servers without partial-clone support ignore the filter and send everything.
+        self.clone_filter = clone_filter if clone_filter is not None else os.getenv("REPO_CLONE_FILTER", "blob:none")
+        self.clone_depth = clone_depth if clone_depth is not None else int(os.getenv("REPO_CLONE_DEPTH", "0"))
+        self.prune_interval_seconds = (
+            prune_interval_seconds if prune_interval_seconds is not None
+            else int(os.getenv("REPO_PRUNE_INTERVAL", str(24 * 3600)))
+        )
+        # Worktrees left behind by crashed jobs are removed after this long.
+        self.stale_worktree_seconds = stale_worktree_seconds
+        # How the last ``sync_to`` was served: "hit" (no fetch needed), "fetch" or "miss" (new store).
+        self.last_outcome: str | None = None
+
+    def sync_to(self, *, url: str, key: str, ref: str, sparse_paths: list[str] | None = None,
+                base_ref: str | None = None) -> Path:
+        """Fetch `ref` for `key` and check it out in a new worktree.
+
+        `base_ref` (the MR target branch) is fetched along with it, so
+        ``origin/<base_ref>`` is available for merge-base and diffs.
+        With `sparse_paths` (e.g. the files an MR touches), only their
+        directories and the top-level files are checked out.
+        Returns the worktree path; pass it to ``release`` when done.
+        Raises RuntimeError on failure, including when the project lock
+        can't be acquired within ``lock_wait_seconds``.
+        """
+        safe = _sanitize_key(key)
+        store = self.cache_root / f"{safe}.git"
+        worktrees = self.cache_root / "worktrees" / safe
+
+        waiting = self.cache_root / f"{safe}{_WAITING_SUFFIX}"
+        with self._lock(self.cache_root / f"{safe}.lock", on_wait=waiting.touch):
+            created = not (store / "HEAD").exists()
+            if created:
+                self._init_store(_auth_url(url), store)
+            (store / _LAST_USED).touch()
+            self._ensure_authenticated_remote(store)
+            sha, fetched = self._fetch_and_resolve(store, ref, base_ref)
+            self.last_outcome = "miss" if created else "fetch" if fetched else "hit"
+            self._remove_stale_worktrees(store, worktrees)
+            worktree = worktrees / f"{sha[:12]}-{uuid.uuid4().hex[:8]}"
+            self._git(store, ["worktree", "add", "--no-checkout", "--detach", str(worktree), sha],
+                      "git worktree add")
+        # Populating the worktree (which fetches missing blobs) doesn't need the lock.
+        try:
+            directories = _sparse_directories(sparse_paths or [])
+            if directories:
+                self._git(worktree, ["sparse-checkout", "set", "--cone", *directories], "git sparse-checkout")
+            self._git(worktree, ["checkout", "-q", "--detach", sha], "git checkout")
+        except Exception:
+            self.release(worktree)
+            raise
+        return worktree
+
+    @contextmanager
+    def checkout(self, *, url: str, key: str, ref: str):
+        """``sync_to`` as a context manager that releases the worktree on exit."""
+        worktree = self.sync_to(url=url, key=key, ref=ref)
+        try:
+            yield worktree
+        finally:
+            self.release(worktree)
+
+    def release(self, worktree: Path | str) -> None:
+        """Remove a worktree returned by ``sync_to``. Never raises."""
+        worktree = Path(worktree)
+        safe = worktree.parent.name
+        store = self.cache_root / f"{safe}.git"
+        try:
+            with self._lock(self.cache_root / f"{safe}.lock"):
+                self._git(store, ["worktree", "remove", "--force", str(worktree)], "git worktree remove")
+        except Exception as e:
+            # The admin entry is pruned by a later sync once the directory is gone.
+            logger.warning("failed to remove worktree %s cleanly, deleting it: %s", worktree, e)
+            shutil.rmtree(worktree, ignore_errors=True)
 
-    def sync_to(self, *, url: str, key: str, ref: str) -> Path:
-        """Ensure repo for `key` is locally available and `ref` is checked out.
+    def recently_used(self, within_seconds: float) -> list[str]:
+        """Keys of cached projects synced for a review in the last `within_seconds`, most recent first."""
+        cutoff = time.time() - within_seconds
+        used = []
+        for store in self.cache_root.glob("*.git"):
+            try:
+                mtime = (store / _LAST_USED).stat().st_mtime
+            except OSError:
+                continue
+            if mtime >= cutoff:
+                used.append((mtime, store.name[:-len(".git")]))
+        return [key for _, key in sorted(used, reverse=True)]
 
-        Returns the local repo path (working tree).
-        Raises RuntimeError on failure.
+    def prewarm(self, key: str) -> None:
+        """Fetch every branch of an already cached project, ahead of its next review.
+
+        Yields to reviews: if a ``sync_to`` starts waiting for the project
+        lock, the fetch is interrupted and the lock released right away.
+        Raises RuntimeError if `key` isn't cached, its lock isn't free
+        within ``lock_wait_seconds`` or the fetch was interrupted.
         """
         safe = _sanitize_key(key)
-        target = self.cache_root / safe
-        lock_path = self.cache_root / f"{safe}.lock"
+        store = self.cache_root / f"{safe}.git"
+        if not (store / "HEAD").exists():
+            raise RuntimeError(f"{key} is not in the repo cache")
+        waiting = self.cache_root / f"{safe}{_WAITING_SUFFIX}"
+        started = time.time()
 
-        with self._lock(lock_path):
-            if not (target / ".git").exists():
-                self._clone(_auth_url(url), target)
-            self._ensure_authenticated_remote(target)
-            self._fetch_and_checkout(target, ref)
-        return target
+        def review_waiting() -> bool:
+            try:
+                return waiting.stat().st_mtime >= started
+            except OSError:
+                return False
+
+        with self._lock(self.cache_root / f"{safe}.lock"):
+            self._ensure_authenticated_remote(store)
+            self._fetch(store, ["--prune", "origin"], "git fetch --prune", interrupt=review_waiting)
+            (store / _PRUNE_STAMP).touch()
 
     def _ensure_authenticated_remote(self, target: Path) -> None:
         """Rewrite ``origin`` URL on a cached repo to include credentials.
@@ -139,22 +274,26 @@ class LocalRepoSyncer:
             raise RuntimeError(f"git remote set-url failed: {stderr}") from e
 
     @contextmanager
-    def _lock(self, lock_path: Path):
+    def _lock(self, lock_path: Path, on_wait: Callable[[], object] | None = None):
         lock_path.touch(exist_ok=True)
         f = open(lock_path, "w")
         deadline = time.monotonic() + self.lock_wait_seconds
-        while True:
-            try:
-                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
-                break
-            except OSError as e:
-                if e.errno not in (errno.EWOULDBLOCK, errno.EAGAIN):
-                    raise
-                if time.monotonic() >= deadline:
-                    logger.warning("could not acquire lock %s within %ds, proceeding without lock",
-                                   lock_path, self.lock_wait_seconds)
+        try:
+            while True:
+                try:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
                     break
-                time.sleep(0.5)
+                except OSError as e:
+                    if e.errno not in (errno.EWOULDBLOCK, errno.EAGAIN):
+                        raise
+                    if on_wait:
+                        on_wait()
+                    if time.monotonic() >= deadline:
+                        raise RuntimeError(f"could not acquire lock {lock_path} within {self.lock_wait_seconds}s")
+                    time.sleep(0.5)
+        except BaseException:
+            f.close()
+            raise
         try:
             yield
         finally:
@@ -164,40 +303,144 @@ class LocalRepoSyncer:
                 pass
             f.close()
 
-    def _clone(self, url: str, target: Path) -> None:
-        logger.debug("cloning %s -> %s", url, target)
+    def _git(self, store: Path, args: list[str], what: str,
+             interrupt: Callable[[], bool] | None = None) -> str:
+        """Run git in `store`; with `interrupt`, the command is stopped as soon as it returns True."""
+        if interrupt is not None:
+            return self._git_interruptible(store, args, what, interrupt)
         try:
-            subprocess.run(
-                ["git", "clone", url, str(target)],
-                check=True,
-                capture_output=True,
-                text=True,
-                timeout=self.clone_timeout,
+            r = subprocess.run(
+                ["git", *args], cwd=store, check=True, capture_output=True, text=True, timeout=self.clone_timeout,
             )
         except subprocess.TimeoutExpired as e:
-            raise RuntimeError(f"git clone timed out after {self.clone_timeout}s") from e
+            raise RuntimeError(f"{what} timed out after {self.clone_timeout}s") from e
         except subprocess.CalledProcessError as e:
-            raise RuntimeError(f"git clone failed: {e.stderr.strip()}") from e
+            raise RuntimeError(f"{what} failed: {e.stderr.strip()}") from e
+        return r.stdout
 
-    def _fetch_and_checkout(self, target: Path, ref: str) -> None:
-        try:
-            subprocess.run(
-                ["git", "fetch", "--all", "--prune"],
-                cwd=target, check=True, capture_output=True, text=True, timeout=self.clone_timeout,
-            )
-        except subprocess.CalledProcessError as e:
-            raise RuntimeError(f"git fetch failed: {e.stderr.strip()}") from e
+    def _git_interruptible(self, store: Path, args: list[str], what: str, interrupt: Callable[[], bool]) -> str:
+        # Own process group, so stopping it also stops transport helpers (ssh, upload-pack) holding its pipes.
+        proc = subprocess.Popen(["git", *args], cwd=store, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                                start_new_session=True)
+        deadline = time.monotonic() + self.clone_timeout
+        while True:
+            try:
+                stdout, stderr = proc.communicate(timeout=0.5)
+                break
+            except subprocess.TimeoutExpired:
+                if interrupt():
+                    reason = "interrupted, a review is waiting for the lock"
+                elif time.monotonic() >= deadline:
+                    reason = f"timed out after {self.clone_timeout}s"
+                else:
+                    continue
+                # SIGTERM lets git remove its lock files; a partial pack is left for gc.
+                try:
+                    os.killpg(proc.pid, signal.SIGTERM)
+                except ProcessLookupError:
+                    pass
+                proc.communicate()
+                raise RuntimeError(f"{what} {reason}")
+        if proc.returncode:
+            raise RuntimeError(f"{what} failed: {stderr.strip()}")
+        return stdout
+
+    def _init_store(self, url: str, store: Path) -> None:
+        logger.debug("creating object store %s", store)
+        store.mkdir(parents=True, exist_ok=True)
+        self._git(store, ["init", "--bare", "-q"], "git init")
+        self._git(store, ["remote", "add", "origin", url], "git remote add")
+        self._git(store, ["config", "remote.origin.fetch", "+refs/heads/*:refs/remotes/origin/*"], "git config")
+        # Sparse-checkout settings must stay per worktree; core.bare then has to
+        # move to the store's own worktree config, or every worktree reads as bare.
+        self._git(store, ["config", "extensions.worktreeConfig", "true"], "git config")
+        self._git(store, ["config", "--worktree", "core.bare", "true"], "git config")
+        self._git(store, ["config", "--unset", "core.bare"], "git config")
+        if self.clone_filter:
+            # What `git clone --filter` sets up: missing objects are fetched from origin on demand.
+            self._git(store, ["config", "remote.origin.promisor", "true"], "git config")
+            self._git(store, ["config", "remote.origin.partialclonefilter", self.clone_filter], "git config")
+        # A new store has nothing to prune yet.
+        (store / _PRUNE_STAMP).touch()
+
+    def _fetch_and_resolve(self, store: Path, ref: str, base_ref: str | None = None) -> tuple[str, bool]:
+        """Fetch what is needed to review `ref`; return the commit SHA it points to and whether a fetch ran."""
         # Determine if ref looks like a SHA (hex, length >= 7) or a branch name.
         is_sha = bool(re.fullmatch(r"[0-9a-fA-F]{7,40}", ref))
-        if is_sha:
-            cmd = ["git", "reset", "--hard", ref]
+        # Use origin/<ref> as the source of truth so the worktree tracks new
+        # commits pushed to the remote since the last sync.
+        rev = ref if is_sha else f"refs/remotes/origin/{ref}"
+        base_rev = f"refs/remotes/origin/{base_ref}" if base_ref else None
+
+        fetched_all = self._prune_due(store)
+        if fetched_all:
+            # Occasionally fetch every branch so refs deleted upstream are pruned.
+            self._fetch(store, ["--prune", "origin"], "git fetch --prune")
+            (store / _PRUNE_STAMP).touch()
+        fetched = True
+        if is_sha and self._has_commit(store, ref) and (base_rev is None or self._has_commit(store, base_rev)):
+            logger.debug("%s already in %s, skipping fetch", ref, store)
+            fetched = fetched_all
+        elif fetched_all and not (is_sha and len(ref) == 40):
+            pass  # Every branch was just fetched; only a full SHA outside them could still be missing.
+        elif is_sha and len(ref) < 40:
+            # The server only accepts full object names; an abbreviated SHA needs every branch.
+            self._fetch(store, ["origin"], "git fetch")
         else:
-            # Use origin/<ref> as the source of truth so the working tree
-            # tracks new commits pushed to the remote since the last sync.
-            cmd = ["git", "reset", "--hard", f"origin/{ref}"]
+            # A branch may have moved, so it is always refetched (and the target branch with it).
+            refspecs = [ref if is_sha else f"+refs/heads/{ref}:{rev}"]
+            if base_ref:
+                refspecs.append(f"+refs/heads/{base_ref}:{base_rev}")
+            try:
+                self._fetch(store, ["origin", *refspecs], "git fetch")
+            except RuntimeError as e:
+                if not is_sha:
+                    raise
+                # Servers that refuse to serve SHAs directly still serve the branches containing them.
+                logger.info("fetching %s by SHA failed, fetching all branches: %s", ref, e)
+                self._fetch(store, ["origin"], "git fetch")
+        sha = self._git(store, ["rev-parse", "--verify", f"{rev}^{{commit}}"], f"git rev-parse {ref}").strip()
+        return sha, fetched
+
+    def _fetch(self, store: Path, args: list[str], what: str,
+               interrupt: Callable[[], bool] | None = None) -> None:
+        fetch = ["fetch", "--no-tags"]
+        if self.clone_filter:
+            fetch.append(f"--filter={self.clone_filter}")
+        if self.clone_depth > 0:
+            fetch.append(f"--depth={self.clone_depth}")
+        self._git(store, [*fetch, *args], what, interrupt)
+
+    def _has_commit(self, store: Path, rev: str) -> bool:
+        """Whether `rev` names a commit already in the store.
+
+        Uses ``rev-list --missing=allow-any``: ``rev-parse`` / ``cat-file``
+        would try to fetch an unknown object from the promisor remote.
+        """
         try:
-            subprocess.run(
-                cmd, cwd=target, check=True, capture_output=True, text=True, timeout=self.clone_timeout,
+            r = subprocess.run(
+                ["git", "rev-list", "-n", "1", "--no-walk", "--missing=allow-any", rev, "--"],
+                cwd=store, capture_output=True, text=True, timeout=30,
             )
-        except subprocess.CalledProcessError as e:
-            raise RuntimeError(f"git checkout failed: {e.stderr.strip()}") from e
+        except subprocess.TimeoutExpired:
+            return False
+        return r.returncode == 0
+
+    def _prune_due(self, store: Path) -> bool:
+        try:
+            return time.time() - (store / _PRUNE_STAMP).stat().st_mtime >= self.prune_interval_seconds
+        except FileNotFoundError:
+            return True
+
+    def _remove_stale_worktrees(self, store: Path, worktrees: Path) -> None:
+        """Delete worktrees older than ``stale_worktree_seconds`` (left by crashed jobs)."""
+        if worktrees.is_dir():
+            cutoff = time.time() - self.stale_worktree_seconds
+            for path in worktrees.iterdir():
+                try:
+                    if path.stat().st_mtime < cutoff:
+                        logger.info("removing stale worktree %s", path)
+                        shutil.rmtree(path, ignore_errors=True)
+                except OSError:
+                    continue
+        self._git(store, ["worktree", "prune"], "git worktree prune")
@@ -1,23 +1,86 @@
 """Multi-turn agent loop."""
 from __future__ import annotations
 
+import json
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 
-from biz.agent.llm_adapter import LLMAdapter
+from biz.agent.llm_adapter import LLMAdapter, ToolCall
 from biz.agent.tool_registry import ToolRegistry
+from biz.llm.usage import LLMUsage
 from biz.utils.log import logger
-from biz.utils.token_util import count_tokens, truncate_text_by_tokens
+from biz.utils.token_util import count_tokens_batch, truncate_text_by_tokens
+
+# Share of the model context window the conversation may use; the rest is
+# headroom for the reply and for token-estimate error.
+_CONTEXT_USABLE_RATIO = 0.8
+
+# Once the conversation reaches this share of the token cap, older tool
+# outputs are elided until it is back under the low-water mark. Compacting
+# in one batch, and rarely, keeps the prompt prefix stable (and cacheable)
+# between passes.
+_COMPACT_HIGH_WATER = 0.9
+_COMPACT_LOW_WATER = 0.6
 
 
 class TokenBudgetExceeded(Exception):
-    """Raised when the cumulative token estimate for the conversation exceeds the cap."""
+    """Raised when the conversation exceeds the token cap even after compaction."""
 
 
 class InvalidToolCallStreak(Exception):
     """Raised when the agent emits 3 consecutive rounds with no usable tool calls or text."""
 
 
+class _TokenLedger:
+    """Running token total of a conversation.
+
+    Each message is counted once, when it is added. When the provider
+    reports the prompt size of a round, the total is reset to that figure
+    (plus the reply), so the estimate only covers messages added since.
+    """
+
+    def __init__(self) -> None:
+        self.total = 0
+
+    def add(self, *messages: dict) -> None:
+        texts = [text for m in messages for text in _message_texts(m)]
+        if texts:
+            self.total += sum(count_tokens_batch(texts))
+
+    def calibrate(self, usage: LLMUsage | None) -> None:
+        if isinstance(usage, LLMUsage) and usage.input_tokens > 0:
+            self.total = usage.input_tokens + usage.output_tokens
+
+    def replace(self, old: dict, new: dict) -> None:
+        # Long contents are memoised by token_util, so recounting `old` is cheap.
+        old_tokens, new_tokens = (sum(count_tokens_batch(_message_texts(m))) for m in (old, new))
+        self.total += new_tokens - old_tokens
+
+
+def _elided_stub(call: ToolCall | None, tokens: int) -> str:
+    what = f"{call.name}({json.dumps(call.arguments, ensure_ascii=False)})" if call else "this tool call"
+    return (f"[output of {what} elided to save context ({tokens} tokens); "
+            f"call the tool again if you still need it]")
+
+
+def _is_relevant(call: ToolCall | None, anchor: str) -> bool:
+    """A tool call is relevant when one of its arguments (a path, a symbol) appears in the task itself."""
+    if call is None:
+        return False
+    return any(isinstance(v, str) and len(v) >= 3 and v in anchor for v in call.arguments.values())
+
+
+def _message_texts(message: dict) -> list[str]:
+    content = message.get("content") or ""
+    if isinstance(content, str):
+        return [content]
+    if isinstance(content, list):
+        return [str(part) for part in content if isinstance(part, dict)]
+    return []
+
+
 class AgentRunner:
     def __init__(
         self,
@@ -27,16 +90,35 @@ class AgentRunner:
         max_iterations: int = 20,
         total_token_cap: int = 80_000,
         tool_output_max_tokens: int | None = None,
+        tool_workers: int | None = None,
+        round_timeout: float | None = None,
     ) -> None:
         self.adapter = adapter
         self.registry = registry
         self.max_iterations = max_iterations
         self.total_token_cap = total_token_cap
+        # The conversation is resent every round, so it must also fit the
+        # model's context window (leaving room for the reply).
+        max_context = getattr(getattr(adapter, "capabilities", None), "max_context", None)
+        if isinstance(max_context, int) and max_context > 0:
+            context_cap = int(max_context * _CONTEXT_USABLE_RATIO)
+            if context_cap < total_token_cap:
+                logger.info("agent token cap lowered from %d to %d to fit the model context window",
+                            total_token_cap, context_cap)
+                self.total_token_cap = context_cap
         self.tool_output_max_tokens = (
             tool_output_max_tokens
             if tool_output_max_tokens is not None
             else int(os.getenv("AGENT_TOOL_OUTPUT_MAX_TOKENS", "10000"))
         )
+        # Tool calls of one round run concurrently on up to `tool_workers`
+        # threads; `round_timeout` bounds the whole round (0 = no deadline).
+        self.tool_workers = tool_workers if tool_workers is not None else int(os.getenv("AGENT_TOOL_WORKERS", "4"))
+        self.round_timeout = (
+            round_timeout
+            if round_timeout is not None
+            else float(os.getenv("AGENT_ROUND_TIMEOUT", "120"))
+        )
 
     def run(
         self,
@@ -44,11 +126,21 @@ class AgentRunner:
         out: dict[str, Any] | None = None,
     ) -> str:
         messages = list(initial_messages)
+        ledger = _TokenLedger()
+        ledger.add(*messages)
+        # Compaction state: calls by id (for stubs and relevance), what has been elided.
+        calls: dict[str, ToolCall] = {}
+        elided: set[int] = set()
+        anchor = "\n".join(m["content"] for m in initial_messages
+                           if m.get("role") == "user" and isinstance(m.get("content"), str))
         last_assistant_content: str | None = None
         # Tracks rounds where LLM emitted nothing actionable (no content AND no tool_calls).
         # After 3 in a row, raise to trigger soft-degrade.
         empty_streak = 0
         iterations_used = 0
+        # One pool per run, created on the first round that needs one and replaced after a round that
+        # hit the deadline.
+        pool: ThreadPoolExecutor | None = None
         try:
             for i in range(self.max_iterations):
                 iterations_used = i + 1
@@ -79,9 +171,21 @@ class AgentRunner:
                     return resp.content or last_assistant_content or ""
                 # Productive round: reset streak.
                 empty_streak = 0
+                round_start = len(messages)
                 messages.append(self.adapter.build_assistant_message(resp))
-                for call in resp.tool_calls:
-                    result = self.registry.dispatch(call)
+                ledger.add(messages[-1])
+                ledger.calibrate(getattr(resp, "usage", None))
+                if pool is None and (self.round_timeout or (len(resp.tool_calls) > 1 and self.tool_workers > 1)):
+                    pool = ThreadPoolExecutor(max_workers=max(self.tool_workers, 1), thread_name_prefix="agent-tool")
+                dispatch_start = time.monotonic()
+                results = self.registry.dispatch_all(resp.tool_calls, max_workers=self.tool_workers,
+                                                     timeout=self.round_timeout or None, executor=pool)
+                if pool is not None and self.round_timeout and time.monotonic() - dispatch_start >= self.round_timeout:
+                    # Calls past the deadline may still hold pool threads; later rounds must not queue behind them.
+                    pool.shutdown(wait=False)
+                    pool = None
+                for call, result in zip(resp.tool_calls, results):
+                    calls[call.id] = call
                     # Truncate tool output to bound message size.
                     if result.success and self.tool_output_max_tokens > 0:
                         truncated = truncate_text_by_tokens(result.output, self.tool_output_max_tokens)
@@ -92,27 +196,47 @@ class AgentRunner:
                                 error=result.error,
                             )
                     messages.append(self.adapter.build_tool_message(call, result))
-                    # Token accounting.
-                    usage = self._estimate_total_tokens(messages)
+                    # Token accounting: only the new message is counted.
+                    ledger.add(messages[-1])
+                    if ledger.total > self.total_token_cap * _COMPACT_HIGH_WATER:
+                        self._compact(messages, ledger, round_start, calls, elided, anchor)
+                    usage = ledger.total
                     if usage > self.total_token_cap:
                         raise TokenBudgetExceeded(
                             f"token estimate {usage} exceeds cap {self.total_token_cap}"
                         )
             return last_assistant_content or f"max iterations ({self.max_iterations}) reached without final response"
         finally:
+            if pool is not None:
+                pool.shutdown(wait=False)
             if out is not None:
                 out["iterations"] = iterations_used
                 out["messages"] = messages
+                out["compacted"] = len(elided)
+
+    def _compact(self, messages: list[dict], ledger: _TokenLedger, keep_from: int,
+                 calls: dict[str, ToolCall], elided: set[int], anchor: str) -> None:
+        """Elide older tool outputs until the conversation is under the low-water mark.
 
-    @staticmethod
-    def _estimate_total_tokens(messages: list[dict]) -> int:
-        total = 0
-        for m in messages:
-            content = m.get("content") or ""
-            if isinstance(content, str):
-                total += count_tokens(content)
-            elif isinstance(content, list):
-                for part in content:
-                    if isinstance(part, dict):
-                        total += count_tokens(str(part))
-        return total
\ No newline at end of file
+        Outputs of the current round (``messages[keep_from:]``) stay verbatim.
+        Among older ones, irrelevant outputs go first, oldest first; outputs
+        whose arguments appear in the task (e.g. a changed file) go last.
+        """
+        target = self.total_token_cap * _COMPACT_LOW_WATER
+        candidates = [i for i in range(keep_from) if messages[i].get("role") == "tool" and i not in elided]
+        candidates.sort(key=lambda i: (_is_relevant(calls.get(messages[i].get("tool_call_id")), anchor), i))
+        before = ledger.total
+        for i in candidates:
+            if ledger.total <= target:
+                break
+            old = messages[i]
+            tokens = sum(count_tokens_batch(_message_texts(old)))
+            new = {**old, "content": _elided_stub(calls.get(old.get("tool_call_id")), tokens)}
+            if sum(count_tokens_batch(_message_texts(new))) >= tokens:
+                continue  # Short outputs (errors, counts) cost less than their stub.
+            ledger.replace(old, new)
+            messages[i] = new
+            elided.add(i)
+        if ledger.total < before:
+            logger.info("agent context compacted: %d tool outputs elided in total, token estimate %d -> %d",
+                        len(elided), before, ledger.total)
@@ -21,11 +21,14 @@ class Tool(abc.ABC):
     """Abstract base class for agent tools.
 
     Subclasses must define class attributes `name`, `description`, `parameters`
-    (JSON Schema dict) and implement `execute(**kwargs)`.
+    (JSON Schema dict) and implement `execute(**kwargs)`. Tools with side
+    effects should set `parallel_safe = False`.
     """
     name: str = ""
     description: str = ""
     parameters: dict = {}
+    # Read-only tools can run concurrently with other calls of the same round.
+    parallel_safe: bool = True
 
     @abc.abstractmethod
     def execute(self, **kwargs) -> ToolResult:
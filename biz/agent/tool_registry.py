@@ -1,6 +1,9 @@
 """Registry mapping tool names to Tool instances."""
 from __future__ import annotations
 
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from typing import Any
 
 from biz.agent.tool import Tool, ToolResult
@@ -46,4 +49,56 @@ class ToolRegistry:
             call.name, call.arguments, result.success,
             len(result.output or ""), result.error or "",
         )
-        return result
\ No newline at end of file
+        return result
+
+    def dispatch_all(self, calls: list[Any], *, max_workers: int = 4, timeout: float | None = None,
+                     executor: ThreadPoolExecutor | None = None) -> list[ToolResult]:
+        """Execute a round of tool calls; results are returned in call order.
+
+        Calls run concurrently on up to `max_workers` threads (or on
+        `executor`, which the caller owns and may reuse across rounds) when
+        there is more than one and every tool involved is `parallel_safe`;
+        otherwise they run one after another. Calls still running after
+        `timeout` seconds (the round deadline) get a failed ToolResult; their
+        threads are left to finish in the background, so a caller reusing
+        `executor` should replace it after a round that hit the deadline.
+        """
+        parallel = len(calls) > 1 and max_workers > 1 and all(
+            getattr(self._tools.get(call.name), "parallel_safe", True) for call in calls)
+        if not parallel and timeout is None:
+            return [self.dispatch(call) for call in calls]
+        start = time.monotonic()
+        workers = min(max_workers, len(calls)) if parallel else 1
+        pool = executor or ThreadPoolExecutor(max_workers=workers, thread_name_prefix="agent-tool")
+        try:
+            if parallel:
+                futures = [pool.submit(contextvars.copy_context().run, self.dispatch, call) for call in calls]
+                wait(futures, timeout=timeout)
+            else:
+                # One at a time, each bounded by what is left of the round; once a call overruns, the
+                # rest are not started, so an unsafe tool never runs alongside the one still going.
+                futures = []
+                for call in calls:
+                    future = pool.submit(contextvars.copy_context().run, self.dispatch, call)
+                    futures.append(future)
+                    wait([future], timeout=max(start + timeout - time.monotonic(), 0))
+                    if not future.done():
+                        break
+            results = []
+            for i, call in enumerate(calls):
+                future = futures[i] if i < len(futures) else None
+                if future is not None and future.done():
+                    results.append(future.result())
+                    continue
+                if future is not None:
+                    future.cancel()
+                    logger.warning("tool %s did not finish within the round deadline (%.0fs)", call.name, timeout)
+                results.append(ToolResult(success=False, output="",
+                                          error=f"tool call timed out after {timeout:g}s (round deadline)"))
+            logger.debug("tool round: %d calls %s took %.3fs", len(calls),
+                         "in parallel" if parallel else "sequentially", time.monotonic() - start)
+            return results
+        finally:
+            if executor is None:
+                # Don't wait for calls past the deadline; queued ones were cancelled above.
+                pool.shutdown(wait=False)
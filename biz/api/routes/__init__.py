@@ -1,7 +1,7 @@
 """
 路由注册模块
 """
-from biz.api.routes import home, daily_report, webhook
+from biz.api.routes import home, daily_report, metrics, webhook
 
 
 def register_routes(app):
@@ -10,4 +10,5 @@ def register_routes(app):
     """
     app.register_blueprint(home.home_bp)
     app.register_blueprint(daily_report.daily_report_bp)
-    app.register_blueprint(webhook.webhook_bp)
\ No newline at end of file
+    app.register_blueprint(webhook.webhook_bp)
+    app.register_blueprint(metrics.metrics_bp)
\ No newline at end of file
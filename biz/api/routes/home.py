@@ -1,7 +1,9 @@
 """
 首页路由模块
 """
-from flask import Blueprint
+from flask import Blueprint, jsonify
+
+from biz.api.warmup import get_state
 
 home_bp = Blueprint('home', __name__)
 
@@ -12,4 +14,13 @@ def home():
               <p>GitHub project address: <a href="https://github.com/sunmh207/AI-Codereview-Gitlab" target="_blank">
               https://github.com/sunmh207/AI-Codereview-Gitlab</a></p>
               <p>Gitee project address: <a href="https://gitee.com/sunminghui/ai-codereview-gitlab" target="_blank">https://gitee.com/sunminghui/ai-codereview-gitlab</a></p>
-              """
\ No newline at end of file
+              """
+
+
+@home_bp.route('/review/ready', methods=['GET'])
+def ready():
+    """
+    就绪检查：启动预热完成后返回 200，否则返回 503，附带各预热步骤的结果与耗时
+    """
+    state = get_state()
+    return jsonify(state), 200 if state["status"] == "ready" else 503
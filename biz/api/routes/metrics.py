@@ -0,0 +1,35 @@
+"""
+运行指标路由模块
+"""
+import os
+
+from flask import Blueprint, jsonify
+
+from biz.agent.repo_cache import RepoCacheManager
+from biz.llm.health import ProviderHealth
+from biz.llm.resilience import get_circuit_breaker
+from biz.utils.triage import TriageStats
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+def _configured_providers() -> list:
+    providers = [os.getenv("LLM_PROVIDER", "anthropic")]
+    providers += [p.strip() for p in os.getenv("LLM_FALLBACK_PROVIDERS", "").split(",") if p.strip()]
+    return list(dict.fromkeys(providers))
+
+
+@metrics_bp.route('/review/metrics', methods=['GET'])
+def metrics():
+    """
+    返回 LLM 供应商的熔断器状态、近期健康统计、静态分诊跳过率与仓库缓存统计（JSON）
+    """
+    providers = _configured_providers()
+    return jsonify({
+        "llm": {
+            "circuit_breakers": get_circuit_breaker().states(),
+            "provider_health": ProviderHealth().snapshots(providers),
+        },
+        "triage": TriageStats().summary(),
+        "repo_cache": RepoCacheManager().summary(),
+    })
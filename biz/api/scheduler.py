@@ -6,7 +6,10 @@ import os
 import traceback
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 
+from biz.agent.repo_cache import RepoCacheManager
+from biz.agent.repo_prewarm import prewarm_repo_cache
 from biz.utils.log import logger
 from biz.api.routes.daily_report import daily_report_task
 
@@ -33,6 +36,27 @@ def setup_scheduler():
             )
         )
 
+        # 预热 agentic 模式的仓库缓存；jitter 打散多个实例的拉取时间，上一轮未结束时不重复执行
+        prewarm_interval = int(os.getenv('REPO_PREWARM_INTERVAL', '600'))
+        if prewarm_interval > 0 and os.getenv('REVIEW_STRATEGY', 'diff_only') in ('agentic', 'auto'):
+            scheduler.add_job(
+                prewarm_repo_cache,
+                trigger=IntervalTrigger(seconds=prewarm_interval,
+                                        jitter=int(os.getenv('REPO_PREWARM_JITTER', '60'))),
+                max_instances=1,
+                coalesce=True,
+            )
+
+        # 重新统计仓库缓存大小，超出 REPO_CACHE_QUOTA_GB 时按最近最少使用淘汰
+        maintenance_interval = int(os.getenv('REPO_CACHE_MAINTENANCE_INTERVAL', '3600'))
+        if maintenance_interval > 0 and os.getenv('REVIEW_STRATEGY', 'diff_only') in ('agentic', 'auto'):
+            scheduler.add_job(
+                lambda: RepoCacheManager().maintain(),
+                trigger=IntervalTrigger(seconds=maintenance_interval),
+                max_instances=1,
+                coalesce=True,
+            )
+
         # Start the scheduler
         scheduler.start()
         logger.info("Scheduler started successfully.")
@@ -0,0 +1,106 @@
+"""
+启动预热模块
+
+在服务开始接收 webhook 之前加载 tokenizer、提示词模板、各模块中预编译的正则与 LLM 客户端。
+webhook 在 fork 出的子进程中处理，子进程继承父进程已加载的内容，首个审查不再承担这些初始化开销。
+"""
+import importlib
+import os
+import threading
+import time
+import traceback
+
+from biz.utils.log import logger
+
+# 审查流程中按需导入的模块（其模块级正则等在导入时编译）
+_LAZY_MODULES = (
+    "biz.agent.agentic_reviewer",
+    "biz.agent.tools",
+    "biz.agent.tools.run_command",
+)
+
+_lock = threading.Lock()
+_state = {"status": "pending", "steps": {}}
+
+
+def _warm_tokenizer() -> str:
+    from biz.utils import token_util
+
+    encoding = token_util._get_encoding_cached()
+    token_util.count_tokens("warm up")
+    if encoding is None:
+        logger.warning("tiktoken 编码不可用，token 计数将使用估算；离线部署请配置 TIKTOKEN_CACHE_DIR")
+        return "estimate"
+    return "tiktoken"
+
+
+def _warm_prompt_templates() -> str:
+    from biz.agent.prompts import load_prompt
+    from biz.utils.code_reviewer import load_prompt_templates, render_template
+
+    templates = load_prompt_templates()
+    style = os.getenv("REVIEW_STYLE", "professional")
+    for prompts in templates.values():
+        if isinstance(prompts, dict):
+            for key in ("system_prompt", "user_prompt"):
+                if isinstance(prompts.get(key), str):
+                    render_template(prompts[key], style=style)
+    load_prompt("agentic_code_review_prompt", style=style)
+    return f"{len(templates)} templates"
+
+
+def _warm_modules() -> str:
+    for name in _LAZY_MODULES:
+        importlib.import_module(name)
+    return f"{len(_LAZY_MODULES)} modules"
+
+
+def _warm_llm_client() -> str:
+    from biz.llm.factory import Factory
+
+    # 仅构造客户端（导入 SDK、校验配置、加载证书），不发起请求；子进程会各自创建客户端，避免共享连接
+    return type(Factory.getClient()).__name__
+
+
+_STEPS = (
+    ("tokenizer", _warm_tokenizer),
+    ("prompt_templates", _warm_prompt_templates),
+    ("modules", _warm_modules),
+    ("llm_client", _warm_llm_client),
+)
+
+
+def warm_up() -> dict:
+    """
+    依次执行各预热步骤并记录耗时。单个步骤失败只记录日志，不阻止服务启动。
+
+    Returns:
+        dict: 预热状态，与 /review/ready 返回的内容一致。
+    """
+    with _lock:
+        _state.update(status="warming_up", steps={})
+    started = time.perf_counter()
+    for name, step in _STEPS:
+        step_started = time.perf_counter()
+        try:
+            detail, ok = step(), True
+        except Exception as e:
+            detail, ok = str(e), False
+            logger.warning(f"预热步骤 {name} 失败: {e}")
+            logger.debug(traceback.format_exc())
+        with _lock:
+            _state["steps"][name] = {"ok": ok, "detail": detail,
+                                     "ms": round((time.perf_counter() - step_started) * 1000, 1)}
+    with _lock:
+        _state.update(status="ready", ms=round((time.perf_counter() - started) * 1000, 1))
+    logger.info(f"Warm-up finished in {_state['ms']}ms: {_state['steps']}")
+    return get_state()
+
+
+def get_state() -> dict:
+    with _lock:
+        return {**_state, "steps": dict(_state["steps"])}
+
+
+def is_ready() -> bool:
+    return get_state()["status"] == "ready"
@@ -1,7 +1,8 @@
 class MergeRequestReviewEntity:
     def __init__(self, project_name: str, author: str, source_branch: str, target_branch: str, updated_at: int,
                  commits: list, score: float, url: str, review_result: str, url_slug: str, webhook_data: dict,
-                 additions: int, deletions: int, last_commit_id: str):
+                 additions: int, deletions: int, last_commit_id: str, llm_model: str = '', input_tokens: int = 0,
+                 output_tokens: int = 0, cached_tokens: int = 0, llm_latency_ms: int = 0):
         self.project_name = project_name
         self.author = author
         self.source_branch = source_branch
@@ -16,6 +17,12 @@ class MergeRequestReviewEntity:
         self.additions = additions
         self.deletions = deletions
         self.last_commit_id = last_commit_id
+        # 大模型实际用量（供应商返回的 token 数与调用耗时，按本次评审汇总）
+        self.llm_model = llm_model
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+        self.cached_tokens = cached_tokens
+        self.llm_latency_ms = llm_latency_ms
 
     @property
     def commit_messages(self):
@@ -25,7 +32,9 @@ class MergeRequestReviewEntity:
 
 class PushReviewEntity:
     def __init__(self, project_name: str, author: str, branch: str, updated_at: int, commits: list, score: float,
-                 review_result: str, url_slug: str, webhook_data: dict, additions: int, deletions: int):
+                 review_result: str, url_slug: str, webhook_data: dict, additions: int, deletions: int,
+                 llm_model: str = '', input_tokens: int = 0, output_tokens: int = 0, cached_tokens: int = 0,
+                 llm_latency_ms: int = 0):
         self.project_name = project_name
         self.author = author
         self.branch = branch
@@ -37,6 +46,12 @@ class PushReviewEntity:
         self.webhook_data = webhook_data
         self.additions = additions
         self.deletions = deletions
+        # 大模型实际用量（供应商返回的 token 数与调用耗时，按本次评审汇总）
+        self.llm_model = llm_model
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+        self.cached_tokens = cached_tokens
+        self.llm_latency_ms = llm_latency_ms
 
     @property
     def commit_messages(self):
@@ -0,0 +1,103 @@
+"""Static capability registry per LLM provider and model.
+
+Callers use this to decide how to talk to a model: native tool use or the
+JSON-in-text fallback, whether parallel tool calls are worth asking for, how
+large the conversation may grow, etc. Looking it up is free, unlike probing
+the provider with a live request.
+
+Entries can be overridden (e.g. for self-hosted Ollama models that do support
+tools) with ``LLM_CAPABILITY_OVERRIDES``, a JSON object keyed by ``provider``
+or ``provider:model``::
+
+    {"ollama": {"max_context": 32768}, "ollama:qwen2.5-coder:32b": {"tools": true}}
+"""
+import json
+import os
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from typing import Dict, Optional
+
+from biz.utils.log import logger
+
+
+@dataclass(frozen=True)
+class ModelCapabilities:
+    tools: bool = False
+    parallel_tool_calls: bool = False
+    prompt_caching: bool = False
+    streaming: bool = False
+    # Context window in tokens; None when unknown.
+    max_context: Optional[int] = None
+
+
+PROVIDER_CAPABILITIES: Dict[str, ModelCapabilities] = {
+    "openai": ModelCapabilities(tools=True, parallel_tool_calls=True, prompt_caching=True, streaming=True,
+                                max_context=128_000),
+    "anthropic": ModelCapabilities(tools=True, parallel_tool_calls=True, prompt_caching=True, streaming=True,
+                                   max_context=200_000),
+    "deepseek": ModelCapabilities(tools=True, parallel_tool_calls=True, prompt_caching=True, streaming=True,
+                                  max_context=64_000),
+    "qwen": ModelCapabilities(tools=True, parallel_tool_calls=True, streaming=True, max_context=128_000),
+    # The ZhipuAI and Ollama clients don't implement chat_with_tools.
+    "zhipuai": ModelCapabilities(streaming=True, max_context=128_000),
+    "ollama": ModelCapabilities(streaming=True, max_context=8_192),
+}
+
+# Per-model differences from the provider entry, matched by model name prefix
+# (longest prefix wins).
+MODEL_CAPABILITIES: Dict[str, Dict[str, Dict]] = {
+    "openai": {
+        "gpt-4.1": {"max_context": 1_000_000},
+        "o1-mini": {"tools": False, "parallel_tool_calls": False},
+    },
+    "deepseek": {
+        "deepseek-reasoner": {"tools": False, "parallel_tool_calls": False},
+    },
+    "qwen": {
+        "qwen-long": {"max_context": 1_000_000},
+    },
+}
+
+
+def _overrides() -> Dict[str, Dict]:
+    raw = os.getenv("LLM_CAPABILITY_OVERRIDES", "")
+    if not raw:
+        return {}
+    try:
+        overrides = json.loads(raw)
+    except json.JSONDecodeError as e:
+        logger.warning("invalid LLM_CAPABILITY_OVERRIDES, ignored: %s", e)
+        return {}
+    return overrides if isinstance(overrides, dict) else {}
+
+
+@lru_cache(maxsize=None)
+def get_capabilities(provider: str, model: Optional[str] = None) -> ModelCapabilities:
+    """Capabilities of `model` on `provider`; unknown providers get an all-off entry."""
+    capabilities = PROVIDER_CAPABILITIES.get(provider, ModelCapabilities())
+    if model:
+        prefixes = [p for p in MODEL_CAPABILITIES.get(provider, {}) if model.startswith(p)]
+        if prefixes:
+            capabilities = replace(capabilities, **MODEL_CAPABILITIES[provider][max(prefixes, key=len)])
+    overrides = _overrides()
+    for key in (provider, f"{provider}:{model}" if model else None):
+        if key and isinstance(overrides.get(key), dict):
+            fields = {k: v for k, v in overrides[key].items() if k in ModelCapabilities.__dataclass_fields__}
+            capabilities = replace(capabilities, **fields)
+    return capabilities
+
+
+def resolve_capabilities(client, model: Optional[str] = None) -> ModelCapabilities:
+    """Capabilities for a client object.
+
+    ``BaseClient`` subclasses answer from the registry. Other objects (test
+    doubles, ad-hoc wrappers) are treated as tool-capable if they define a
+    ``chat_with_tools`` that isn't the ``BaseClient`` stub; nothing else is
+    assumed about them.
+    """
+    from biz.llm.client.base import BaseClient
+
+    if isinstance(client, BaseClient):
+        return client.capabilities(model)
+    method = getattr(type(client), "chat_with_tools", None)
+    return ModelCapabilities(tools=callable(method) and method is not BaseClient.chat_with_tools)
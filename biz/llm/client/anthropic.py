@@ -1,6 +1,7 @@
 import json
 import os
-from typing import Dict, List, Optional
+from dataclasses import asdict
+from typing import Callable, Dict, List, Optional
 
 import httpx
 from anthropic import Anthropic
@@ -10,6 +11,8 @@ from biz.llm.types import NotGiven, NOT_GIVEN
 
 
 class AnthropicClient(BaseClient):
+    provider = "anthropic"
+
     def __init__(self, api_key: str = None):
         self.api_key = api_key or os.getenv("ANTHROPIC_API_KEY")
         self.base_url = os.getenv("ANTHROPIC_API_BASE_URL", None)
@@ -18,72 +21,187 @@ class AnthropicClient(BaseClient):
 
         # Create a custom httpx client to avoid proxy-related issues
         # This prevents the 'proxies' parameter error when environment proxy variables are set
-        http_client = httpx.Client()
+        http_client = httpx.Client(timeout=self._request_timeout())
 
         # Initialize Anthropic client with custom http_client
         if self.base_url:
-            self.client = Anthropic(api_key=self.api_key, base_url=self.base_url, http_client=http_client)
+            self.client = Anthropic(api_key=self.api_key, base_url=self.base_url, http_client=http_client,
+                                    max_retries=0)
         else:
-            self.client = Anthropic(api_key=self.api_key, http_client=http_client)
+            self.client = Anthropic(api_key=self.api_key, http_client=http_client, max_retries=0)
 
         self.default_model = os.getenv("ANTHROPIC_API_MODEL", "claude-sonnet-4-5-20250929")
 
+    @staticmethod
+    def _to_blocks(content) -> List[Dict]:
+        if isinstance(content, str):
+            return [{"type": "text", "text": content}] if content else []
+        return [dict(block) for block in content or []]
+
+    @classmethod
+    def _convert_message(cls, msg: Dict) -> Dict:
+        """Convert one OpenAI-style message to a Messages API message.
+
+        Assistant ``tool_calls`` become ``tool_use`` blocks and ``tool`` role
+        messages become user ``tool_result`` blocks; plain messages are kept
+        as-is so their bytes match the cached prefix.
+        """
+        role = msg.get("role")
+        content = msg.get("content")
+        if role == "tool":
+            return {"role": "user", "content": [{
+                "type": "tool_result",
+                "tool_use_id": msg.get("tool_call_id"),
+                "content": content or "",
+            }]}
+        if role == "assistant" and msg.get("tool_calls"):
+            blocks = cls._to_blocks(content)
+            for tc in msg["tool_calls"]:
+                function = tc.get("function") or {}
+                arguments = function.get("arguments") or "{}"
+                try:
+                    tool_input = json.loads(arguments) if isinstance(arguments, str) else dict(arguments)
+                except json.JSONDecodeError:
+                    tool_input = {}
+                blocks.append({"type": "tool_use", "id": tc.get("id"),
+                               "name": function.get("name"), "input": tool_input})
+            return {"role": "assistant", "content": blocks}
+        return {"role": role, "content": content}
+
+    @staticmethod
+    def _convert_tools(tools: List[Dict]) -> List[Dict]:
+        """Convert OpenAI function schemas to Messages API tool definitions."""
+        converted = []
+        for tool in tools:
+            function = tool.get("function", tool)
+            converted.append({
+                "name": function["name"],
+                "description": function.get("description", ""),
+                "input_schema": function.get("parameters") or {"type": "object", "properties": {}},
+            })
+        return converted
+
+    def _build_request(self, messages: List[Dict], cache_conversation: bool) -> Dict:
+        """Convert OpenAI-style messages to Messages API ``system``/``messages`` kwargs.
+
+        With prompt caching enabled (``ANTHROPIC_PROMPT_CACHE``, default on),
+        the system prompt is marked as a cache breakpoint so the static review
+        instructions are billed at the cache-read rate on every review. When
+        `cache_conversation` is set (multi-round agent runs) the last message
+        is marked too, so each round reads the previous rounds' prefix from
+        the cache instead of re-processing it.
+
+        Consecutive messages with the same role are merged, since the API
+        requires alternating turns: the results of parallel tool calls end up
+        in a single user message, as the API expects.
+        """
+        cache_enabled = os.getenv("ANTHROPIC_PROMPT_CACHE", "1") == "1"
+        system_blocks: List[Dict] = []
+        anthropic_messages: List[Dict] = []
+
+        for msg in messages:
+            if msg.get("role") == "system":
+                # Anthropic uses a separate system parameter
+                system_blocks.append({"type": "text", "text": msg.get("content")})
+                continue
+            converted = self._convert_message(msg)
+            if anthropic_messages and anthropic_messages[-1]["role"] == converted["role"]:
+                previous = anthropic_messages[-1]
+                anthropic_messages[-1] = {
+                    "role": previous["role"],
+                    "content": self._to_blocks(previous["content"]) + self._to_blocks(converted["content"]),
+                }
+            else:
+                anthropic_messages.append(converted)
+
+        if cache_enabled and system_blocks:
+            system_blocks[-1]["cache_control"] = {"type": "ephemeral"}
+        if cache_enabled and cache_conversation and anthropic_messages:
+            last = anthropic_messages[-1]
+            content = self._to_blocks(last["content"])
+            if content:
+                content[-1]["cache_control"] = {"type": "ephemeral"}
+                anthropic_messages[-1] = {**last, "content": content}
+
+        request: Dict = {"messages": anthropic_messages}
+        if system_blocks:
+            request["system"] = system_blocks
+        return request
+
     def completions(self,
                     messages: List[Dict[str, str]],
                     model: Optional[str] | NotGiven = NOT_GIVEN,
                     ) -> str:
         model = model or self.default_model
 
-        # Convert messages to Anthropic format
-        # Anthropic requires separating system messages from user/assistant messages
-        system_message = None
-        anthropic_messages = []
-
-        for msg in messages:
-            role = msg.get("role")
-            content = msg.get("content")
-
-            if role == "system":
-                # Anthropic uses a separate system parameter
-                system_message = content
-            else:
-                # Keep user and assistant messages
-                anthropic_messages.append({
-                    "role": role,
-                    "content": content
-                })
+        # Anthropic requires separating system messages from user/assistant messages.
+        # A conversation that already has assistant turns is an agent loop
+        # whose prefix will be resent next round, so cache it as well.
+        request = self._build_request(
+            messages, cache_conversation=any(m.get("role") == "assistant" for m in messages))
 
         # Create completion with Anthropic API
-        response = self.client.messages.create(
+        response = self._call_with_resilience(lambda timeout: self.client.messages.create(
             model = model,
-            system = system_message,
-            messages = anthropic_messages,
             max_tokens = int(os.getenv("ANTHROPIC_MAX_TOKENS", "4096")),
-        )
+            timeout = timeout,
+            **request,
+        ))
 
         # Extract text from response
         return response.content[0].text
 
+    def stream_completions(self,
+                           messages: List[Dict[str, str]],
+                           model: Optional[str] | NotGiven = NOT_GIVEN,
+                           on_progress: Optional[Callable[[str], None]] = None,
+                           ) -> str:
+        model = model or self.default_model
+        request = self._build_request(
+            messages, cache_conversation=any(m.get("role") == "assistant" for m in messages))
+
+        def attempt(timeout):
+            with self.client.messages.stream(
+                model=model,
+                max_tokens=int(os.getenv("ANTHROPIC_MAX_TOKENS", "4096")),
+                timeout=timeout,
+                **request,
+            ) as stream:
+                text, _ = self._consume_stream(stream.text_stream, lambda delta: delta, on_progress)
+                # The final message carries the usage collected from the stream events.
+                return text, stream.get_final_message()
+
+        text, _ = self._call_with_resilience(attempt, usage_source=lambda result: result[1])
+        return text
+
     def chat_with_tools(self,
                         messages: List[Dict],
                         tools: Optional[List[Dict]] = None,
                         model: Optional[str] | NotGiven = NOT_GIVEN,
                         ) -> Dict:
         model = model or self.default_model
-        kwargs = {"model": model, "messages": messages}
+        # Agent loops resend the whole conversation each round, so always cache it.
+        request = self._build_request(messages, cache_conversation=True)
         if tools:
-            kwargs["tools"] = tools
-        completion = self.client.chat.completions.create(**kwargs)
-        msg = completion.choices[0].message
+            request["tools"] = self._convert_tools(tools)
+        response = self._call_with_resilience(lambda timeout: self.client.messages.create(
+            model=model,
+            max_tokens=int(os.getenv("ANTHROPIC_MAX_TOKENS", "4096")),
+            timeout=timeout,
+            **request,
+        ))
+
+        # A single response may contain several tool_use blocks (parallel tool calls).
+        texts: List[str] = []
         tool_calls: List[Dict] = []
-        for tc in (msg.tool_calls or []):
-            try:
-                args = json.loads(tc.function.arguments or "{}")
-            except json.JSONDecodeError:
-                args = {}
-            tool_calls.append({"id": tc.id, "name": tc.function.name, "arguments": args})
+        for block in response.content:
+            if block.type == "text":
+                texts.append(block.text)
+            elif block.type == "tool_use":
+                tool_calls.append({"id": block.id, "name": block.name, "arguments": dict(block.input or {})})
         return {
-            "content": msg.content,
+            "content": "\n".join(texts) or None,
             "tool_calls": tool_calls,
-            "raw": completion,
+            "raw": response,
+            "usage": asdict(self.last_usage),
         }
@@ -1,14 +1,87 @@
 import re
+import time
 from abc import abstractmethod
-from typing import List, Dict, Optional
+from typing import Any, Callable, Iterable, List, Dict, Optional, Tuple, TypeVar
 
+from biz.llm.capabilities import ModelCapabilities, get_capabilities
+from biz.llm.resilience import RetryPolicy, call_with_resilience
 from biz.llm.types import NotGiven, NOT_GIVEN
+from biz.llm.usage import LLMUsage, extract_usage, record_usage
 from biz.utils.log import logger
 
 
+T = TypeVar("T")
+
+
 class BaseClient:
     """ Base class for chat models client. """
 
+    # Provider key (as used in LLM_PROVIDER); also keys the circuit breaker.
+    provider: str = "unknown"
+    # Usage of the most recent successful call, see ``biz.llm.usage``.
+    last_usage: Optional[LLMUsage] = None
+
+    @staticmethod
+    def _request_timeout() -> float:
+        """Per-attempt HTTP timeout for SDK clients, see ``LLM_REQUEST_TIMEOUT``."""
+        return RetryPolicy.from_env().request_timeout
+
+    def _call_with_resilience(self, func: Callable[[float], T],
+                              usage_source: Optional[Callable[[T], Any]] = None) -> T:
+        """Run one provider request with timeout, retries and circuit breaking.
+
+        `func` receives the timeout in seconds for the current attempt and
+        should pass it through to the SDK call. SDK-level retries are
+        disabled in the clients so retry policy lives only here.
+
+        The provider-reported token usage and the call latency (including
+        retries) are stored in ``last_usage`` and reported to any active
+        ``collect_usage()`` block. When `func` doesn't return the provider
+        response itself (streaming), `usage_source` picks the object that
+        carries the usage out of its result.
+        """
+        start = time.monotonic()
+        response = call_with_resilience(self.provider, func)
+        usage = extract_usage(usage_source(response) if usage_source else response)
+        usage.latency_ms = int((time.monotonic() - start) * 1000)
+        self.last_usage = usage
+        record_usage(usage)
+        return response
+
+    @staticmethod
+    def _consume_stream(chunks: Iterable[Any], delta_of: Callable[[Any], Optional[str]],
+                        on_progress: Optional[Callable[[str], None]]) -> Tuple[str, Any]:
+        """Accumulate the text deltas of a streamed reply.
+
+        `on_progress` gets the text received so far after every non-empty
+        delta. Returns the full text and the chunk carrying the usage (the
+        last one that has a ``usage``, else the last chunk).
+        """
+        parts: List[str] = []
+        final = None
+        for chunk in chunks:
+            if getattr(chunk, "usage", None) is not None or getattr(final, "usage", None) is None:
+                final = chunk
+            delta = delta_of(chunk)
+            if delta:
+                parts.append(delta)
+                if on_progress:
+                    on_progress("".join(parts))
+        return "".join(parts), final
+
+    def capabilities(self, model: Optional[str] = None) -> ModelCapabilities:
+        """Static capabilities of `model` (the default model when omitted), see ``biz.llm.capabilities``."""
+        return get_capabilities(self.provider, model or getattr(self, "default_model", None))
+
+    @staticmethod
+    def describe_error(e: Exception) -> Optional[str]:
+        """Review text to post when a call fails with `e`, or None to let the error propagate.
+
+        Clients raise on failure so routing and the circuit breaker see it;
+        ``CodeReviewer`` turns the error into text only at the very end.
+        """
+        return None
+
     def ping(self) -> bool:
         """Ping the model to check connectivity."""
         try:
@@ -27,6 +100,25 @@ class BaseClient:
         """Chat with the model.
         """
 
+    def stream_completions(self,
+                           messages: List[Dict[str, str]],
+                           model: Optional[str] | NotGiven = NOT_GIVEN,
+                           on_progress: Optional[Callable[[str], None]] = None,
+                           ) -> str:
+        """Chat with the model, streaming the reply.
+
+        `on_progress` is called with the reply text received so far as chunks
+        arrive; the complete reply is returned as with ``completions()``. If a
+        request is retried, the text restarts from the beginning.
+
+        Default implementation doesn't stream: it calls ``completions()`` and
+        reports the whole reply once.
+        """
+        result = self.completions(messages=messages, model=model)
+        if on_progress and result:
+            on_progress(result)
+        return result
+
     def chat_with_tools(self,
                         messages: List[Dict],
                         tools: Optional[List[Dict]] = None,
@@ -48,6 +140,7 @@ class BaseClient:
               - "content": Optional[str]   — assistant text (may be None)
               - "tool_calls": List[Dict]   — each {"id", "name", "arguments": dict}
               - "raw": Any                 — provider-specific response
+              - "usage": Dict              — ``LLMUsage`` fields for this call
         """
         raise NotImplementedError(
             f"{type(self).__name__} does not implement native tool-use; "
@@ -1,6 +1,7 @@
 import json
 import os
-from typing import Dict, List, Optional
+from dataclasses import asdict
+from typing import Callable, Dict, List, Optional
 
 from openai import OpenAI
 
@@ -10,43 +11,64 @@ from biz.utils.log import logger
 
 
 class DeepSeekClient(BaseClient):
+    provider = "deepseek"
+
     def __init__(self, api_key: str = None):
         self.api_key = api_key or os.getenv("DEEPSEEK_API_KEY")
         self.base_url = os.getenv("DEEPSEEK_API_BASE_URL", "https://api.deepseek.com")
         if not self.api_key:
             raise ValueError("API key is required. Please provide it or set it in the environment variables.")
 
-        self.client = OpenAI(api_key=self.api_key, base_url=self.base_url) # DeepSeek supports OpenAI API SDK
+        # DeepSeek supports OpenAI API SDK
+        self.client = OpenAI(api_key=self.api_key, base_url=self.base_url,
+                             timeout=self._request_timeout(), max_retries=0)
         self.default_model = os.getenv("DEEPSEEK_API_MODEL", "deepseek-chat")
 
     def completions(self,
                     messages: List[Dict[str, str]],
                     model: Optional[str] | NotGiven = NOT_GIVEN,
                     ) -> str:
-        try:
-            model = model or self.default_model
-            logger.debug(f"Sending request to DeepSeek API. Model: {model}, Messages: {messages}")
-            
-            completion = self.client.chat.completions.create(
+        model = model or self.default_model
+        logger.debug(f"Sending request to DeepSeek API. Model: {model}, Messages: {messages}")
+        completion = self._call_with_resilience(lambda timeout: self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            timeout=timeout,
+        ))
+        if not completion or not completion.choices:
+            raise RuntimeError("Empty response from DeepSeek API")
+        return completion.choices[0].message.content
+
+    def stream_completions(self,
+                           messages: List[Dict[str, str]],
+                           model: Optional[str] | NotGiven = NOT_GIVEN,
+                           on_progress: Optional[Callable[[str], None]] = None,
+                           ) -> str:
+        model = model or self.default_model
+        text, _ = self._call_with_resilience(lambda timeout: self._consume_stream(
+            self.client.chat.completions.create(
                 model=model,
-                messages=messages
-            )
-            
-            if not completion or not completion.choices:
-                logger.error("Empty response from DeepSeek API")
-                return "AI服务返回为空，请稍后重试"
-                
-            return completion.choices[0].message.content
-            
-        except Exception as e:
-            logger.error(f"DeepSeek API error: {str(e)}")
-            # 检查是否是认证错误
-            if "401" in str(e):
-                return "DeepSeek API认证失败，请检查API密钥是否正确"
-            elif "404" in str(e):
-                return "DeepSeek API接口未找到，请检查API地址是否正确"
-            else:
-                return f"调用DeepSeek API时出错: {str(e)}"
+                messages=messages,
+                stream=True,
+                stream_options={"include_usage": True},
+                timeout=timeout,
+            ),
+            lambda chunk: chunk.choices[0].delta.content if chunk.choices else None,
+            on_progress,
+        ), usage_source=lambda result: result[1])
+        if not text:
+            raise RuntimeError("Empty response from DeepSeek API")
+        return text
+
+    @staticmethod
+    def describe_error(e: Exception) -> str:
+        # 检查是否是认证错误
+        if "401" in str(e):
+            return "DeepSeek API认证失败，请检查API密钥是否正确"
+        elif "404" in str(e):
+            return "DeepSeek API接口未找到，请检查API地址是否正确"
+        else:
+            return f"调用DeepSeek API时出错: {str(e)}"
 
     def chat_with_tools(self,
                         messages: List[Dict],
@@ -57,7 +79,8 @@ class DeepSeekClient(BaseClient):
         kwargs = {"model": model, "messages": messages}
         if tools:
             kwargs["tools"] = tools
-        completion = self.client.chat.completions.create(**kwargs)
+        completion = self._call_with_resilience(
+            lambda timeout: self.client.chat.completions.create(timeout=timeout, **kwargs))
         msg = completion.choices[0].message
         tool_calls: List[Dict] = []
         for tc in (msg.tool_calls or []):
@@ -70,4 +93,5 @@ class DeepSeekClient(BaseClient):
             "content": msg.content,
             "tool_calls": tool_calls,
             "raw": completion,
+            "usage": asdict(self.last_usage),
         }
@@ -1,6 +1,6 @@
 import os
 import re
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 
 from ollama import ChatResponse
 from ollama import Client
@@ -10,11 +10,15 @@ from biz.llm.types import NotGiven, NOT_GIVEN
 
 
 class OllamaClient(BaseClient):
+    provider = "ollama"
+
     def __init__(self, api_key: str = None):
         self.default_model = self.default_model = os.getenv("OLLAMA_API_MODEL", "deepseek-r1-8k:14b")
         self.base_url = os.getenv("OLLAMA_API_BASE_URL", "http://127.0.0.1:11434")
+        # ollama's Client has no per-request timeout, so the attempt timeout is fixed here.
         self.client = Client(
             host=self.base_url,
+            timeout=self._request_timeout(),
         )
 
     def _extract_content(self, content: str) -> str:
@@ -40,6 +44,28 @@ class OllamaClient(BaseClient):
                     messages: List[Dict[str, str]],
                     model: Optional[str] | NotGiven = NOT_GIVEN,
                     ) -> str:
-        response: ChatResponse = self.client.chat(model or self.default_model, messages)
+        response: ChatResponse = self._call_with_resilience(
+            lambda timeout: self.client.chat(model or self.default_model, messages))
         content = response['message']['content']
         return self._extract_content(content)
+
+    def stream_completions(self,
+                           messages: List[Dict[str, str]],
+                           model: Optional[str] | NotGiven = NOT_GIVEN,
+                           on_progress: Optional[Callable[[str], None]] = None,
+                           ) -> str:
+        def report(text: str) -> None:
+            # 思考链输出完成前不展示进度
+            if "<think>" in text and "</think>" not in text:
+                return
+            visible = self._extract_content(text)
+            if visible:
+                on_progress(visible)
+
+        # The final chunk (done=True) carries the token counts.
+        text, _ = self._call_with_resilience(lambda timeout: self._consume_stream(
+            self.client.chat(model or self.default_model, messages, stream=True),
+            lambda chunk: chunk['message']['content'],
+            report if on_progress else None,
+        ), usage_source=lambda result: result[1])
+        return self._extract_content(text)
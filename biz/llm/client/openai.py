@@ -1,6 +1,7 @@
 import json
 import os
-from typing import Dict, List, Optional
+from dataclasses import asdict
+from typing import Callable, Dict, List, Optional
 
 from openai import OpenAI
 
@@ -9,13 +10,16 @@ from biz.llm.types import NotGiven, NOT_GIVEN
 
 
 class OpenAIClient(BaseClient):
+    provider = "openai"
+
     def __init__(self, api_key: str = None):
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         self.base_url = os.getenv("OPENAI_API_BASE_URL", "https://api.openai.com")
         if not self.api_key:
             raise ValueError("API key is required. Please provide it or set it in the environment variables.")
 
-        self.client = OpenAI(api_key=self.api_key, base_url=self.base_url)
+        self.client = OpenAI(api_key=self.api_key, base_url=self.base_url,
+                             timeout=self._request_timeout(), max_retries=0)
         self.default_model = os.getenv("OPENAI_API_MODEL", "gpt-4o-mini")
 
     def completions(self,
@@ -23,12 +27,32 @@ class OpenAIClient(BaseClient):
                     model: Optional[str] | NotGiven = NOT_GIVEN,
                     ) -> str:
         model = model or self.default_model
-        completion = self.client.chat.completions.create(
+        completion = self._call_with_resilience(lambda timeout: self.client.chat.completions.create(
             model=model,
             messages=messages,
-        )
+            timeout=timeout,
+        ))
         return completion.choices[0].message.content
 
+    def stream_completions(self,
+                           messages: List[Dict[str, str]],
+                           model: Optional[str] | NotGiven = NOT_GIVEN,
+                           on_progress: Optional[Callable[[str], None]] = None,
+                           ) -> str:
+        model = model or self.default_model
+        text, _ = self._call_with_resilience(lambda timeout: self._consume_stream(
+            self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                stream=True,
+                stream_options={"include_usage": True},
+                timeout=timeout,
+            ),
+            lambda chunk: chunk.choices[0].delta.content if chunk.choices else None,
+            on_progress,
+        ), usage_source=lambda result: result[1])
+        return text
+
     def chat_with_tools(self,
                         messages: List[Dict],
                         tools: Optional[List[Dict]] = None,
@@ -38,7 +62,8 @@ class OpenAIClient(BaseClient):
         kwargs = {"model": model, "messages": messages}
         if tools:
             kwargs["tools"] = tools
-        completion = self.client.chat.completions.create(**kwargs)
+        completion = self._call_with_resilience(
+            lambda timeout: self.client.chat.completions.create(timeout=timeout, **kwargs))
         msg = completion.choices[0].message
         tool_calls: List[Dict] = []
         for tc in (msg.tool_calls or []):
@@ -51,4 +76,5 @@ class OpenAIClient(BaseClient):
             "content": msg.content,
             "tool_calls": tool_calls,
             "raw": completion,
+            "usage": asdict(self.last_usage),
         }
@@ -1,6 +1,7 @@
 import json
 import os
-from typing import Dict, List, Optional
+from dataclasses import asdict
+from typing import Callable, Dict, List, Optional
 
 from openai import OpenAI
 
@@ -9,13 +10,16 @@ from biz.llm.types import NotGiven, NOT_GIVEN
 
 
 class QwenClient(BaseClient):
+    provider = "qwen"
+
     def __init__(self, api_key: str = None):
         self.api_key = api_key or os.getenv("QWEN_API_KEY")
         self.base_url = os.getenv("QWEN_API_BASE_URL", "https://dashscope.aliyuncs.com/compatible-mode/v1")
         if not self.api_key:
             raise ValueError("API key is required. Please provide it or set it in the environment variables.")
 
-        self.client = OpenAI(api_key=self.api_key, base_url=self.base_url)
+        self.client = OpenAI(api_key=self.api_key, base_url=self.base_url,
+                             timeout=self._request_timeout(), max_retries=0)
         self.default_model = os.getenv("QWEN_API_MODEL", "qwen-coder-plus")
         self.extra_body={"enable_thinking": False}
 
@@ -24,13 +28,34 @@ class QwenClient(BaseClient):
                     model: Optional[str] | NotGiven = NOT_GIVEN,
                     ) -> str:
         model = model or self.default_model
-        completion = self.client.chat.completions.create(
+        completion = self._call_with_resilience(lambda timeout: self.client.chat.completions.create(
             model=model,
             messages=messages,
             extra_body=self.extra_body,
-        )
+            timeout=timeout,
+        ))
         return completion.choices[0].message.content
 
+    def stream_completions(self,
+                           messages: List[Dict[str, str]],
+                           model: Optional[str] | NotGiven = NOT_GIVEN,
+                           on_progress: Optional[Callable[[str], None]] = None,
+                           ) -> str:
+        model = model or self.default_model
+        text, _ = self._call_with_resilience(lambda timeout: self._consume_stream(
+            self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                extra_body=self.extra_body,
+                stream=True,
+                stream_options={"include_usage": True},
+                timeout=timeout,
+            ),
+            lambda chunk: chunk.choices[0].delta.content if chunk.choices else None,
+            on_progress,
+        ), usage_source=lambda result: result[1])
+        return text
+
     def chat_with_tools(self,
                         messages: List[Dict],
                         tools: Optional[List[Dict]] = None,
@@ -40,7 +65,8 @@ class QwenClient(BaseClient):
         kwargs = {"model": model, "messages": messages}
         if tools:
             kwargs["tools"] = tools
-        completion = self.client.chat.completions.create(**kwargs)
+        completion = self._call_with_resilience(
+            lambda timeout: self.client.chat.completions.create(timeout=timeout, **kwargs))
         msg = completion.choices[0].message
         tool_calls: List[Dict] = []
         for tc in (msg.tool_calls or []):
@@ -53,4 +79,5 @@ class QwenClient(BaseClient):
             "content": msg.content,
             "tool_calls": tool_calls,
             "raw": completion,
+            "usage": asdict(self.last_usage),
         }
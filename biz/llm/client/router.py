@@ -0,0 +1,166 @@
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout, as_completed
+from typing import Any, Callable, Dict, List, Optional
+
+from biz.llm.capabilities import ModelCapabilities
+from biz.llm.client.base import BaseClient
+from biz.llm.health import ProviderHealth
+from biz.llm.types import NotGiven, NOT_GIVEN
+from biz.utils.log import logger
+
+
+class RoutingClient(BaseClient):
+    """Route calls across several configured providers.
+
+    - Providers are tried in configured order; ones with a high recent error
+      rate (see ``ProviderHealth.rank``) are moved to the back.
+    - Any exception from a provider fails over to the next one.
+    - With hedging enabled, if the first provider hasn't answered within its
+      recent p95 latency (clamped to ``[hedge_min_delay, hedge_max_delay]``),
+      the same request is also sent to the second provider and whichever
+      succeeds first wins.
+
+    An explicit ``model`` argument only applies to the primary (first
+    configured) provider; model names are provider-specific, so fallbacks
+    always use their own default model.
+    """
+
+    def __init__(
+        self,
+        clients: Dict[str, BaseClient],
+        *,
+        health: ProviderHealth | None = None,
+        hedge_enabled: bool = False,
+        hedge_min_delay: float = 2.0,
+        hedge_max_delay: float = 60.0,
+    ) -> None:
+        if not clients:
+            raise ValueError("RoutingClient requires at least one provider client")
+        self.clients = dict(clients)
+        self.providers: List[str] = list(self.clients)
+        self.primary = self.providers[0]
+        self.default_model = getattr(self.clients[self.primary], "default_model", None)
+        self.health = health or ProviderHealth()
+        self.hedge_enabled = hedge_enabled
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_max_delay = hedge_max_delay
+
+    def completions(self,
+                    messages: List[Dict[str, str]],
+                    model: Optional[str] | NotGiven = NOT_GIVEN,
+                    ) -> str:
+        return self._route("completions", {"messages": messages}, model)
+
+    def stream_completions(self,
+                           messages: List[Dict[str, str]],
+                           model: Optional[str] | NotGiven = NOT_GIVEN,
+                           on_progress: Optional[Callable[[str], None]] = None,
+                           ) -> str:
+        # Never hedged: two concurrent streams would interleave their progress.
+        return self._route("stream_completions", {"messages": messages, "on_progress": on_progress}, model,
+                           hedge=False)
+
+    def chat_with_tools(self,
+                        messages: List[Dict],
+                        tools: Optional[List[Dict]] = None,
+                        model: Optional[str] | NotGiven = NOT_GIVEN,
+                        ) -> Dict:
+        return self._route("chat_with_tools", {"messages": messages, "tools": tools}, model)
+
+    def capabilities(self, model: Optional[str] = None) -> ModelCapabilities:
+        """Capabilities any routed call can rely on.
+
+        Tool use is available if any provider supports it (the others are
+        skipped for ``chat_with_tools``); the remaining flags and the context
+        window are the most conservative across the providers that may serve
+        the call.
+        """
+        per_provider = [client.capabilities(model if provider == self.primary else None)
+                        for provider, client in self.clients.items()]
+        tool_capable = [c for c in per_provider if c.tools] or per_provider
+        contexts = [c.max_context for c in tool_capable if c.max_context]
+        return ModelCapabilities(
+            tools=any(c.tools for c in per_provider),
+            parallel_tool_calls=all(c.parallel_tool_calls for c in tool_capable),
+            prompt_caching=all(c.prompt_caching for c in per_provider),
+            streaming=all(c.streaming for c in per_provider),
+            max_context=min(contexts) if contexts else None,
+        )
+
+    def describe_error(self, e: Exception) -> Optional[str]:
+        return self.clients[self.primary].describe_error(e)
+
+    # ---- internals ---------------------------------------------------------
+
+    def _call(self, provider: str, method: str, kwargs: Dict[str, Any], model) -> Any:
+        call_kwargs = dict(kwargs)
+        if model and provider == self.primary:
+            call_kwargs["model"] = model
+        start = time.monotonic()
+        try:
+            result = getattr(self.clients[provider], method)(**call_kwargs)
+        except NotImplementedError:
+            raise
+        except Exception:
+            self.health.record(provider, time.monotonic() - start, ok=False)
+            raise
+        self.health.record(provider, time.monotonic() - start, ok=True)
+        return result
+
+    def _hedge_delay(self, provider: str) -> float:
+        p95 = self.health.snapshot(provider)["p95"]
+        if p95 is None:
+            return self.hedge_max_delay
+        return min(max(p95, self.hedge_min_delay), self.hedge_max_delay)
+
+    def _hedged(self, primary: str, secondary: str, method: str, kwargs: Dict[str, Any], model,
+                tried: List[str]) -> Any:
+        delay = self._hedge_delay(primary)
+        pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="llm-hedge")
+        try:
+            tried.append(primary)
+            first = pool.submit(contextvars.copy_context().run, self._call, primary, method, kwargs, model)
+            try:
+                return first.result(timeout=delay)
+            except FuturesTimeout:
+                logger.info("LLM provider %s slower than %.1fs, hedging to %s", primary, delay, secondary)
+            tried.append(secondary)
+            second = pool.submit(contextvars.copy_context().run, self._call, secondary, method, kwargs, model)
+            last_error: Exception | None = None
+            for future in as_completed([first, second]):
+                try:
+                    return future.result()
+                except Exception as e:
+                    last_error = e
+            raise last_error
+        finally:
+            # Don't wait for the losing request; its result is discarded.
+            pool.shutdown(wait=False)
+
+    def _route(self, method: str, kwargs: Dict[str, Any], model, hedge: bool = True) -> Any:
+        order = self.health.rank(self.providers)
+        tried: List[str] = []
+        errors: List[str] = []
+        if hedge and self.hedge_enabled and len(order) >= 2:
+            try:
+                return self._hedged(order[0], order[1], method, kwargs, model, tried)
+            except NotImplementedError:
+                pass
+            except Exception as e:
+                logger.warning("LLM provider(s) %s failed, failing over: %s", "/".join(tried), e)
+                errors.append(f"{'/'.join(tried)}: {e}")
+        for provider in order:
+            if provider in tried:
+                continue
+            tried.append(provider)
+            try:
+                return self._call(provider, method, kwargs, model)
+            except NotImplementedError:
+                continue
+            except Exception as e:
+                logger.warning("LLM provider %s failed, failing over: %s", provider, e)
+                errors.append(f"{provider}: {e}")
+        if not errors:
+            raise NotImplementedError(f"no configured provider implements {method}")
+        raise RuntimeError(f"all LLM providers failed: {'; '.join(errors)}")
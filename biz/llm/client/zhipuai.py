@@ -1,5 +1,5 @@
 import os
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 
 from zhipuai import ZhipuAI
 
@@ -8,12 +8,14 @@ from biz.llm.types import NotGiven, NOT_GIVEN
 
 
 class ZhipuAIClient(BaseClient):
+    provider = "zhipuai"
+
     def __init__(self, api_key: str = None):
         self.api_key = api_key or os.getenv("ZHIPUAI_API_KEY")
         if not self.api_key:
             raise ValueError("API key is required. Please provide it or set it in the environment variables.")
 
-        self.client = ZhipuAI(api_key=api_key)
+        self.client = ZhipuAI(api_key=self.api_key, timeout=self._request_timeout(), max_retries=0)
         self.default_model = os.getenv("ZHIPUAI_API_MODEL", "GLM-4-Flash")
 
     def completions(self,
@@ -21,8 +23,28 @@ class ZhipuAIClient(BaseClient):
                     model: Optional[str] | NotGiven = NOT_GIVEN,
                     ) -> str:
         model = model or self.default_model
-        completion = self.client.chat.completions.create(
+        completion = self._call_with_resilience(lambda timeout: self.client.chat.completions.create(
             model=model,
             messages=messages,
-        )
+            timeout=timeout,
+        ))
         return completion.choices[0].message.content
+
+    def stream_completions(self,
+                           messages: List[Dict[str, str]],
+                           model: Optional[str] | NotGiven = NOT_GIVEN,
+                           on_progress: Optional[Callable[[str], None]] = None,
+                           ) -> str:
+        model = model or self.default_model
+        # The last chunk of a ZhipuAI stream carries the usage.
+        text, _ = self._call_with_resilience(lambda timeout: self._consume_stream(
+            self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                stream=True,
+                timeout=timeout,
+            ),
+            lambda chunk: chunk.choices[0].delta.content if chunk.choices else None,
+            on_progress,
+        ), usage_source=lambda result: result[1])
+        return text
@@ -6,6 +6,7 @@ from biz.llm.client.deepseek import DeepSeekClient
 from biz.llm.client.ollama_client import OllamaClient
 from biz.llm.client.openai import OpenAIClient
 from biz.llm.client.qwen import QwenClient
+from biz.llm.client.router import RoutingClient
 from biz.llm.client.zhipuai import ZhipuAIClient
 from biz.utils.log import logger
 
@@ -13,7 +14,44 @@ from biz.utils.log import logger
 class Factory:
     @staticmethod
     def getClient(provider: str = None) -> BaseClient:
-        provider = provider or os.getenv("LLM_PROVIDER", "anthropic")
+        """Return the client for `provider` (default ``LLM_PROVIDER``).
+
+        When no explicit provider is requested and ``LLM_FALLBACK_PROVIDERS``
+        is set, a ``RoutingClient`` over ``LLM_PROVIDER`` plus the fallbacks
+        is returned instead.
+        """
+        if provider is None:
+            fallbacks = [p.strip() for p in os.getenv("LLM_FALLBACK_PROVIDERS", "").split(",") if p.strip()]
+            if fallbacks:
+                return Factory.getRoutingClient([os.getenv("LLM_PROVIDER", "anthropic")] + fallbacks)
+        return Factory._create(provider or os.getenv("LLM_PROVIDER", "anthropic"))
+
+    @staticmethod
+    def getRoutingClient(providers: list) -> BaseClient:
+        """Build a failover/hedging client over `providers` (first one is primary).
+
+        Fallback providers that can't be constructed (e.g. missing API key)
+        are skipped with a warning; the primary must construct successfully.
+        """
+        clients = {}
+        for index, name in enumerate(dict.fromkeys(providers)):
+            try:
+                clients[name] = Factory._create(name)
+            except Exception as e:
+                if index == 0:
+                    raise
+                logger.warning(f"Skipping fallback LLM provider {name}: {e}")
+        if len(clients) == 1:
+            return next(iter(clients.values()))
+        return RoutingClient(
+            clients,
+            hedge_enabled=os.getenv("LLM_HEDGE_ENABLED", "0") == "1",
+            hedge_min_delay=float(os.getenv("LLM_HEDGE_MIN_DELAY", "2")),
+            hedge_max_delay=float(os.getenv("LLM_HEDGE_MAX_DELAY", "60")),
+        )
+
+    @staticmethod
+    def _create(provider: str) -> BaseClient:
         chat_model_providers = {
             'anthropic': lambda: AnthropicClient(),
             'zhipuai': lambda: ZhipuAIClient(),
@@ -0,0 +1,86 @@
+"""Rolling per-provider latency / error statistics shared across worker processes."""
+import math
+import os
+import time
+from typing import Dict, List, Optional
+
+from biz.utils.state_store import JsonStateStore
+
+# Samples older than this are ignored when computing statistics.
+DEFAULT_WINDOW_SECONDS = 15 * 60
+# Hard cap on stored samples per provider.
+DEFAULT_MAX_SAMPLES = 200
+
+
+def _percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+class ProviderHealth:
+    """Track recent call latency and outcome per LLM provider.
+
+    State lives in a JSON file (``LLM_HEALTH_FILE``, default
+    ``data/llm_provider_health.json``) so every forked review process sees
+    the same rolling window.
+    """
+
+    def __init__(
+        self,
+        path: str | None = None,
+        *,
+        window_seconds: int = DEFAULT_WINDOW_SECONDS,
+        max_samples: int = DEFAULT_MAX_SAMPLES,
+    ) -> None:
+        self.store = JsonStateStore(path or os.getenv("LLM_HEALTH_FILE", "data/llm_provider_health.json"))
+        self.window_seconds = window_seconds
+        self.max_samples = max_samples
+
+    def record(self, provider: str, latency: float, ok: bool) -> None:
+        """Append one call outcome (latency in seconds) for `provider`."""
+        now = time.time()
+        with self.store.transaction() as state:
+            entry = state.setdefault(provider, {})
+            samples = entry.get("samples", [])
+            samples.append([now, round(latency, 4), 1 if ok else 0])
+            cutoff = now - self.window_seconds
+            entry["samples"] = [s for s in samples if s[0] >= cutoff][-self.max_samples:]
+
+    def snapshot(self, provider: str, state: Dict | None = None) -> Dict:
+        """Return {"samples", "error_rate", "p50", "p95"} for `provider` (latencies in seconds)."""
+        if state is None:
+            state = self.store.read()
+        cutoff = time.time() - self.window_seconds
+        samples = [s for s in state.get(provider, {}).get("samples", []) if s[0] >= cutoff]
+        latencies = [s[1] for s in samples if s[2]]
+        errors = sum(1 for s in samples if not s[2])
+        return {
+            "samples": len(samples),
+            "error_rate": errors / len(samples) if samples else 0.0,
+            "p50": _percentile(latencies, 50),
+            "p95": _percentile(latencies, 95),
+        }
+
+    def snapshots(self, providers: List[str]) -> Dict[str, Dict]:
+        state = self.store.read()
+        return {p: self.snapshot(p, state) for p in providers}
+
+    def rank(self, providers: List[str], *, max_error_rate: float = 0.5, min_samples: int = 3) -> List[str]:
+        """Order `providers` for routing.
+
+        Configured order is kept among healthy providers; providers whose
+        recent error rate exceeds `max_error_rate` (with at least
+        `min_samples` samples) are moved to the end, least-failing first.
+        """
+        stats = self.snapshots(providers)
+
+        def unhealthy(p: str) -> bool:
+            s = stats[p]
+            return s["samples"] >= min_samples and s["error_rate"] > max_error_rate
+
+        healthy = [p for p in providers if not unhealthy(p)]
+        degraded = sorted((p for p in providers if unhealthy(p)), key=lambda p: stats[p]["error_rate"])
+        return healthy + degraded
@@ -0,0 +1,221 @@
+"""Timeouts, retries and circuit breaking shared by all LLM clients.
+
+``BaseClient._call_with_resilience`` wraps one provider request:
+
+- every attempt gets a timeout bounded by the remaining per-call deadline;
+- transient failures (HTTP 429/5xx, timeouts, connection errors) are retried
+  with full-jitter exponential backoff, honouring ``Retry-After``;
+- consecutive transient failures open a per-provider circuit breaker, after
+  which calls fail immediately with ``CircuitOpenError`` until a cooldown
+  has passed and a single trial call succeeds.
+
+Breaker state is shared across forked review processes through a
+``JsonStateStore`` file (``LLM_CIRCUIT_FILE``).
+"""
+import email.utils
+import os
+import random
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, TypeVar
+
+from biz.utils.log import logger
+from biz.utils.state_store import JsonStateStore
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS_CODES = {408, 409, 425, 429, 500, 502, 503, 504, 529}
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without contacting the provider while its circuit breaker is open."""
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when the per-call deadline is used up before a successful attempt."""
+
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int = 3
+    base_delay: float = 1.0
+    max_delay: float = 30.0
+    request_timeout: float = 120.0
+    deadline: float = 300.0
+
+    @classmethod
+    def from_env(cls) -> "RetryPolicy":
+        return cls(
+            max_attempts=max(1, int(os.getenv("LLM_MAX_RETRIES", "2")) + 1),
+            base_delay=float(os.getenv("LLM_RETRY_BASE_DELAY", "1")),
+            max_delay=float(os.getenv("LLM_RETRY_MAX_DELAY", "30")),
+            request_timeout=float(os.getenv("LLM_REQUEST_TIMEOUT", "120")),
+            deadline=float(os.getenv("LLM_CALL_DEADLINE", "300")),
+        )
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for the given 0-based attempt."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    status = getattr(exc, "status_code", None)
+    if isinstance(status, int):
+        return status
+    response = getattr(exc, "response", None)
+    status = getattr(response, "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """Parse ``Retry-After`` / ``retry-after-ms`` from the error's HTTP response, if any."""
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        ms = headers.get("retry-after-ms")
+        if ms:
+            return float(ms) / 1000
+        value = headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            parsed = email.utils.parsedate_to_datetime(value)
+            return max(0.0, parsed.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_transient_error(exc: BaseException) -> bool:
+    """True for errors worth retrying and counting against the provider's health."""
+    if isinstance(exc, (CircuitOpenError, DeadlineExceeded)):
+        return False
+    status = _status_code(exc)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return True
+    # SDK-specific timeout/connection errors (openai, anthropic, zhipuai, httpx)
+    # share these naming conventions without sharing a base class.
+    names = {cls.__name__ for cls in type(exc).__mro__}
+    return any("Timeout" in n or "Connect" in n for n in names)
+
+
+class CircuitBreaker:
+    """Per-provider breaker: CLOSED -> OPEN after `failure_threshold`
+    consecutive transient failures; OPEN -> HALF_OPEN after `cooldown`
+    seconds, admitting a single trial call; trial success closes it, trial
+    failure re-opens it."""
+
+    def __init__(self, path: str | None = None, *, failure_threshold: int | None = None,
+                 cooldown: float | None = None) -> None:
+        self.store = JsonStateStore(path or os.getenv("LLM_CIRCUIT_FILE", "data/llm_circuit_state.json"))
+        self.failure_threshold = failure_threshold or int(os.getenv("LLM_CIRCUIT_FAILURE_THRESHOLD", "5"))
+        self.cooldown = cooldown if cooldown is not None else float(os.getenv("LLM_CIRCUIT_COOLDOWN", "60"))
+
+    def before_call(self, provider: str) -> None:
+        now = time.time()
+        # Every call passes here: decide from an unlocked snapshot and only lock for OPEN/HALF_OPEN transitions.
+        entry = self.store.read_unlocked().get(provider)
+        if not entry or entry.get("state", CLOSED) == CLOSED:
+            return
+        if entry["state"] == OPEN and now < entry.get("opened_at", 0) + self.cooldown:
+            raise CircuitOpenError(f"circuit breaker open for LLM provider {provider}")
+        if entry["state"] == HALF_OPEN and now < entry.get("trial_started_at", 0) + self.cooldown:
+            raise CircuitOpenError(f"circuit breaker open for LLM provider {provider}")
+        with self.store.transaction() as state:
+            entry = state.setdefault(provider, {"state": CLOSED, "failures": 0})
+            if entry["state"] == CLOSED:
+                return
+            if entry["state"] == OPEN and now >= entry.get("opened_at", 0) + self.cooldown:
+                entry["state"] = HALF_OPEN
+                entry["trial_started_at"] = now
+                logger.info("circuit breaker for %s half-open, sending trial request", provider)
+                return
+            if entry["state"] == HALF_OPEN and now >= entry.get("trial_started_at", 0) + self.cooldown:
+                # Previous trial never reported back (crashed/hung worker); allow another.
+                entry["trial_started_at"] = now
+                return
+            raise CircuitOpenError(f"circuit breaker open for LLM provider {provider}")
+
+    def record_success(self, provider: str) -> None:
+        entry = self.store.read_unlocked().get(provider)
+        if not entry or (entry.get("state", CLOSED) == CLOSED and not entry.get("failures")):
+            return
+        with self.store.transaction() as state:
+            entry = state.get(provider)
+            if entry and (entry.get("state") != CLOSED or entry.get("failures")):
+                if entry.get("state") != CLOSED:
+                    logger.info("circuit breaker for %s closed", provider)
+                state[provider] = {"state": CLOSED, "failures": 0}
+
+    def record_failure(self, provider: str) -> None:
+        now = time.time()
+        with self.store.transaction() as state:
+            entry = state.setdefault(provider, {"state": CLOSED, "failures": 0})
+            entry["failures"] = entry.get("failures", 0) + 1
+            entry["last_failure_at"] = now
+            if entry["state"] == HALF_OPEN or entry["failures"] >= self.failure_threshold:
+                if entry["state"] != OPEN:
+                    logger.warning("circuit breaker for %s opened after %d consecutive failures",
+                                   provider, entry["failures"])
+                entry["state"] = OPEN
+                entry["opened_at"] = now
+
+    def states(self) -> Dict[str, Dict]:
+        """Snapshot of every provider's breaker, for the metrics endpoint."""
+        return self.store.read()
+
+
+_breaker: CircuitBreaker | None = None
+
+
+def get_circuit_breaker() -> CircuitBreaker:
+    global _breaker
+    if _breaker is None:
+        _breaker = CircuitBreaker()
+    return _breaker
+
+
+def call_with_resilience(provider: str, func: Callable[[float], T], *,
+                         policy: RetryPolicy | None = None,
+                         breaker: CircuitBreaker | None = None) -> T:
+    """Run ``func(timeout)`` under the retry policy and the provider's breaker.
+
+    `func` receives the timeout (seconds) to apply to this attempt.
+    """
+    policy = policy or RetryPolicy.from_env()
+    breaker = breaker or get_circuit_breaker()
+    deadline = time.monotonic() + policy.deadline
+    attempt = 0
+    while True:
+        breaker.before_call(provider)
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"LLM call to {provider} exceeded {policy.deadline:.0f}s deadline")
+        try:
+            result = func(min(policy.request_timeout, remaining))
+        except Exception as e:
+            if not is_transient_error(e):
+                raise
+            breaker.record_failure(provider)
+            attempt += 1
+            if attempt >= policy.max_attempts:
+                raise
+            delay = max(policy.backoff(attempt - 1), retry_after_seconds(e) or 0.0)
+            if time.monotonic() + delay >= deadline:
+                logger.warning("LLM provider %s failed (%s); retry in %.1fs would exceed deadline, giving up",
+                               provider, e, delay)
+                raise
+            logger.warning("LLM provider %s transient error (%s), retry %d/%d in %.1fs",
+                           provider, e, attempt, policy.max_attempts - 1, delay)
+            time.sleep(delay)
+            continue
+        breaker.record_success(provider)
+        return result
@@ -0,0 +1,136 @@
+"""Provider-reported token usage and latency, aggregated per review.
+
+Clients call ``record_usage`` after every request (see
+``BaseClient._call_with_resilience``). Callers that want a total wrap their
+work in ``collect_usage()``::
+
+    with collect_usage() as usage:
+        review = reviewer.review(...)
+    usage.input_tokens, usage.output_tokens, usage.llm_latency_ms
+
+Collectors nest: a call is added to every active collector, so the worker's
+per-review total includes calls made inside the agentic reviewer's own
+collector. The active collectors are held in a ``ContextVar``; threads
+started with ``contextvars.copy_context()`` (e.g. hedged requests) report to
+the same collectors.
+"""
+import contextvars
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+
+@dataclass
+class LLMUsage:
+    """Usage of a single provider call.
+
+    ``input_tokens`` is the full prompt size including tokens served from the
+    provider's prompt cache; ``cached_tokens`` is the cached part of it.
+    """
+    model: str = ""
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cached_tokens: int = 0
+    latency_ms: int = 0
+
+
+def _get(obj: Any, name: str) -> Any:
+    if obj is None:
+        return None
+    if isinstance(obj, dict):
+        return obj.get(name)
+    return getattr(obj, name, None)
+
+
+def _int(value: Any) -> int:
+    return value if isinstance(value, int) else 0
+
+
+def extract_usage(response: Any) -> LLMUsage:
+    """Read token counts from an SDK response, whatever the provider.
+
+    Handles the OpenAI-compatible shape (OpenAI, DeepSeek, Qwen, ZhipuAI),
+    the Anthropic Messages shape and Ollama's eval counters. Unknown shapes
+    yield zero counts rather than raising.
+    """
+    model = _get(response, "model")
+    usage = _get(response, "usage")
+    result = LLMUsage(model=model if isinstance(model, str) else "")
+    if usage is not None and _get(usage, "prompt_tokens") is not None:
+        result.input_tokens = _int(_get(usage, "prompt_tokens"))
+        result.output_tokens = _int(_get(usage, "completion_tokens"))
+        cached = _get(_get(usage, "prompt_tokens_details"), "cached_tokens")
+        if cached is None:
+            cached = _get(usage, "prompt_cache_hit_tokens")  # DeepSeek
+        result.cached_tokens = _int(cached)
+    elif usage is not None and _get(usage, "input_tokens") is not None:
+        cache_read = _int(_get(usage, "cache_read_input_tokens"))
+        cache_write = _int(_get(usage, "cache_creation_input_tokens"))
+        result.input_tokens = _int(_get(usage, "input_tokens")) + cache_read + cache_write
+        result.output_tokens = _int(_get(usage, "output_tokens"))
+        result.cached_tokens = cache_read
+    elif _get(response, "prompt_eval_count") is not None or _get(response, "eval_count") is not None:
+        result.input_tokens = _int(_get(response, "prompt_eval_count"))
+        result.output_tokens = _int(_get(response, "eval_count"))
+    return result
+
+
+class UsageCollector:
+    """Thread-safe running total of LLM calls."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cached_tokens = 0
+        self.llm_latency_ms = 0
+        self.models: Dict[str, int] = {}
+
+    def add(self, usage: LLMUsage) -> None:
+        with self._lock:
+            self.calls += 1
+            self.input_tokens += usage.input_tokens
+            self.output_tokens += usage.output_tokens
+            self.cached_tokens += usage.cached_tokens
+            self.llm_latency_ms += usage.latency_ms
+            if usage.model:
+                self.models[usage.model] = self.models.get(usage.model, 0) + 1
+
+    @property
+    def model(self) -> str:
+        """The model that served the most calls (ties: first seen)."""
+        if not self.models:
+            return ""
+        return max(self.models, key=self.models.get)
+
+    def to_columns(self) -> Dict[str, Any]:
+        """Values for the usage columns of the review log tables."""
+        return {
+            "llm_model": self.model,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "cached_tokens": self.cached_tokens,
+            "llm_latency_ms": self.llm_latency_ms,
+        }
+
+
+_active: contextvars.ContextVar[Tuple[UsageCollector, ...]] = contextvars.ContextVar("llm_usage_collectors",
+                                                                                     default=())
+
+
+@contextmanager
+def collect_usage(collector: Optional[UsageCollector] = None) -> Iterator[UsageCollector]:
+    """Aggregate every LLM call made inside the block into `collector`."""
+    collector = collector or UsageCollector()
+    token = _active.set(_active.get() + (collector,))
+    try:
+        yield collector
+    finally:
+        _active.reset(token)
+
+
+def record_usage(usage: LLMUsage) -> None:
+    for collector in _active.get():
+        collector.add(usage)
@@ -8,6 +8,13 @@ from biz.utils.log import logger
 
 
 
+def github_api_url() -> str:
+    '''
+    GitHub API 地址，默认 https://api.github.com；GitHub Enterprise（https://<host>/api/v3）或本地模拟服务可通过 GITHUB_API_URL 覆盖
+    '''
+    return os.getenv('GITHUB_API_URL', 'https://api.github.com').rstrip('/')
+
+
 def filter_changes(changes: list):
     '''
     过滤数据，只保留支持的文件类型以及必要的字段信息
@@ -88,7 +95,7 @@ class PullRequestHandler:
         retry_delay = 10  # 重试间隔时间（秒）
         for attempt in range(max_retries):
             # 调用 GitHub API 获取 Pull Request 的 files（变更）
-            url = f"https://api.github.com/repos/{self.repo_full_name}/pulls/{self.pull_request_number}/files"
+            url = f"{github_api_url()}/repos/{self.repo_full_name}/pulls/{self.pull_request_number}/files"
             headers = {
                 'Authorization': f'token {self.github_token}',
                 'Accept': 'application/vnd.github.v3+json'
@@ -130,7 +137,7 @@ class PullRequestHandler:
             return []
 
         # 调用 GitHub API 获取 Pull Request 的 commits
-        url = f"https://api.github.com/repos/{self.repo_full_name}/pulls/{self.pull_request_number}/commits"
+        url = f"{github_api_url()}/repos/{self.repo_full_name}/pulls/{self.pull_request_number}/commits"
         headers = {
             'Authorization': f'token {self.github_token}',
             'Accept': 'application/vnd.github.v3+json'
@@ -160,7 +167,7 @@ class PullRequestHandler:
             return []
 
     def add_pull_request_notes(self, review_result):
-        url = f"https://api.github.com/repos/{self.repo_full_name}/issues/{self.pull_request_number}/comments"
+        url = f"{github_api_url()}/repos/{self.repo_full_name}/issues/{self.pull_request_number}/comments"
         headers = {
             'Authorization': f'token {self.github_token}',
             'Accept': 'application/vnd.github.v3+json'
@@ -177,7 +184,7 @@ class PullRequestHandler:
             logger.error(response.text)
 
     def target_branch_protected(self) -> bool:
-        url = f"https://api.github.com/repos/{self.repo_full_name}/branches?protected=true"
+        url = f"{github_api_url()}/repos/{self.repo_full_name}/branches?protected=true"
         headers = {
             'Authorization': f'token {self.github_token}',
             'Accept': 'application/vnd.github.v3+json'
@@ -247,7 +254,7 @@ class PushHandler:
             logger.error("Last commit ID not found.")
             return
 
-        url = f"https://api.github.com/repos/{self.repo_full_name}/commits/{last_commit_id}/comments"
+        url = f"{github_api_url()}/repos/{self.repo_full_name}/commits/{last_commit_id}/comments"
         headers = {
             'Authorization': f'token {self.github_token}',
             'Accept': 'application/vnd.github.v3+json'
@@ -265,7 +272,7 @@ class PushHandler:
 
     def __repository_commits(self, sha: str = "", per_page: int = 100, page: int = 1):
         # 获取仓库提交信息
-        url = f"https://api.github.com/repos/{self.repo_full_name}/commits?sha={sha}&per_page={per_page}&page={page}"
+        url = f"{github_api_url()}/repos/{self.repo_full_name}/commits?sha={sha}&per_page={per_page}&page={page}"
         headers = {
             'Authorization': f'token {self.github_token}',
             'Accept': 'application/vnd.github.v3+json'
@@ -282,7 +289,7 @@ class PushHandler:
             return []
 
     def get_parent_commit_id(self, commit_id: str) -> str:
-        url = f"https://api.github.com/repos/{self.repo_full_name}/commits/{commit_id}"
+        url = f"{github_api_url()}/repos/{self.repo_full_name}/commits/{commit_id}"
         headers = {
             'Authorization': f'token {self.github_token}',
             'Accept': 'application/vnd.github.v3+json'
@@ -297,7 +304,7 @@ class PushHandler:
 
     def repository_compare(self, base: str, head: str):
         # 比较两个提交之间的差异
-        url = f"https://api.github.com/repos/{self.repo_full_name}/compare/{base}...{head}"
+        url = f"{github_api_url()}/repos/{self.repo_full_name}/compare/{base}...{head}"
         headers = {
             'Authorization': f'token {self.github_token}',
             'Accept': 'application/vnd.github.v3+json'
@@ -147,6 +147,40 @@ class MergeRequestHandler:
             logger.error(f"Failed to add note: {response.status_code}")
             logger.error(response.text)
 
+    def create_merge_request_note(self, body: str):
+        """
+        新建一条 MR 评论并返回其 note id（失败时返回 None），用于随后通过 update_merge_request_note 原地更新
+        """
+        url = urljoin(f"{self.gitlab_url}/",
+                      f"api/v4/projects/{self.project_id}/merge_requests/{self.merge_request_iid}/notes")
+        headers = {
+            'Private-Token': self.gitlab_token,
+            'Content-Type': 'application/json'
+        }
+        response = requests.post(url, headers=headers, json={'body': body}, verify=False)
+        logger.debug(f"Create note on gitlab {url}: {response.status_code}, {response.text}")
+        if response.status_code == 201:
+            return response.json().get('id')
+        logger.error(f"Failed to create note: {response.status_code}, {response.text}")
+        return None
+
+    def update_merge_request_note(self, note_id, body: str) -> bool:
+        """
+        更新已有的 MR 评论内容
+        """
+        url = urljoin(f"{self.gitlab_url}/",
+                      f"api/v4/projects/{self.project_id}/merge_requests/{self.merge_request_iid}/notes/{note_id}")
+        headers = {
+            'Private-Token': self.gitlab_token,
+            'Content-Type': 'application/json'
+        }
+        response = requests.put(url, headers=headers, json={'body': body}, verify=False)
+        logger.debug(f"Update note {note_id} on gitlab {url}: {response.status_code}")
+        if response.status_code == 200:
+            return True
+        logger.error(f"Failed to update note {note_id}: {response.status_code}, {response.text}")
+        return False
+
     def target_branch_protected(self) -> bool:
         url = urljoin(f"{self.gitlab_url}/",
                       f"api/v4/projects/{self.project_id}/protected_branches")
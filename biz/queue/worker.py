@@ -4,13 +4,19 @@ from datetime import datetime
 
 from biz.entity.review_entity import MergeRequestReviewEntity, PushReviewEntity
 from biz.event.event_manager import event_manager
+from biz.llm.usage import UsageCollector, collect_usage
 from biz.platforms.gitlab.webhook_handler import filter_changes, MergeRequestHandler, PushHandler
 from biz.platforms.github.webhook_handler import filter_changes as filter_github_changes, PullRequestHandler as GithubPullRequestHandler, PushHandler as GithubPushHandler
 from biz.platforms.gitea.webhook_handler import filter_changes as filter_gitea_changes, PullRequestHandler as GiteaPullRequestHandler, \
     PushHandler as GiteaPushHandler
 from biz.service.review_service import ReviewService
 from biz.utils.code_reviewer import CodeReviewer
+from biz.utils.context_packer import format_omitted_note, get_review_token_budget, pack_changes
+from biz.utils.diff_serializer import serialize_changes
 from biz.utils.im import notifier
+from biz.utils.review_planner import plan_review
+from biz.utils.review_progress import ThrottledProgress
+from biz.utils.triage import TriageStats, format_triage_result, triage_changes
 from biz.utils.log import logger
 
 
@@ -61,30 +67,95 @@ def _resolve_repo_for_event(webhook_data: dict, gitlab_url: str = "") -> tuple[s
     return None, None, None
 
 
-def _review_with_strategy(changes: list, commits_text: str, webhook_data: dict, gitlab_url: str) -> str:
-    """Pick review strategy based on REVIEW_STRATEGY env var."""
+def _resolve_target_branch(webhook_data: dict) -> str | None:
+    """MR/PR target branch of a webhook payload, or None for pushes."""
+    if webhook_data.get("object_kind") == "merge_request":
+        return webhook_data.get("object_attributes", {}).get("target_branch") or None
+    pr = webhook_data.get("pull_request")
+    if isinstance(pr, dict):
+        return (pr.get("base") or {}).get("ref") or pr.get("base_branch") or None
+    return None
+
+
+def _build_changes_text(changes: list) -> str:
+    """Pack the highest-value hunks into the token budget and serialize them for the prompt."""
+    packed = pack_changes(changes, get_review_token_budget())
+    if packed.omitted:
+        logger.info("context packing omitted %d file(s): %s", len(packed.omitted), packed.omitted)
+    return serialize_changes(packed.changes) + format_omitted_note(packed.omitted)
+
+
+def _review_with_strategy(changes: list, commits_text: str, webhook_data: dict, gitlab_url: str,
+                          usage: UsageCollector | None = None, on_progress=None) -> str:
+    """Pick review strategy based on REVIEW_STRATEGY env var.
+
+    Provider-reported token usage of every LLM call made for this review is
+    added to `usage` when given. `on_progress` receives the partial review
+    text while a diff-only review streams in.
+    """
+    usage = usage if usage is not None else UsageCollector()
+    with collect_usage(usage):
+        result = _run_review_strategy(changes, commits_text, webhook_data, gitlab_url, on_progress)
+    if usage.calls:
+        hit_rate = usage.cached_tokens / usage.input_tokens if usage.input_tokens else 0.0
+        logger.info("LLM usage: calls=%d input_tokens=%d cached_tokens=%d (%.0f%% cache hit) "
+                    "output_tokens=%d latency_ms=%d", usage.calls, usage.input_tokens, usage.cached_tokens,
+                    hit_rate * 100, usage.output_tokens, usage.llm_latency_ms)
+    return result
+
+
+def _run_review_strategy(changes: list, commits_text: str, webhook_data: dict, gitlab_url: str,
+                         on_progress=None) -> str:
+    triage = triage_changes(changes)
+    if triage.files:
+        try:
+            TriageStats().record(triage)
+        except Exception as e:
+            logger.warning("failed to record triage stats: %s", e)
+    if triage.trivial:
+        logger.info("triage: skipping LLM review for trivial changes (%s, %d lines)", triage.reason, triage.lines)
+        return format_triage_result(triage)
+
     strategy = os.getenv("REVIEW_STRATEGY", "diff_only")
+    changes_text = _build_changes_text(changes)
+    model = None
+    agent_budget = {}
+    if strategy == "auto":
+        plan = plan_review(changes)
+        logger.info("review plan: strategy=%s tier=%s model=%s max_iterations=%d total_token_cap=%d (%s)",
+                    plan.strategy, plan.tier, plan.model or "default", plan.max_iterations,
+                    plan.total_token_cap, plan.reason)
+        strategy, model = plan.strategy, plan.model
+        agent_budget = {"max_iterations": plan.max_iterations, "total_token_cap": plan.total_token_cap,
+                        "model": model}
     if strategy != "agentic":
-        return CodeReviewer().review_and_strip_code(str(changes), commits_text)
+        return CodeReviewer(model=model).review_and_strip_code(changes_text, commits_text, on_progress=on_progress)
 
     # Agentic mode.
     from biz.agent.agentic_reviewer import AgenticReviewer
     repo_url, repo_key, ref = _resolve_repo_for_event(webhook_data, gitlab_url)
     if not (repo_url and repo_key and ref):
         logger.warning("could not resolve repo info for agentic mode, falling back to diff_only")
-        return CodeReviewer().review_and_strip_code(str(changes), commits_text)
+        return CodeReviewer(model=model).review_and_strip_code(changes_text, commits_text, on_progress=on_progress)
     cache_root = os.getenv("REPO_CACHE_DIR", "data/repo_cache")
+    changed_paths = [c["new_path"] for c in changes if isinstance(c, dict) and c.get("new_path")]
+    if changed_paths:
+        agent_budget["changed_paths"] = changed_paths
+    base_ref = _resolve_target_branch(webhook_data)
+    if base_ref:
+        agent_budget["base_ref"] = base_ref
     try:
         reviewer = AgenticReviewer(
             repo_url=repo_url,
             repo_key=repo_key,
             ref=ref,
             cache_root=cache_root,
+            **agent_budget,
         )
-        return reviewer.review(diffs_text=str(changes), commits_text=commits_text)
+        return reviewer.review(diffs_text=changes_text, commits_text=commits_text)
     except Exception as e:
         logger.error("agentic reviewer raised unexpectedly, falling back: %s", e)
-        return CodeReviewer().review_and_strip_code(str(changes), commits_text)
+        return CodeReviewer(model=model).review_and_strip_code(changes_text, commits_text, on_progress=on_progress)
 
 
 def handle_push_event(webhook_data: dict, gitlab_token: str, gitlab_url: str, gitlab_url_slug: str):
@@ -98,6 +169,7 @@ def handle_push_event(webhook_data: dict, gitlab_token: str, gitlab_url: str, gi
             return
 
         review_result = None
+        usage = UsageCollector()
         score = 0
         additions = 0
         deletions = 0
@@ -112,7 +184,7 @@ def handle_push_event(webhook_data: dict, gitlab_token: str, gitlab_url: str, gi
 
             if len(changes) > 0:
                 commits_text = ';'.join(commit.get('message', '').strip() for commit in commits)
-                review_result = _review_with_strategy(changes, commits_text, webhook_data, gitlab_url)
+                review_result = _review_with_strategy(changes, commits_text, webhook_data, gitlab_url, usage)
                 score = CodeReviewer.parse_review_score(review_text=review_result)
                 for item in changes:
                     additions += item['additions']
@@ -132,6 +204,7 @@ def handle_push_event(webhook_data: dict, gitlab_token: str, gitlab_url: str, gi
             webhook_data=webhook_data,
             additions=additions,
             deletions=deletions,
+            **usage.to_columns(),
         ))
 
     except Exception as e:
@@ -140,6 +213,23 @@ def handle_push_event(webhook_data: dict, gitlab_token: str, gitlab_url: str, gi
         logger.error('出现未知错误: %s', error_message)
 
 
+def _start_progress_note(handler: MergeRequestHandler):
+    """
+    开启 REVIEW_PROGRESS_NOTE_ENABLED 时，先在 MR 上创建“审查进行中”的评论，并返回其 note id
+    与节流的进度回调（流式生成时原地更新该评论）；未开启或创建失败时返回 (None, None)。
+    """
+    if os.environ.get('REVIEW_PROGRESS_NOTE_ENABLED', '0') != '1':
+        return None, None
+    note_id = handler.create_merge_request_note('Auto Review Result: \nAI 审查进行中，请稍候…')
+    if not note_id:
+        return None, None
+
+    def publish(partial: str):
+        handler.update_merge_request_note(note_id, f'Auto Review Result（生成中）: \n{partial}')
+
+    return note_id, ThrottledProgress(publish)
+
+
 def handle_merge_request_event(webhook_data: dict, gitlab_token: str, gitlab_url: str, gitlab_url_slug: str):
     '''
     处理Merge Request Hook事件
@@ -207,10 +297,19 @@ def handle_merge_request_event(webhook_data: dict, gitlab_token: str, gitlab_url
 
         # review 代码
         commits_text = ';'.join(commit.get('message', '').strip() for commit in commits)
-        review_result = _review_with_strategy(changes, commits_text, webhook_data, gitlab_url)
-
-        # 将review结果提交到Gitlab的 notes
-        handler.add_merge_request_notes(f'Auto Review Result: \n{review_result}')
+        usage = UsageCollector()
+        note_id, on_progress = _start_progress_note(handler)
+        try:
+            review_result = _review_with_strategy(changes, commits_text, webhook_data, gitlab_url, usage,
+                                                  on_progress=on_progress)
+        except Exception:
+            if note_id:
+                handler.update_merge_request_note(note_id, 'Auto Review Result: \nAI 审查失败，请查看服务日志。')
+            raise
+
+        # 将review结果提交到Gitlab的 notes（已创建进度评论时原地更新）
+        if not (note_id and handler.update_merge_request_note(note_id, f'Auto Review Result: \n{review_result}')):
+            handler.add_merge_request_notes(f'Auto Review Result: \n{review_result}')
 
         # dispatch merge_request_reviewed event
         event_manager['merge_request_reviewed'].send(
@@ -229,6 +328,7 @@ def handle_merge_request_event(webhook_data: dict, gitlab_token: str, gitlab_url
                 additions=additions,
                 deletions=deletions,
                 last_commit_id=last_commit_id,
+                **usage.to_columns(),
             )
         )
 
@@ -248,6 +348,7 @@ def handle_github_push_event(webhook_data: dict, github_token: str, github_url:
             return
 
         review_result = None
+        usage = UsageCollector()
         score = 0
         additions = 0
         deletions = 0
@@ -262,7 +363,7 @@ def handle_github_push_event(webhook_data: dict, github_token: str, github_url:
 
             if len(changes) > 0:
                 commits_text = ';'.join(commit.get('message', '').strip() for commit in commits)
-                review_result = _review_with_strategy(changes, commits_text, webhook_data, github_url)
+                review_result = _review_with_strategy(changes, commits_text, webhook_data, github_url, usage)
                 score = CodeReviewer.parse_review_score(review_text=review_result)
                 for item in changes:
                     additions += item.get('additions', 0)
@@ -282,6 +383,7 @@ def handle_github_push_event(webhook_data: dict, github_token: str, github_url:
             webhook_data=webhook_data,
             additions=additions,
             deletions=deletions,
+            **usage.to_columns(),
         ))
 
     except Exception as e:
@@ -347,7 +449,8 @@ def handle_github_pull_request_event(webhook_data: dict, github_token: str, gith
 
         # review 代码
         commits_text = ';'.join(commit.get('message', '').strip() for commit in commits)
-        review_result = _review_with_strategy(changes, commits_text, webhook_data, github_url)
+        usage = UsageCollector()
+        review_result = _review_with_strategy(changes, commits_text, webhook_data, github_url, usage)
 
         # 将review结果提交到GitHub的 notes
         handler.add_pull_request_notes(f'Auto Review Result: \n{review_result}')
@@ -369,6 +472,7 @@ def handle_github_pull_request_event(webhook_data: dict, github_token: str, gith
                 additions=additions,
                 deletions=deletions,
                 last_commit_id=github_last_commit_id,
+                **usage.to_columns(),
             ))
 
     except Exception as e:
@@ -388,6 +492,7 @@ def handle_gitea_push_event(webhook_data: dict, gitea_token: str, gitea_url: str
             return
 
         review_result = None
+        usage = UsageCollector()
         score = 0
         additions = 0
         deletions = 0
@@ -401,7 +506,7 @@ def handle_gitea_push_event(webhook_data: dict, gitea_token: str, gitea_url: str
 
             if len(changes) > 0:
                 commits_text = ';'.join(commit.get('message', '').strip() for commit in commits)
-                review_result = _review_with_strategy(changes, commits_text, webhook_data, gitea_url)
+                review_result = _review_with_strategy(changes, commits_text, webhook_data, gitea_url, usage)
                 score = CodeReviewer.parse_review_score(review_text=review_result)
                 for item in changes:
                     additions += item.get('additions', 0)
@@ -423,6 +528,7 @@ def handle_gitea_push_event(webhook_data: dict, gitea_token: str, gitea_url: str
             webhook_data=webhook_data,
             additions=additions,
             deletions=deletions,
+            **usage.to_columns(),
         ))
 
     except Exception as e:
@@ -479,7 +585,8 @@ def handle_gitea_pull_request_event(webhook_data: dict, gitea_token: str, gitea_
             return
 
         commits_text = ';'.join(commit.get('message', '').strip() for commit in commits)
-        review_result = _review_with_strategy(changes, commits_text, webhook_data, gitea_url)
+        usage = UsageCollector()
+        review_result = _review_with_strategy(changes, commits_text, webhook_data, gitea_url, usage)
 
         handler.add_pull_request_notes(f'Auto Review Result: \n{review_result}')
 
@@ -502,6 +609,7 @@ def handle_gitea_pull_request_event(webhook_data: dict, gitea_token: str, gitea_
                 additions=additions,
                 deletions=deletions,
                 last_commit_id=last_commit_id,
+                **usage.to_columns(),
             ))
 
     except Exception as e:
@@ -70,6 +70,22 @@ class ReviewService:
                         cursor.execute(f"ALTER TABLE mr_review_log ADD COLUMN {column.get('name')} {column.get('type')} "
                                        f"DEFAULT {column.get('default')}")
 
+                # 为旧版本的mr_review_log、push_review_log表添加大模型用量字段
+                usage_columns = [
+                    {"name": "llm_model", "type": "TEXT", "default": "''"},
+                    {"name": "input_tokens", "type": "INTEGER", "default": "0"},
+                    {"name": "output_tokens", "type": "INTEGER", "default": "0"},
+                    {"name": "cached_tokens", "type": "INTEGER", "default": "0"},
+                    {"name": "llm_latency_ms", "type": "INTEGER", "default": "0"},
+                ]
+                for table in tables:
+                    cursor.execute(f"PRAGMA table_info('{table}')")
+                    current_columns = [col[1] for col in cursor.fetchall()]
+                    for column in usage_columns:
+                        if column.get("name") not in current_columns:
+                            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column.get('name')} "
+                                           f"{column.get('type')} DEFAULT {column.get('default')}")
+
                 conn.commit()
                 # 添加时间字段索引（默认查询就需要时间范围）
                 conn.execute('CREATE INDEX IF NOT EXISTS idx_push_review_log_updated_at ON '
@@ -87,13 +103,14 @@ class ReviewService:
                 cursor.execute('''
                                 INSERT INTO mr_review_log (project_name,author, source_branch, target_branch, 
                                 updated_at, commit_messages, score, url,review_result, additions, deletions, 
-                                last_commit_id)
-                                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                                last_commit_id, llm_model, input_tokens, output_tokens, cached_tokens, llm_latency_ms)
+                                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                             ''',
                                (entity.project_name, entity.author, entity.source_branch,
                                 entity.target_branch, entity.updated_at, entity.commit_messages, entity.score,
                                 entity.url, entity.review_result, entity.additions, entity.deletions,
-                                entity.last_commit_id))
+                                entity.last_commit_id, entity.llm_model, entity.input_tokens, entity.output_tokens,
+                                entity.cached_tokens, entity.llm_latency_ms))
                 conn.commit()
         except sqlite3.DatabaseError as e:
             print(f"Error inserting review log: {e}")
@@ -105,7 +122,8 @@ class ReviewService:
         try:
             with sqlite3.connect(ReviewService.DB_FILE) as conn:
                 query = """
-                            SELECT project_name, author, source_branch, target_branch, updated_at, commit_messages, score, url, review_result, additions, deletions
+                            SELECT project_name, author, source_branch, target_branch, updated_at, commit_messages, score, url, review_result, additions, deletions,
+                                   llm_model, input_tokens, output_tokens, cached_tokens, llm_latency_ms
                             FROM mr_review_log
                             WHERE 1=1
                             """
@@ -158,12 +176,15 @@ class ReviewService:
             with sqlite3.connect(ReviewService.DB_FILE) as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
-                                INSERT INTO push_review_log (project_name,author, branch, updated_at, commit_messages, score,review_result, additions, deletions)
-                                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                                INSERT INTO push_review_log (project_name,author, branch, updated_at, commit_messages, score,review_result, additions, deletions,
+                                 llm_model, input_tokens, output_tokens, cached_tokens, llm_latency_ms)
+                                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                             ''',
                                (entity.project_name, entity.author, entity.branch,
                                 entity.updated_at, entity.commit_messages, entity.score,
-                                entity.review_result, entity.additions, entity.deletions))
+                                entity.review_result, entity.additions, entity.deletions,
+                                entity.llm_model, entity.input_tokens, entity.output_tokens,
+                                entity.cached_tokens, entity.llm_latency_ms))
                 conn.commit()
         except sqlite3.DatabaseError as e:
             print(f"Error inserting review log: {e}")
@@ -176,7 +197,8 @@ class ReviewService:
             with sqlite3.connect(ReviewService.DB_FILE) as conn:
                 # 基础查询
                 query = """
-                    SELECT project_name, author, branch, updated_at, commit_messages, score, review_result, additions, deletions
+                    SELECT project_name, author, branch, updated_at, commit_messages, score, review_result, additions, deletions,
+                           llm_model, input_tokens, output_tokens, cached_tokens, llm_latency_ms
                     FROM push_review_log
                     WHERE 1=1
                 """
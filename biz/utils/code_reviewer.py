@@ -1,50 +1,92 @@
 import abc
+import functools
 import os
 import re
-from typing import Dict, Any, List
+from typing import Any, Callable, Dict, List, Optional
 
 import yaml
 from jinja2 import Template
 
+from biz.llm.capabilities import resolve_capabilities
 from biz.llm.factory import Factory
 from biz.utils.log import logger
 from biz.utils.token_util import count_tokens, truncate_text_by_tokens
 
+PROMPT_TEMPLATES_FILE = "conf/prompt_templates.yml"
+
+
+def load_prompt_templates(path: str = PROMPT_TEMPLATES_FILE) -> Dict[str, Any]:
+    """读取提示词模板文件，按文件修改时间缓存解析结果，文件被修改后自动重新加载"""
+    return _parse_prompt_templates(path, os.stat(path).st_mtime_ns)
+
+
+@functools.lru_cache(maxsize=8)
+def _parse_prompt_templates(path: str, mtime_ns: int) -> Dict[str, Any]:
+    # 在打开 YAML 文件时显式指定编码为 UTF-8，避免使用系统默认的 GBK 编码。
+    with open(path, "r", encoding="utf-8") as file:
+        return yaml.safe_load(file) or {}
+
+
+@functools.lru_cache(maxsize=64)
+def _compile_template(template_str: str) -> Template:
+    return Template(template_str)
+
+
+def render_template(template_str: str, **context) -> str:
+    """使用 Jinja2 渲染模板，编译结果按模板内容缓存"""
+    return _compile_template(template_str).render(**context)
+
 
 class BaseReviewer(abc.ABC):
     """代码审查基类"""
 
-    def __init__(self, prompt_key: str):
+    def __init__(self, prompt_key: str, model: str = None):
         self.client = Factory().getClient()
+        # 指定模型（如评审规划器选择的廉价/强模型），为空时使用供应商默认模型
+        self.model = model
         self.prompts = self._load_prompts(prompt_key, os.getenv("REVIEW_STYLE", "professional"))
 
     def _load_prompts(self, prompt_key: str, style="professional") -> Dict[str, Any]:
         """加载提示词配置"""
-        prompt_templates_file = "conf/prompt_templates.yml"
         try:
-            # 在打开 YAML 文件时显式指定编码为 UTF-8，避免使用系统默认的 GBK 编码。
-            with open(prompt_templates_file, "r", encoding="utf-8") as file:
-                prompts = yaml.safe_load(file).get(prompt_key, {})
+            prompts = load_prompt_templates().get(prompt_key, {})
 
-                # 使用Jinja2渲染模板
-                def render_template(template_str: str) -> str:
-                    return Template(template_str).render(style=style)
+            # 使用Jinja2渲染模板
+            system_prompt = render_template(prompts["system_prompt"], style=style)
+            user_prompt = render_template(prompts["user_prompt"], style=style)
 
-                system_prompt = render_template(prompts["system_prompt"])
-                user_prompt = render_template(prompts["user_prompt"])
-
-                return {
-                    "system_message": {"role": "system", "content": system_prompt},
-                    "user_message": {"role": "user", "content": user_prompt},
-                }
+            return {
+                "system_message": {"role": "system", "content": system_prompt},
+                "user_message": {"role": "user", "content": user_prompt},
+            }
         except (FileNotFoundError, KeyError, yaml.YAMLError) as e:
             logger.error(f"加载提示词配置失败: {e}")
             raise Exception(f"提示词配置加载失败: {e}")
 
-    def call_llm(self, messages: List[Dict[str, Any]]) -> str:
-        """调用 LLM 进行代码审核"""
+    def call_llm(self, messages: List[Dict[str, Any]], on_progress: Optional[Callable[[str], None]] = None) -> str:
+        """
+        调用 LLM 进行代码审核
+
+        Args:
+            messages: 消息列表。
+            on_progress: 可选，流式输出时以“已生成的文本”为参数回调；模型不支持流式时在结束后回调一次。
+        """
         logger.info(f"向 AI 发送代码 Review 请求, messages: {messages}")
-        review_result = self.client.completions(messages=messages)
+        kwargs = {"model": self.model} if self.model else {}
+        try:
+            if on_progress and resolve_capabilities(self.client, self.model).streaming:
+                review_result = self.client.stream_completions(messages=messages, on_progress=on_progress, **kwargs)
+            else:
+                review_result = self.client.completions(messages=messages, **kwargs)
+                if on_progress and review_result:
+                    on_progress(review_result)
+        except Exception as e:
+            # 部分客户端（如 DeepSeek）把错误转换为提示文本作为审查结果返回，其余客户端继续抛出
+            message = self.client.describe_error(e)
+            if message is None:
+                raise
+            logger.error(f"AI 审查请求失败: {e}")
+            return message
         logger.info(f"收到 AI 返回结果: {review_result}")
         return review_result
 
@@ -57,15 +99,17 @@ class BaseReviewer(abc.ABC):
 class CodeReviewer(BaseReviewer):
     """代码 Diff 级别的审查"""
 
-    def __init__(self):
-        super().__init__("code_review_prompt")
+    def __init__(self, model: str = None):
+        super().__init__("code_review_prompt", model=model)
 
-    def review_and_strip_code(self, changes_text: str, commits_text: str = "") -> str:
+    def review_and_strip_code(self, changes_text: str, commits_text: str = "",
+                              on_progress: Optional[Callable[[str], None]] = None) -> str:
         """
         Review判断changes_text超出取前REVIEW_MAX_TOKENS个token，超出则截断changes_text，
         调用review_code方法，返回review_result，如果review_result是markdown格式，则去掉头尾的```
         :param changes_text:
         :param commits_text:
+        :param on_progress: 流式输出的进度回调，参数为已生成的文本
         :return:
         """
         # 如果超长，取前REVIEW_MAX_TOKENS个token
@@ -80,12 +124,13 @@ class CodeReviewer(BaseReviewer):
         if tokens_count > review_max_tokens:
             changes_text = truncate_text_by_tokens(changes_text, review_max_tokens)
 
-        review_result = self.review_code(changes_text, commits_text).strip()
+        review_result = self.review_code(changes_text, commits_text, on_progress=on_progress).strip()
         if review_result.startswith("```markdown") and review_result.endswith("```"):
             return review_result[11:-3].strip()
         return review_result
 
-    def review_code(self, diffs_text: str, commits_text: str = "") -> str:
+    def review_code(self, diffs_text: str, commits_text: str = "",
+                    on_progress: Optional[Callable[[str], None]] = None) -> str:
         """Review 代码并返回结果"""
         messages = [
             self.prompts["system_message"],
@@ -96,7 +141,7 @@ class CodeReviewer(BaseReviewer):
                 ),
             },
         ]
-        return self.call_llm(messages)
+        return self.call_llm(messages, on_progress=on_progress)
 
     @staticmethod
     def parse_review_score(review_text: str) -> int:
@@ -57,6 +57,15 @@ def check_llm_provider():
     else:
         logger.info(f"LLM 供应商 {llm_provider} 的配置项已设置。")
 
+    fallbacks = [p.strip() for p in os.getenv("LLM_FALLBACK_PROVIDERS", "").split(",") if p.strip()]
+    for fallback in fallbacks:
+        if fallback not in LLM_PROVIDERS:
+            logger.error(f"LLM_FALLBACK_PROVIDERS 中的 {fallback} 无效，应为 {LLM_PROVIDERS} 之一。")
+            continue
+        missing_keys = [key for key in LLM_REQUIRED_KEYS.get(fallback, []) if not os.getenv(key)]
+        if missing_keys:
+            logger.warning(f"备用 LLM 供应商 {fallback} 缺少环境变量: {', '.join(missing_keys)}，将被跳过")
+
 def check_llm_connectivity():
     client = Factory().getClient()
     logger.info(f"正在检查 LLM 供应商的连接...")
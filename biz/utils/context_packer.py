@@ -0,0 +1,261 @@
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+from biz.utils.diff_serializer import format_change_header
+from biz.utils.token_util import count_tokens, truncate_text_by_tokens
+
+# 文件/hunk 类别，数值越小优先级越高
+CATEGORY_PRIORITY = {
+    "source": 0,
+    "test": 1,
+    "doc": 2,
+    "whitespace": 3,
+    "generated": 4,
+    "vendored": 5,
+    "lockfile": 6,
+}
+
+# 低价值类别：即使预算有剩余也不做截断补位
+LOW_VALUE_CATEGORIES = {"whitespace", "generated", "vendored", "lockfile"}
+
+LOCKFILE_NAMES = {
+    "package-lock.json", "yarn.lock", "pnpm-lock.yaml", "npm-shrinkwrap.json",
+    "poetry.lock", "Pipfile.lock", "pdm.lock", "uv.lock",
+    "composer.lock", "Gemfile.lock", "Cargo.lock", "go.sum",
+    "packages.lock.json", "pubspec.lock", "mix.lock", "gradle.lockfile",
+}
+
+VENDORED_DIRS = {"vendor", "vendors", "third_party", "thirdparty", "node_modules", "bower_components", "Pods"}
+
+GENERATED_PATH_RE = re.compile(
+    r"(\.min\.(js|css)$|\.bundle\.js$|_pb2(_grpc)?\.pyi?$|\.pb\.go$|\.pb\.(cc|h)$|\.g\.dart$|\.generated\.|"
+    r"(^|/)(generated|gen|dist|build)/)"
+)
+GENERATED_MARKER_RE = re.compile(r"@generated|DO NOT EDIT|Code generated .* DO NOT EDIT|auto-generated", re.IGNORECASE)
+
+TEST_PATH_RE = re.compile(r"(^|/)(tests?|__tests__|spec)/|(^|/)test_[^/]+$|_test\.[^/]+$|\.(spec|test)\.[^/]+$")
+DOC_PATH_RE = re.compile(r"\.(md|rst|txt|adoc)$", re.IGNORECASE)
+
+HUNK_HEADER_RE = re.compile(r"^@@ ", re.MULTILINE)
+
+# 各片段单独计数再相加时，拼接处的 token 可能与整体计数相差 1 个（估算方式逐段向下取整），每段按此余量计入
+_JOIN_SLACK_TOKENS = 1
+# 为“被省略的变更”说明预留的 token
+_NOTE_RESERVE_TOKENS = 300
+
+
+@dataclass
+class _Hunk:
+    file_index: int
+    hunk_index: int
+    text: str
+    category: str
+    tokens: int
+
+
+@dataclass
+class PackResult:
+    """打包结果：保留的 changes、被省略（或截断）的文件说明，以及已使用的 token 数"""
+    changes: List[Dict[str, Any]]
+    omitted: List[Dict[str, str]] = field(default_factory=list)
+    used_tokens: int = 0
+
+
+def classify_file(path: str, diff: str = "") -> str:
+    """
+    按路径和内容判断文件类别：lockfile / vendored / generated / test / doc / source。
+    """
+    path = path or ""
+    name = path.rsplit("/", 1)[-1]
+    if name in LOCKFILE_NAMES:
+        return "lockfile"
+    if any(part in VENDORED_DIRS for part in path.split("/")[:-1]):
+        return "vendored"
+    if GENERATED_PATH_RE.search(path) or GENERATED_MARKER_RE.search(diff[:2000]):
+        return "generated"
+    if TEST_PATH_RE.search(path):
+        return "test"
+    if DOC_PATH_RE.search(path):
+        return "doc"
+    return "source"
+
+
+def split_hunks(diff: str) -> List[str]:
+    """
+    按 @@ 头部把 unified diff 拆分为 hunk 列表；没有 @@ 头部时整体视为一个 hunk。
+    """
+    if not diff:
+        return []
+    starts = [m.start() for m in HUNK_HEADER_RE.finditer(diff)]
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+    return [diff[start:end] for start, end in zip(starts, starts[1:] + [len(diff)]) if diff[start:end].strip()]
+
+
+def is_whitespace_only_hunk(hunk: str) -> bool:
+    """
+    判断 hunk 是否仅修改了空白字符（缩进、换行、行尾空格等）。
+    """
+    removed = []
+    added = []
+    for line in hunk.splitlines():
+        if line.startswith("@@"):
+            continue
+        if line.startswith("-"):
+            removed.append(line[1:])
+        elif line.startswith("+"):
+            added.append(line[1:])
+    if not removed and not added:
+        return False
+    return "".join("".join(removed).split()) == "".join("".join(added).split())
+
+
+def _rebuild_change(change: Dict[str, Any], hunks: List[str]) -> Dict[str, Any]:
+    diff = "".join(h if h.endswith("\n") else h + "\n" for h in hunks)
+    return {**change, "diff": diff}
+
+
+def pack_changes(changes: List[Dict[str, Any]], max_tokens: int) -> PackResult:
+    """
+    在 token 预算内按价值挑选 hunk：源码优先，其次测试、文档，
+    纯空白改动、生成代码、vendored 代码与 lockfile 排在最后。
+
+    预算足够时原样返回；否则按优先级贪心装入 hunk，装不下的跳过，
+    最后用剩余预算截断装入第一个被跳过的高价值 hunk。保留的 hunk 按原文件、原顺序重组。
+
+    Args:
+        changes: filter_changes 返回的变更列表。
+        max_tokens: 可用于 diff 文本的 token 上限。
+
+    Returns:
+        PackResult: changes 为重组后的变更列表，omitted 记录被省略或截断的文件及原因。
+    """
+    if not changes:
+        return PackResult(changes=[])
+
+    hunks: List[_Hunk] = []
+    # 每个文件所含 hunk 的类别，用于生成省略原因
+    file_hunk_categories: List[List[str]] = []
+    # 每个文件头部（与 serialize_changes 输出一致）的 token 开销
+    header_tokens: List[int] = []
+    # 非结构化数据无法按 hunk 打包，直接保留，其 token 开销先从预算中扣除
+    fixed_tokens = 0
+    for file_index, change in enumerate(changes):
+        if not isinstance(change, dict):
+            file_hunk_categories.append([])
+            header_tokens.append(0)
+            fixed_tokens += count_tokens(f"{change}\n") + _JOIN_SLACK_TOKENS
+            continue
+        header_tokens.append(count_tokens(format_change_header(change)) + _JOIN_SLACK_TOKENS)
+        diff = change.get("diff") or ""
+        category = classify_file(change.get("new_path", ""), diff)
+        categories = []
+        for hunk_index, text in enumerate(split_hunks(diff)):
+            hunk_category = category
+            if category in ("source", "test", "doc") and is_whitespace_only_hunk(text):
+                hunk_category = "whitespace"
+            categories.append(hunk_category)
+            hunks.append(_Hunk(file_index, hunk_index, text, hunk_category,
+                               count_tokens(text) + _JOIN_SLACK_TOKENS))
+        file_hunk_categories.append(categories)
+
+    total = fixed_tokens + sum(h.tokens for h in hunks) + sum(header_tokens)
+    if total <= max_tokens:
+        return PackResult(changes=list(changes), used_tokens=total)
+
+    budget = max(max_tokens - _NOTE_RESERVE_TOKENS, 0)
+    used = fixed_tokens
+    selected: Dict[int, Dict[int, str]] = {}
+    skipped: List[_Hunk] = []
+    truncated_files = set()
+    for hunk in sorted(hunks, key=lambda h: CATEGORY_PRIORITY[h.category]):
+        header_cost = 0 if hunk.file_index in selected else header_tokens[hunk.file_index]
+        cost = hunk.tokens + header_cost
+        if used + cost <= budget:
+            selected.setdefault(hunk.file_index, {})[hunk.hunk_index] = hunk.text
+            used += cost
+        else:
+            skipped.append(hunk)
+
+    # 用剩余预算截断装入第一个被跳过的高价值 hunk，避免核心改动因单个 hunk 过大而整体丢失
+    for hunk in skipped:
+        if hunk.category in LOW_VALUE_CATEGORIES:
+            continue
+        header_cost = 0 if hunk.file_index in selected else header_tokens[hunk.file_index]
+        remaining = budget - used - header_cost
+        # 截断后的 hunk 重组时可能补一个换行，另留出拼接余量
+        if remaining > 2 * _JOIN_SLACK_TOKENS:
+            text = truncate_text_by_tokens(hunk.text, remaining - 2 * _JOIN_SLACK_TOKENS)
+            selected.setdefault(hunk.file_index, {})[hunk.hunk_index] = text
+            used += remaining + header_cost
+            truncated_files.add(hunk.file_index)
+        break
+
+    packed: List[Dict[str, Any]] = []
+    omitted: List[Dict[str, str]] = []
+    for file_index, change in enumerate(changes):
+        if not isinstance(change, dict):
+            packed.append(change)
+            continue
+        path = change.get("new_path", "")
+        categories = file_hunk_categories[file_index]
+        kept = selected.get(file_index)
+        if not kept:
+            if not categories:
+                continue
+            reason = min(categories, key=CATEGORY_PRIORITY.get)
+            omitted.append({"path": path, "reason": "budget" if reason == "source" else reason})
+            continue
+        packed.append(_rebuild_change(change, [kept[i] for i in sorted(kept)]))
+        if file_index in truncated_files:
+            omitted.append({"path": path, "reason": "truncated"})
+        elif len(kept) < len(categories):
+            omitted.append({"path": path, "reason": f"partial ({len(kept)}/{len(categories)} hunks)"})
+
+    return PackResult(changes=packed, omitted=omitted, used_tokens=used)
+
+
+_REASON_LABELS = {
+    "budget": "超出 token 预算",
+    "truncated": "超出 token 预算，已截断",
+    "lockfile": "依赖锁文件",
+    "generated": "生成代码",
+    "vendored": "第三方 vendored 代码",
+    "whitespace": "仅空白字符改动",
+    "test": "测试代码，超出 token 预算",
+    "doc": "文档，超出 token 预算",
+}
+
+
+def format_omitted_note(omitted: List[Dict[str, str]], max_tokens: int = _NOTE_RESERVE_TOKENS) -> str:
+    """
+    生成附加在 diff 文本末尾的省略说明，让模型知道哪些变更未纳入审查。
+
+    说明不超过 max_tokens（即 pack_changes 为其预留的预算），放不下的文件只给出数量，
+    避免说明本身超预算后被最终截断连同 diff 末尾一起切掉。
+    """
+    if not omitted:
+        return ""
+    header = "\n[以下变更因 token 预算或低审查价值未完整提供]"
+    lines = [header]
+    for index, item in enumerate(omitted):
+        reason = item["reason"]
+        if reason.startswith("partial"):
+            label = f"仅包含部分 hunk {reason[len('partial '):]}"
+        else:
+            label = _REASON_LABELS.get(reason, reason)
+        rest = len(omitted) - index - 1
+        tail = [f"- 其余 {rest} 个文件未列出"] if rest else []
+        candidate = lines + [f"- {item['path']}: {label}"]
+        if count_tokens("\n".join(candidate + tail) + "\n") > max_tokens:
+            lines.append(f"- 其余 {len(omitted) - index} 个文件未列出")
+            break
+        lines = candidate
+    return "\n".join(lines) + "\n"
+
+
+def get_review_token_budget() -> int:
+    """diff 文本的 token 预算，与 CodeReviewer 的截断阈值保持一致"""
+    return int(os.getenv("REVIEW_MAX_TOKENS", 10000))
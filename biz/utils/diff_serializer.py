@@ -0,0 +1,84 @@
+from typing import Any, Dict, Iterable, Iterator, List
+
+from biz.utils.token_util import count_tokens
+
+
+def format_change_header(change: Dict[str, Any]) -> str:
+    """单个文件在 prompt 中的头部行，context_packer 按它计算每个文件的 token 开销。"""
+    path = change.get("new_path") or change.get("old_path") or "unknown"
+    return f"### {path} (+{change.get('additions', 0)} -{change.get('deletions', 0)})\n"
+
+
+def _iter_change_parts(changes: Iterable[Any]) -> Iterator[str]:
+    """
+    逐个产出组成 prompt 的字符串片段，供 str.join 一次性拼接，避免中间字符串拷贝。
+
+    每个文件输出一行简短的头部，随后是原始的 unified diff 文本：
+        ### path/to/file.py (+3 -1)
+        @@ -1,3 +1,4 @@
+        ...
+    """
+    for change in changes:
+        if not isinstance(change, dict):
+            # 兼容非 filter_changes 产出的数据（例如测试中直接传入字符串）
+            yield str(change)
+            yield "\n"
+            continue
+        yield format_change_header(change)
+        diff = change.get("diff") or ""
+        yield diff
+        if diff and not diff.endswith("\n"):
+            yield "\n"
+
+
+def serialize_changes(changes: List[Dict[str, Any]]) -> str:
+    """
+    将 filter_changes 的结果序列化为紧凑的 prompt 文本。
+
+    相比 str(changes)（Python 列表的 repr），不再包含引号、'diff': 等键名以及被转义的 \\n，
+    同样的 diff 内容占用的 token 明显更少。
+
+    Args:
+        changes: filter_changes 返回的变更列表，每项包含 new_path、diff、additions、deletions。
+
+    Returns:
+        str: 每个文件一个短头部加 unified diff 的文本。
+    """
+    if not changes:
+        return ""
+    return "".join(_iter_change_parts(changes))
+
+
+def compare_token_counts(changes: List[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    对比旧格式 str(changes) 与 serialize_changes 的 token 数，用于评估 prompt 体积。
+
+    Returns:
+        dict: {"repr_tokens": ..., "compact_tokens": ..., "saved_tokens": ...}
+    """
+    repr_tokens = count_tokens(str(changes))
+    compact_tokens = count_tokens(serialize_changes(changes))
+    return {
+        "repr_tokens": repr_tokens,
+        "compact_tokens": compact_tokens,
+        "saved_tokens": repr_tokens - compact_tokens,
+    }
+
+
+if __name__ == '__main__':
+    sample = [
+        {
+            'diff': "@@ -1,3 +1,4 @@\n def add(a, b):\n-    return a+b\n+    # 相加\n+    return a + b\n",
+            'new_path': 'src/util.py',
+            'additions': 2,
+            'deletions': 1,
+        },
+        {
+            'diff': "@@ -10,2 +10,2 @@\n-    print('hello')\n+    logger.info('hello')\n",
+            'new_path': 'src/main.py',
+            'additions': 1,
+            'deletions': 1,
+        },
+    ]
+    print(serialize_changes(sample))
+    print(compare_token_counts(sample))
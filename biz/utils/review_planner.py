@@ -0,0 +1,184 @@
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set
+
+from biz.utils.context_packer import classify_file
+from biz.utils.token_util import count_tokens
+
+# 被视为“符号定义/修改”的行：函数、类、方法等（覆盖常见语言的声明关键字）
+SYMBOL_DEF_RE = re.compile(
+    r"^[+-]\s*(?:export\s+)?(?:async\s+)?(?:public\s+|private\s+|protected\s+|static\s+)*"
+    r"(?:def|class|function|func|fn|interface|struct|enum|type)\s+(?:\([^)]*\)\s*)?([A-Za-z_]\w*)",
+    re.MULTILINE,
+)
+# hunk 头部 @@ ... @@ 之后的上下文通常是所在函数/类的签名
+HUNK_CONTEXT_RE = re.compile(r"^@@[^@]*@@\s*(?:.*?\b(?:def|class|function|func|fn)\s+)?([A-Za-z_]\w*)?", re.MULTILINE)
+IDENTIFIER_RE = re.compile(r"[A-Za-z_]\w*")
+
+# 统计语言种类时只认编程语言的源码扩展名；配置、文档等（.yml/.json/.md...）不计入
+LANGUAGE_BY_EXTENSION = {
+    "py": "python", "pyi": "python", "java": "java", "kt": "kotlin", "kts": "kotlin", "scala": "scala",
+    "groovy": "groovy", "go": "go", "rs": "rust", "c": "c", "h": "c", "cc": "cpp", "cpp": "cpp", "cxx": "cpp",
+    "hpp": "cpp", "hh": "cpp", "cs": "csharp", "js": "javascript", "jsx": "javascript", "mjs": "javascript",
+    "cjs": "javascript", "ts": "typescript", "tsx": "typescript", "vue": "vue", "svelte": "svelte", "php": "php",
+    "rb": "ruby", "swift": "swift", "m": "objc", "mm": "objc", "dart": "dart", "lua": "lua", "pl": "perl",
+    "r": "r", "sh": "shell", "bash": "shell", "sql": "sql", "ex": "elixir", "exs": "elixir", "erl": "erlang",
+    "hs": "haskell", "clj": "clojure", "fs": "fsharp", "vb": "vb", "zig": "zig", "sol": "solidity",
+}
+
+# 长度过短的符号容易误匹配，不参与跨文件引用统计
+_MIN_SYMBOL_LENGTH = 4
+
+
+@dataclass
+class ChangeStats:
+    """变更集特征"""
+    lines: int = 0
+    files: int = 0
+    tokens: int = 0
+    languages: Set[str] = field(default_factory=set)
+    cross_file_refs: int = 0
+
+
+@dataclass
+class ReviewPlan:
+    """评审计划：策略、模型与 Agent 预算"""
+    strategy: str
+    tier: str
+    model: Optional[str] = None
+    max_iterations: int = 20
+    total_token_cap: int = 80_000
+    reason: str = ""
+
+
+@dataclass
+class PlannerPolicy:
+    """规划阈值，均可通过环境变量配置"""
+    small_max_lines: int = 50
+    small_max_files: int = 3
+    agentic_min_lines: int = 400
+    agentic_min_files: int = 10
+    agentic_min_cross_refs: int = 3
+    agentic_min_languages: int = 3
+    cheap_model: Optional[str] = None
+    strong_model: Optional[str] = None
+    max_iterations: int = 20
+    min_iterations: int = 6
+    total_token_cap: int = 80_000
+    min_token_cap: int = 30_000
+
+    @classmethod
+    def from_env(cls) -> "PlannerPolicy":
+        return cls(
+            small_max_lines=int(os.getenv("REVIEW_PLANNER_SMALL_MAX_LINES", "50")),
+            small_max_files=int(os.getenv("REVIEW_PLANNER_SMALL_MAX_FILES", "3")),
+            agentic_min_lines=int(os.getenv("REVIEW_PLANNER_AGENTIC_MIN_LINES", "400")),
+            agentic_min_files=int(os.getenv("REVIEW_PLANNER_AGENTIC_MIN_FILES", "10")),
+            agentic_min_cross_refs=int(os.getenv("REVIEW_PLANNER_AGENTIC_MIN_CROSS_REFS", "3")),
+            agentic_min_languages=int(os.getenv("REVIEW_PLANNER_AGENTIC_MIN_LANGUAGES", "3")),
+            cheap_model=os.getenv("REVIEW_CHEAP_MODEL") or None,
+            strong_model=os.getenv("REVIEW_STRONG_MODEL") or None,
+            max_iterations=int(os.getenv("AGENT_MAX_ITERATIONS", "20")),
+            min_iterations=int(os.getenv("AGENT_MIN_ITERATIONS", "6")),
+            total_token_cap=int(os.getenv("AGENT_TOTAL_TOKEN_CAP", "80000")),
+            min_token_cap=int(os.getenv("AGENT_MIN_TOKEN_CAP", "30000")),
+        )
+
+
+def _path(change: Dict[str, Any]) -> str:
+    return change.get("new_path") or change.get("old_path") or ""
+
+
+def _language(path: str) -> Optional[str]:
+    return LANGUAGE_BY_EXTENSION.get(os.path.splitext(path)[1].lower().lstrip("."))
+
+
+def _changed_symbols(diff: str) -> Set[str]:
+    """提取 diff 中被定义或修改的符号名（函数/类等）"""
+    symbols = set(SYMBOL_DEF_RE.findall(diff))
+    symbols.update(s for s in HUNK_CONTEXT_RE.findall(diff) if s)
+    return {s for s in symbols if len(s) >= _MIN_SYMBOL_LENGTH}
+
+
+def _changed_lines(diff: str) -> str:
+    return "\n".join(line for line in diff.splitlines()
+                     if line[:1] in "+-" and not line.startswith(("+++", "---")))
+
+
+def analyze_changes(changes: List[Dict[str, Any]]) -> ChangeStats:
+    """
+    统计变更集特征：改动行数、文件数、token 数、语言种类，以及跨文件符号引用数
+    （文件 A 中被定义/修改的符号出现在文件 B 的改动行里，计 1 次）。
+    lockfile、生成代码、vendored 文件只计入 token 数，不计入行数、文件数与语言种类；
+    语言种类只统计源码文件（测试、文档、配置文件不计入）。
+
+    Args:
+        changes: 变更列表，每项包含 new_path/diff/additions/deletions。
+
+    Returns:
+        ChangeStats
+    """
+    stats = ChangeStats()
+    symbols_by_file: Dict[int, Set[str]] = {}
+    identifiers_by_file: Dict[int, Set[str]] = {}
+    for index, change in enumerate(changes):
+        if not isinstance(change, dict):
+            continue
+        diff = change.get("diff") or ""
+        path = _path(change)
+        stats.tokens += count_tokens(diff)
+        category = classify_file(path, diff)
+        if category in ("lockfile", "generated", "vendored"):
+            continue
+        stats.lines += int(change.get("additions") or 0) + int(change.get("deletions") or 0)
+        stats.files += 1
+        language = _language(path) if category == "source" else None
+        if language:
+            stats.languages.add(language)
+        symbols_by_file[index] = _changed_symbols(diff)
+        identifiers_by_file[index] = set(IDENTIFIER_RE.findall(_changed_lines(diff)))
+
+    for index, symbols in symbols_by_file.items():
+        for symbol in symbols:
+            stats.cross_file_refs += sum(1 for other, identifiers in identifiers_by_file.items()
+                                         if other != index and symbol in identifiers)
+    return stats
+
+
+def plan_review(changes: List[Dict[str, Any]], policy: Optional[PlannerPolicy] = None) -> ReviewPlan:
+    """
+    根据变更规模选择评审策略、模型和 Agent 预算：
+    - small：改动行数与文件数都很少且无跨文件引用 → diff_only + 廉价模型，秒级返回；
+    - large：改动行数/文件数/跨文件引用/语言种类任一超过阈值 → agentic + 强模型，
+      迭代次数与 token 上限按变更规模在 [最小值, 最大值] 之间缩放；
+    - medium：其余情况 → diff_only + 强模型。
+
+    Args:
+        changes: 变更列表。
+        policy: 规划阈值，默认从环境变量读取。
+
+    Returns:
+        ReviewPlan
+    """
+    policy = policy or PlannerPolicy.from_env()
+    stats = analyze_changes(changes)
+    summary = (f"lines={stats.lines} files={stats.files} tokens={stats.tokens} "
+               f"languages={len(stats.languages)} cross_file_refs={stats.cross_file_refs}")
+
+    if (stats.lines <= policy.small_max_lines and stats.files <= policy.small_max_files
+            and stats.cross_file_refs == 0):
+        return ReviewPlan(strategy="diff_only", tier="small", model=policy.cheap_model,
+                          max_iterations=0, total_token_cap=0, reason=summary)
+
+    if (stats.lines >= policy.agentic_min_lines or stats.files >= policy.agentic_min_files
+            or stats.cross_file_refs >= policy.agentic_min_cross_refs
+            or len(stats.languages) >= policy.agentic_min_languages):
+        # 每个文件约需 2 轮工具调用；token 上限预留 diff 本身的 4 倍用于探索
+        max_iterations = min(policy.max_iterations, max(policy.min_iterations, 4 + 2 * stats.files))
+        total_token_cap = min(policy.total_token_cap, max(policy.min_token_cap, 4 * stats.tokens))
+        return ReviewPlan(strategy="agentic", tier="large", model=policy.strong_model,
+                          max_iterations=max_iterations, total_token_cap=total_token_cap, reason=summary)
+
+    return ReviewPlan(strategy="diff_only", tier="medium", model=policy.strong_model,
+                      max_iterations=0, total_token_cap=0, reason=summary)
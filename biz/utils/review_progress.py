@@ -0,0 +1,31 @@
+import os
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from biz.utils.log import logger
+
+
+class ThrottledProgress:
+    """
+    节流的进度回调：流式输出时每个 chunk 都会回调，这里按最小间隔（REVIEW_PROGRESS_INTERVAL，秒）
+    转发给 publish（如更新 MR 评论），第一次回调立即转发。publish 抛出的异常只记录日志，不影响审查。
+    """
+
+    def __init__(self, publish: Callable[[str], Any], min_interval: Optional[float] = None):
+        self.publish = publish
+        self.min_interval = (min_interval if min_interval is not None
+                             else float(os.getenv("REVIEW_PROGRESS_INTERVAL", "5")))
+        self._last_published: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def __call__(self, text: str) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if self._last_published is not None and now - self._last_published < self.min_interval:
+                return
+            self._last_published = now
+        try:
+            self.publish(text)
+        except Exception as e:
+            logger.warning("failed to publish review progress: %s", e)
@@ -0,0 +1,68 @@
+import fcntl
+import json
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator
+
+from biz.utils.log import logger
+
+
+class JsonStateStore:
+    """
+    基于 JSON 文件 + fcntl 文件锁的跨进程共享状态。
+
+    每个 webhook 事件都在独立的子进程中处理（见 biz/utils/queue.py），进程内的内存状态
+    会随子进程退出而丢失。需要在多个审查任务之间共享的少量统计数据（如 LLM 供应商健康度）
+    通过本类持久化到 data/ 目录下。
+    """
+
+    def __init__(self, path: Path | str):
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+
+    @contextmanager
+    def _locked(self, lock_type: int) -> Iterator[None]:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_path, "a") as f:
+            fcntl.flock(f.fileno(), lock_type)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def _load(self) -> Dict[str, Any]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"状态文件 {self.path} 读取失败，将重新初始化: {e}")
+            return {}
+
+    def read(self) -> Dict[str, Any]:
+        """读取当前状态的快照（共享锁）"""
+        with self._locked(fcntl.LOCK_SH):
+            return self._load()
+
+    def read_unlocked(self) -> Dict[str, Any]:
+        """
+        不加锁读取快照，用于高频路径上的快速判断。写入通过 os.replace 原子完成，
+        读到的总是某个完整版本（可能略旧），需要据此修改状态时应在 transaction 中重新检查。
+        """
+        return self._load()
+
+    @contextmanager
+    def transaction(self) -> Iterator[Dict[str, Any]]:
+        """
+        以排他锁读取状态并在退出时原子写回，调用方直接修改 yield 出的 dict 即可。
+        """
+        with self._locked(fcntl.LOCK_EX):
+            data = self._load()
+            yield data
+            tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
@@ -1,16 +1,36 @@
-from typing import Optional
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
 
 import tiktoken
 
 from biz.utils.log import logger
 
-# 缓存编码器实例
-_encoding_cache: Optional[tiktoken.Encoding] = None
+DEFAULT_ENCODING = "cl100k_base"
 
+# 缓存编码器实例；加载失败的编码名也记录下来，避免离线时每次调用都重新尝试下载
+_encoding_cache: Dict[str, tiktoken.Encoding] = {}
+_encoding_failed: set = set()
+_encoding_lock = threading.Lock()
 
-def _get_encoding_cached(encoding_name: str = "cl100k_base") -> Optional[tiktoken.Encoding]:
+# token 计数缓存：按内容哈希记录，短文本直接计算更快，不进入缓存
+_MEMO_MIN_CHARS = 256
+_MEMO_MAX_ENTRIES = 4096
+_count_memo: "OrderedDict[tuple, int]" = OrderedDict()
+_memo_lock = threading.Lock()
+
+# 截断时先按每 token 约 4 个字符取前缀编码，不够再翻倍
+_PREFIX_CHARS_PER_TOKEN = 4
+
+_CJK_RUN = re.compile(r"[\u4e00-\u9fff]+")
+
+
+def _get_encoding_cached(encoding_name: str = DEFAULT_ENCODING) -> Optional[tiktoken.Encoding]:
     """
     获取编码器，带缓存和错误处理。
+    加载失败只尝试一次，之后直接返回 None，由调用方使用估算。
 
     Args:
         encoding_name: 编码器名称
@@ -18,16 +38,25 @@ def _get_encoding_cached(encoding_name: str = "cl100k_base") -> Optional[tiktoke
     Returns:
         编码器实例，如果失败则返回 None
     """
-    global _encoding_cache
-    if _encoding_cache is not None:
-        return _encoding_cache
+    encoding = _encoding_cache.get(encoding_name)
+    if encoding is not None or encoding_name in _encoding_failed:
+        return encoding
 
-    try:
-        _encoding_cache = tiktoken.get_encoding(encoding_name)
-        return _encoding_cache
-    except Exception as e:
-        logger.warning(f"Failed to load tiktoken encoding '{encoding_name}': {e}")
-        return None
+    with _encoding_lock:
+        if encoding_name in _encoding_cache or encoding_name in _encoding_failed:
+            return _encoding_cache.get(encoding_name)
+        try:
+            _encoding_cache[encoding_name] = tiktoken.get_encoding(encoding_name)
+            return _encoding_cache[encoding_name]
+        except Exception as e:
+            _encoding_failed.add(encoding_name)
+            logger.warning(f"Failed to load tiktoken encoding '{encoding_name}', falling back to estimation: {e}")
+            return None
+
+
+def _count_cjk(text: str) -> int:
+    """按连续中文片段统计中文字符数，避免逐字符的 Python 循环。"""
+    return sum(len(run) for run in _CJK_RUN.findall(text))
 
 
 def _estimate_tokens_simple(text: str) -> int:
@@ -44,8 +73,7 @@ def _estimate_tokens_simple(text: str) -> int:
     if not text:
         return 0
 
-    # 统计中文字符和英文字符
-    chinese_chars = sum(1 for c in text if '\u4e00' <= c <= '\u9fff')
+    chinese_chars = _count_cjk(text)
     other_chars = len(text) - chinese_chars
 
     # 估算：中文约2字符/token，英文/其他约4字符/token
@@ -53,26 +81,88 @@ def _estimate_tokens_simple(text: str) -> int:
     return max(estimated_tokens, 1)
 
 
-def count_tokens(text: str) -> int:
+def _memo_key(text: str, encoding_name: str) -> tuple:
+    return encoding_name, hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+def _memo_get(key: tuple) -> Optional[int]:
+    with _memo_lock:
+        count = _count_memo.get(key)
+        if count is not None:
+            _count_memo.move_to_end(key)
+        return count
+
+
+def _memo_put(key: tuple, count: int) -> None:
+    with _memo_lock:
+        _count_memo[key] = count
+        _count_memo.move_to_end(key)
+        while len(_count_memo) > _MEMO_MAX_ENTRIES:
+            _count_memo.popitem(last=False)
+
+
+def _encode(encoding: tiktoken.Encoding, text: str) -> List[int]:
+    # 与 tiktoken 默认行为不同，文本中的特殊 token（如 diff 里出现的 <|endoftext|>）按普通文本处理
+    return encoding.encode(text, disallowed_special=())
+
+
+def count_tokens(text: str, encoding_name: str = DEFAULT_ENCODING) -> int:
     """
     计算文本的 token 数量。
 
     Args:
         text (str): 输入文本。
+        encoding_name (str): 使用的编码器名称，默认为 "cl100k_base"。
 
     Returns:
         int: token 数量。
     """
-    encoding = _get_encoding_cached()
-    if encoding is not None:
-        return len(encoding.encode(text))
-    # Offline fallback: 使用简单估算
-    return _estimate_tokens_simple(text)
+    return count_tokens_batch([text], encoding_name)[0]
 
 
-def truncate_text_by_tokens(text: str, max_tokens: int, encoding_name: str = "cl100k_base") -> str:
+def count_tokens_batch(texts: Sequence[str], encoding_name: str = DEFAULT_ENCODING) -> List[int]:
+    """
+    批量计算多段文本的 token 数量，未命中缓存的文本通过 encode_batch 一次编码。
+
+    Args:
+        texts: 文本列表。
+        encoding_name (str): 使用的编码器名称，默认为 "cl100k_base"。
+
+    Returns:
+        List[int]: 与 texts 一一对应的 token 数量。
+    """
+    encoding = _get_encoding_cached(encoding_name)
+    if encoding is None:
+        # Offline fallback: 使用简单估算
+        return [_estimate_tokens_simple(text) for text in texts]
+
+    counts: List[Optional[int]] = [None] * len(texts)
+    pending: List[int] = []
+    keys: Dict[int, tuple] = {}
+    for i, text in enumerate(texts):
+        if len(text) >= _MEMO_MIN_CHARS:
+            keys[i] = _memo_key(text, encoding_name)
+            counts[i] = _memo_get(keys[i])
+        if counts[i] is None:
+            pending.append(i)
+
+    if len(pending) == 1:
+        encoded = [_encode(encoding, texts[pending[0]])]
+    elif pending:
+        encoded = encoding.encode_batch([texts[i] for i in pending], disallowed_special=())
+    else:
+        encoded = []
+    for i, tokens in zip(pending, encoded):
+        counts[i] = len(tokens)
+        if i in keys:
+            _memo_put(keys[i], counts[i])
+    return counts
+
+
+def truncate_text_by_tokens(text: str, max_tokens: int, encoding_name: str = DEFAULT_ENCODING) -> str:
     """
     根据最大 token 数量截断文本。
+    只对足够覆盖 max_tokens 的前缀编码，耗时取决于输出大小而不是输入大小。
 
     Args:
         text (str): 需要截断的原始文本。
@@ -82,20 +172,28 @@ def truncate_text_by_tokens(text: str, max_tokens: int, encoding_name: str = "cl
     Returns:
         str: 截断后的文本。
     """
+    if not text:
+        return text
+    if max_tokens <= 0:
+        return ""
+
     encoding = _get_encoding_cached(encoding_name)
     if encoding is not None:
-        tokens = encoding.encode(text)
-        if len(tokens) > max_tokens:
-            truncated_tokens = tokens[:max_tokens]
-            return encoding.decode(truncated_tokens)
-        return text
+        prefix_chars = max_tokens * _PREFIX_CHARS_PER_TOKEN
+        while True:
+            prefix = text[:prefix_chars]
+            tokens = _encode(encoding, prefix)
+            if len(tokens) > max_tokens:
+                # 只有前缀末尾被切开的片段可能与完整编码不同；结果仍是原文不超过 max_tokens 的前缀
+                return encoding.decode(tokens[:max_tokens])
+            if len(prefix) == len(text):
+                return text
+            prefix_chars *= 2
 
     # Offline fallback: 使用字符数估算截断
-    if not text:
-        return text
-
-    chinese_chars = sum(1 for c in text if '\u4e00' <= c <= '\u9fff')
-    other_chars = len(text) - chinese_chars
+    head = text[:max_tokens * 4]
+    chinese_chars = _count_cjk(head)
+    other_chars = len(head) - chinese_chars
     # 估算每token对应的字符数
     chars_per_token = 2 if chinese_chars > other_chars else 4
     max_chars = max_tokens * chars_per_token
@@ -107,4 +205,4 @@ def truncate_text_by_tokens(text: str, max_tokens: int, encoding_name: str = "cl
 if __name__ == '__main__':
     text = "Hello, world! This is a test text for token counting."
     print(count_tokens(text))  # 输出：11
-    print(truncate_text_by_tokens(text, 5))  # 输出："Hello, world!"
\ No newline at end of file
+    print(truncate_text_by_tokens(text, 5))  # 输出："Hello, world!"
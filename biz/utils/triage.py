@@ -0,0 +1,255 @@
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from biz.utils.context_packer import GENERATED_MARKER_RE, classify_file, is_whitespace_only_hunk, split_hunks
+from biz.utils.log import logger
+from biz.utils.state_store import JsonStateStore
+
+try:
+    from lizard_languages import get_reader_for
+except ImportError:  # lizard 不可用时仅使用 diff 规则
+    get_reader_for = None
+
+# 可被判定为“无需 LLM 审查”的变更类型
+TRIVIAL_KINDS = ("whitespace", "comment", "version", "lockfile", "generated", "vendored")
+
+TRIAGE_KIND_LABELS = {
+    "whitespace": "格式/空白调整",
+    "comment": "注释修改",
+    "version": "版本号变更",
+    "lockfile": "依赖锁文件更新",
+    "generated": "生成代码",
+    "vendored": "第三方代码",
+}
+
+# 版本号：1.2 / 1.2.3 / v1.2.3-rc.1 / 1.2.3+build 等
+VERSION_RE = re.compile(r"\bv?\d+(?:\.\d+)+(?:[-+][0-9A-Za-z.-]+)?\b")
+# 依赖声明写法：pkg==1.2.3 / "pkg": "^1.2.3" / pkg = "~1.2.3"
+DEPENDENCY_PIN_RE = re.compile(r"(?:==|>=|<=|~=|\^|~|[\"']\s*:\s*[\"']|=\s*[\"'])\s*v?\d+\.\d+\.\d+")
+# 跳过“生成代码”需要强信号：生成工具特有的文件名，或文件自身头部未改动的行中带有生成标记。
+# build/、dist/ 等目录名以及 diff 新增行里的标记都可能出现在手写代码中，不足以跳过审查。
+GENERATED_FILE_RE = re.compile(
+    r"(\.min\.(js|css)$|\.bundle\.js$|_pb2(_grpc)?\.pyi?$|\.pb\.go$|\.pb\.(cc|h)$|\.g\.dart$|\.generated\.)"
+)
+HUNK_NEW_START_RE = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)(?:,\d+)? @@")
+GENERATED_HEADER_LINES = 5
+
+
+@dataclass
+class TriageResult:
+    """分诊结果：trivial 为 True 表示可跳过 LLM 审查；files 记录每个文件的判定类型"""
+    trivial: bool
+    files: List[Dict[str, str]] = field(default_factory=list)
+    lines: int = 0
+    reason: str = ""
+
+
+def _enabled() -> bool:
+    return os.getenv("TRIAGE_ENABLED", "1") == "1"
+
+
+def _skip_kinds() -> set:
+    raw = os.getenv("TRIAGE_SKIP_KINDS", ",".join(TRIVIAL_KINDS))
+    return {kind.strip() for kind in raw.split(",") if kind.strip()}
+
+
+def _hunk_sides(hunk: str) -> tuple:
+    """还原 hunk 修改前/后的文本（上下文行两侧都保留），以及被删除/新增的行"""
+    old_lines, new_lines, removed, added = [], [], [], []
+    for line in hunk.splitlines():
+        if line.startswith("@@") or line.startswith("\\"):
+            continue
+        if line.startswith("-"):
+            old_lines.append(line[1:])
+            removed.append(line[1:])
+        elif line.startswith("+"):
+            new_lines.append(line[1:])
+            added.append(line[1:])
+        else:
+            old_lines.append(line[1:])
+            new_lines.append(line[1:])
+    return "\n".join(old_lines), "\n".join(new_lines), removed, added
+
+
+def _code_tokens(path: str, text: str) -> Optional[List[str]]:
+    """
+    使用 lizard 的语言词法分析器提取去除注释和空白后的 token 序列；
+    不支持的语言返回 None。
+    """
+    if get_reader_for is None:
+        return None
+    reader = get_reader_for(path)
+    if reader is None:
+        return None
+    try:
+        return [token for token in reader.generate_tokens(text)
+                if not token.isspace() and reader.get_comment_from_token(token) is None]
+    except Exception as e:
+        logger.debug("lizard tokenize failed for %s: %s", path, e)
+        return None
+
+
+def _is_version_bump(removed: List[str], added: List[str]) -> bool:
+    """删除行与新增行一一对应，且仅版本号不同"""
+    if not removed or len(removed) != len(added):
+        return False
+    for old, new in zip(removed, added):
+        if not (VERSION_RE.search(old) and VERSION_RE.search(new)):
+            return False
+        # 没有 version 字样时只接受 x.y.z 形式的依赖声明，避免把 timeout = 1.5 之类的数值修改当作版本号
+        if "version" not in new.lower() and not DEPENDENCY_PIN_RE.search(new):
+            return False
+        if VERSION_RE.sub("<v>", old).strip() != VERSION_RE.sub("<v>", new).strip():
+            return False
+    return True
+
+
+def _has_generated_header(diff: str) -> bool:
+    """文件前 GENERATED_HEADER_LINES 行中未被本次修改的行是否带有生成标记"""
+    hunks = split_hunks(diff)
+    if not hunks:
+        return False
+    lines = hunks[0].splitlines()
+    match = HUNK_NEW_START_RE.match(lines[0]) if lines else None
+    if not match:
+        return False
+    line_no = int(match.group(1))
+    for line in lines[1:]:
+        if line_no > GENERATED_HEADER_LINES:
+            break
+        if line.startswith("-") or line.startswith("\\"):
+            continue
+        if line.startswith(" ") and GENERATED_MARKER_RE.search(line):
+            return True
+        line_no += 1
+    return False
+
+
+def _is_generated(path: str, diff: str) -> bool:
+    return bool(GENERATED_FILE_RE.search(path)) or _has_generated_header(diff)
+
+
+def classify_hunk(path: str, hunk: str) -> str:
+    """
+    判定单个 hunk 的类型：whitespace / comment / version / code。
+    comment 的判定依赖 lizard 词法分析：修改前后去除注释的 token 序列一致。
+    """
+    if is_whitespace_only_hunk(hunk):
+        return "whitespace"
+    old_text, new_text, removed, added = _hunk_sides(hunk)
+    if _is_version_bump(removed, added):
+        return "version"
+    old_tokens = _code_tokens(path, old_text)
+    if old_tokens is not None and old_tokens == _code_tokens(path, new_text):
+        return "comment"
+    return "code"
+
+
+def classify_change(change: Dict[str, Any]) -> str:
+    """
+    判定单个文件变更的类型：lockfile / vendored 直接按文件类别返回，generated 还需满足 _is_generated；
+    其余文件的所有 hunk 都属于同一种非 code 类型时返回该类型（混合时按 comment > whitespace
+    > version 的顺序取最“重”者），任一 hunk 为 code 则返回 code。
+    """
+    path = change.get("new_path") or change.get("old_path") or ""
+    diff = change.get("diff") or ""
+    category = classify_file(path, diff)
+    if category in ("lockfile", "vendored"):
+        return category
+    if category == "generated" and _is_generated(path, diff):
+        return category
+    hunks = split_hunks(diff)
+    # filter_changes 不保留 new_file 等标记，新文件只能从 diff 的 hunk 头（@@ -0,0 ...）识别
+    if hunks and hunks[0].startswith("@@ -0,0 "):
+        return "code"
+    if not hunks:
+        return "code"
+    kinds = {classify_hunk(path, hunk) for hunk in hunks}
+    for kind in ("code", "comment", "whitespace", "version"):
+        if kind in kinds:
+            return kind
+    return "code"
+
+
+def triage_changes(changes: List[Any]) -> TriageResult:
+    """
+    LLM 审查前的静态分诊：当所有变更文件都属于可跳过的类型（TRIAGE_SKIP_KINDS），
+    且源码类改动（注释/格式/版本号）的总行数不超过 TRIAGE_MAX_LINES 时，判定为 trivial。
+
+    Args:
+        changes: filter_changes 返回的变更列表。
+
+    Returns:
+        TriageResult
+    """
+    if not _enabled() or not changes or not all(isinstance(c, dict) for c in changes):
+        return TriageResult(trivial=False, reason="disabled or unstructured changes")
+
+    skip_kinds = _skip_kinds()
+    max_lines = int(os.getenv("TRIAGE_MAX_LINES", "200"))
+    files = []
+    lines = 0
+    for change in changes:
+        kind = classify_change(change)
+        path = change.get("new_path") or change.get("old_path") or ""
+        files.append({"path": path, "kind": kind})
+        if kind not in skip_kinds:
+            return TriageResult(trivial=False, files=files, reason=f"{path}: {kind}")
+        if kind not in ("lockfile", "generated", "vendored"):
+            lines += int(change.get("additions") or 0) + int(change.get("deletions") or 0)
+    if lines > max_lines:
+        return TriageResult(trivial=False, files=files, lines=lines,
+                            reason=f"{lines} changed lines exceed TRIAGE_MAX_LINES={max_lines}")
+    return TriageResult(trivial=True, files=files, lines=lines,
+                        reason=", ".join(sorted({f["kind"] for f in files})))
+
+
+def get_neutral_score() -> int:
+    """跳过 LLM 审查时使用的中性分数（TRIAGE_NEUTRAL_SCORE，默认 80）"""
+    return int(os.getenv("TRIAGE_NEUTRAL_SCORE", "80"))
+
+
+def format_triage_result(result: TriageResult) -> str:
+    """
+    生成跳过 LLM 审查时的模板化审查结果，包含可被 parse_review_score 解析的总分。
+    """
+    rows = "\n".join(f"| {f['path']} | {TRIAGE_KIND_LABELS.get(f['kind'], f['kind'])} |" for f in result.files)
+    return (
+        "### 自动分诊：本次变更无需 AI 深度审查\n\n"
+        "静态分析判定本次变更仅包含格式、注释、版本号或依赖锁文件等低风险修改，已跳过大模型审查。\n\n"
+        "| 文件 | 变更类型 |\n"
+        "| --- | --- |\n"
+        f"{rows}\n\n"
+        f"总分:{get_neutral_score()}分"
+    )
+
+
+class TriageStats:
+    """
+    分诊计数（总数 / 跳过数 / 按类型统计），以 JSON 文件（TRIAGE_STATS_FILE）在各 worker 进程间共享。
+    """
+
+    def __init__(self, path: str = None):
+        self.store = JsonStateStore(path or os.getenv("TRIAGE_STATS_FILE", "data/triage_stats.json"))
+
+    def record(self, result: TriageResult) -> None:
+        with self.store.transaction() as state:
+            state["total"] = state.get("total", 0) + 1
+            if result.trivial:
+                state["skipped"] = state.get("skipped", 0) + 1
+                by_kind = state.setdefault("skipped_by_kind", {})
+                for kind in {f["kind"] for f in result.files}:
+                    by_kind[kind] = by_kind.get(kind, 0) + 1
+
+    def summary(self) -> Dict[str, Any]:
+        state = self.store.read()
+        total = state.get("total", 0)
+        skipped = state.get("skipped", 0)
+        return {
+            "total": total,
+            "skipped": skipped,
+            "skip_rate": round(skipped / total, 4) if total else 0.0,
+            "skipped_by_kind": state.get("skipped_by_kind", {}),
+        }
@@ -50,6 +50,21 @@ class TestWebhookStrategy:
                 assert out == "AGENTIC_OK"
                 MockAR.assert_called_once()
 
+    def test_agentic_reviewer_gets_target_branch_and_paths(self, monkeypatch):
+        monkeypatch.setenv("REVIEW_STRATEGY", "agentic")
+        with patch("biz.agent.agentic_reviewer.AgenticReviewer") as MockAR:
+            MockAR.return_value.review.return_value = "AGENTIC_OK"
+            _review_with_strategy(
+                changes=[{"new_path": "src/a.py", "diff": "+x"}],
+                commits_text="c",
+                webhook_data=GL_PAYLOAD,
+                gitlab_url="http://x",
+            )
+            kwargs = MockAR.call_args.kwargs
+            assert kwargs["ref"] == "deadbeef"
+            assert kwargs["base_ref"] == "main"
+            assert kwargs["changed_paths"] == ["src/a.py"]
+
 
 GL_PUSH_PAYLOAD = {
     "object_kind": "push",
@@ -92,3 +107,44 @@ class TestGitLabPushAgentic:
                     ref="abcdef1234567890",
                     cache_root="data/repo_cache",
                 )
+
+
+class TestProgressNote:
+    def _run(self, monkeypatch, fake_review):
+        from biz.queue import worker
+
+        monkeypatch.setenv("REVIEW_PROGRESS_NOTE_ENABLED", "1")
+        monkeypatch.setenv("REVIEW_PROGRESS_INTERVAL", "0")
+        with patch.object(worker, "MergeRequestHandler") as MockHandler, \
+                patch.object(worker, "ReviewService") as MockService, \
+                patch.object(worker, "event_manager"), \
+                patch.object(worker, "filter_changes", side_effect=lambda c: c), \
+                patch.object(worker, "_review_with_strategy", side_effect=fake_review):
+            handler = MockHandler.return_value
+            handler.action = "open"
+            handler.get_merge_request_changes.return_value = [{"new_path": "a.py", "diff": "+x", "additions": 1}]
+            handler.get_merge_request_commits.return_value = [{"message": "m"}]
+            handler.create_merge_request_note.return_value = 42
+            handler.update_merge_request_note.return_value = True
+            MockService.check_mr_last_commit_id_exists.return_value = False
+            worker.handle_merge_request_event(GL_PAYLOAD, "token", "http://x", "x")
+        return handler
+
+    def test_progress_note_is_updated_in_place(self, monkeypatch):
+        def fake_review(*args, on_progress=None, **kwargs):
+            on_progress("总分:")
+            return "总分:88分"
+
+        handler = self._run(monkeypatch, fake_review)
+        handler.create_merge_request_note.assert_called_once()
+        bodies = [c.args for c in handler.update_merge_request_note.call_args_list]
+        assert bodies[0][0] == 42 and bodies[0][1].endswith("总分:")
+        assert bodies[-1] == (42, "Auto Review Result: \n总分:88分")
+        handler.add_merge_request_notes.assert_not_called()
+
+    def test_failed_review_marks_note(self, monkeypatch):
+        def fake_review(*args, **kwargs):
+            raise RuntimeError("llm down")
+
+        handler = self._run(monkeypatch, fake_review)
+        assert "失败" in handler.update_merge_request_note.call_args.args[1]
@@ -63,7 +63,9 @@ class TestEndToEndAgentic:
         result = reviewer.review(diffs_text="+ new line", commits_text="add line")
 
         assert "85" in result
-        assert (cache / "int_proj").exists()
+        # Shared object store stays cached; the job's worktree is released.
+        assert (cache / "int_proj.git").exists()
+        assert list((cache / "worktrees" / "int_proj").iterdir()) == []
         assert mock_client.chat_with_tools.called
 
     def test_agentic_reviewer_degrades_when_runner_raises(self, tmp_path, tiny_remote, monkeypatch):
@@ -56,6 +56,17 @@ class TestNativeMode:
         resp = adapter.completions_with_tools(messages=[{"role": "user", "content": "?"}], tools=[])
         assert resp.content == "done"
         assert resp.tool_calls == []
+        assert resp.usage is None
+
+    def test_reported_usage_is_kept(self):
+        client = FakeNativeClient({
+            "content": "done",
+            "tool_calls": [],
+            "raw": object(),
+            "usage": {"model": "m", "input_tokens": 120, "output_tokens": 8, "cached_tokens": 0, "latency_ms": 5},
+        })
+        resp = LLMAdapter(client).completions_with_tools(messages=[{"role": "user", "content": "?"}], tools=[])
+        assert (resp.usage.input_tokens, resp.usage.output_tokens) == (120, 8)
 
 
 class TestJsonFallback:
@@ -81,6 +92,14 @@ class TestJsonFallback:
         assert resp.content == "just plain text, no tools needed"
         assert resp.tool_calls == []
 
+    def test_usage_read_from_client_last_usage(self):
+        from biz.llm.usage import LLMUsage
+        client = FakeLegacyClient("ok")
+        client.last_usage = LLMUsage(model="m", input_tokens=64, output_tokens=2)
+        resp = LLMAdapter(client, use_native=False).completions_with_tools(
+            messages=[{"role": "user", "content": "?"}], tools=[])
+        assert resp.usage.input_tokens == 64
+
     def test_legacy_client_without_chat_with_tools_falls_back(self):
         # Client that has no chat_with_tools at all.
         client = FakeLegacyClient("ok")
@@ -106,3 +125,28 @@ class TestBuildMessages:
         assert msg["role"] == "tool"
         assert msg["tool_call_id"] == "42"
         assert msg["content"] == "out"
+
+
+class TestCapabilityDetection:
+    def test_detection_does_not_call_the_client(self):
+        client = FakeNativeClient({"content": "x", "tool_calls": [], "raw": None})
+        adapter = LLMAdapter(client)
+        assert adapter.use_native is True
+        assert client.calls == []
+
+    def test_registry_decides_for_base_clients(self):
+        from biz.llm.client.base import BaseClient
+
+        class DeepSeekStub(BaseClient):
+            provider = "deepseek"
+            default_model = "deepseek-chat"
+
+            def completions(self, messages, model=None):
+                return ""
+
+            def chat_with_tools(self, messages, tools=None, model=None):
+                raise AssertionError("must not be probed")
+
+        assert LLMAdapter(DeepSeekStub()).use_native is True
+        # deepseek-reasoner has no function calling: use the JSON protocol
+        assert LLMAdapter(DeepSeekStub(), model="deepseek-reasoner").use_native is False
@@ -0,0 +1,71 @@
+import fcntl
+import os
+import time
+from pathlib import Path
+
+from biz.agent.repo_cache import RepoCacheManager
+
+
+def _store(cache: Path, key: str, size: int, age_hours: float) -> None:
+    store = cache / f"{key}.git"
+    (store / "objects").mkdir(parents=True)
+    (store / "objects" / "pack").write_bytes(b"x" * size)
+    used = time.time() - age_hours * 3600
+    (store / "last_used").touch()
+    os.utime(store / "last_used", (used, used))
+
+
+def test_evicts_least_recently_used_until_under_quota(tmp_path):
+    cache = tmp_path / "cache"
+    for key, age in (("old", 30), ("mid", 20), ("new", 10)):
+        _store(cache, key, 1000, age)
+    manager = RepoCacheManager(cache, quota_bytes=2500)
+
+    assert manager.maintain() == ["old"]
+    assert not (cache / "old.git").exists() and (cache / "mid.git").exists()
+    summary = manager.summary()
+    assert summary["repos"] == 2 and summary["evictions"] == 1 and summary["evicted_bytes"] >= 1000
+
+
+def test_skips_locked_and_in_use_projects(tmp_path):
+    cache = tmp_path / "cache"
+    for key, age in (("locked", 30), ("busy", 20), ("idle", 10), ("new", 1)):
+        _store(cache, key, 1000, age)
+    (cache / "worktrees" / "busy" / "job").mkdir(parents=True)
+    manager = RepoCacheManager(cache, quota_bytes=3000)
+
+    with open(cache / "locked.lock", "w") as held:
+        fcntl.flock(held.fileno(), fcntl.LOCK_EX)
+        assert manager.maintain() == ["idle"]
+    assert (cache / "locked.git").exists() and (cache / "busy.git").exists()
+
+
+def test_record_sync_counts_outcomes(tmp_path):
+    cache = tmp_path / "cache"
+    _store(cache, "g_p", 10, 0)
+    manager = RepoCacheManager(cache, quota_bytes=0)
+    for outcome in ("miss", "fetch", "hit", "hit"):
+        manager.record_sync("g/p", outcome)
+
+    summary = manager.summary()
+    assert (summary["hits"], summary["fetches"], summary["misses"]) == (2, 1, 1)
+    assert summary["hit_rate"] == 0.75
+    assert summary["size_bytes"] >= 10 and summary["evictions"] == 0
+
+
+def test_maintain_removes_idle_legacy_checkouts(tmp_path):
+    cache = tmp_path / "cache"
+    _store(cache, "g_p", 10, 0)
+    for key, age in (("old_layout", 30), ("recent_layout", 0)):
+        (cache / key / ".git").mkdir(parents=True)
+        (cache / key / "big.bin").write_bytes(b"x" * 500)
+        used = time.time() - age * 3600
+        os.utime(cache / key / ".git", (used, used))
+    manager = RepoCacheManager(cache, quota_bytes=0)
+
+    assert manager.maintain() == ["old_layout"]
+    assert not (cache / "old_layout").exists()
+    # Possibly still in use by a worker running the old code.
+    assert (cache / "recent_layout").exists() and (cache / "g_p.git").exists()
+    summary = manager.summary()
+    assert summary["evictions"] == 1 and summary["evicted_bytes"] == 500
@@ -1,9 +1,14 @@
+import fcntl
+import os
 import subprocess
+import threading
+import time
 from pathlib import Path
 
 import pytest
 
-from biz.agent.repo_syncer import LocalRepoSyncer
+from biz.agent.repo_prewarm import prewarm_repo_cache
+from biz.agent.repo_syncer import LocalRepoSyncer, _sparse_directories
 
 
 @pytest.fixture
@@ -64,3 +69,187 @@ class TestLocalRepoSyncer:
         path = syncer.sync_to(url=str(bare_remote), key="group/sub/proj", ref="main")
         # 'group/sub/proj' -> 'group_sub_proj' (or similar; just check it's under cache)
         assert str(path).startswith(str(cache))
+
+    def test_concurrent_jobs_get_their_own_worktrees(self, tmp_path, bare_remote):
+        cache = tmp_path / "cache"
+        syncer = LocalRepoSyncer(cache_root=cache)
+        first = syncer.sync_to(url=str(bare_remote), key="proj", ref="main")
+        v1 = subprocess.run(["git", "rev-parse", "HEAD"], cwd=first, check=True,
+                            capture_output=True, text=True).stdout.strip()
+
+        work = tmp_path / "work"
+        (work / "f.txt").write_text("v2\n")
+        subprocess.run(["git", "commit", "-q", "-am", "v2"], cwd=work, check=True)
+        subprocess.run(["git", "push", "-q", "origin", "main"], cwd=work, check=True)
+
+        # A second job while the first one is still using its checkout.
+        second = syncer.sync_to(url=str(bare_remote), key="proj", ref="main")
+        by_sha = syncer.sync_to(url=str(bare_remote), key="proj", ref=v1)
+        assert len({first, second, by_sha}) == 3
+        assert (first / "f.txt").read_text() == "v1\n"
+        assert (second / "f.txt").read_text() == "v2\n"
+        assert (by_sha / "f.txt").read_text() == "v1\n"
+
+        for path in (first, second, by_sha):
+            syncer.release(path)
+            assert not path.exists()
+        assert (cache / "proj.git").is_dir()
+
+    def test_checkout_context_releases_worktree(self, tmp_path, bare_remote):
+        syncer = LocalRepoSyncer(cache_root=tmp_path / "cache")
+        with syncer.checkout(url=str(bare_remote), key="proj", ref="main") as path:
+            assert (path / "f.txt").exists()
+        assert not path.exists()
+
+    def test_lock_timeout_raises_instead_of_proceeding(self, tmp_path, bare_remote):
+        cache = tmp_path / "cache"
+        syncer = LocalRepoSyncer(cache_root=cache, lock_wait_seconds=0)
+        with open(cache / "proj.lock", "w") as held:
+            fcntl.flock(held.fileno(), fcntl.LOCK_EX)
+            with pytest.raises(RuntimeError, match="could not acquire lock"):
+                syncer.sync_to(url=str(bare_remote), key="proj", ref="main")
+        assert not (cache / "proj.git").exists()
+
+    def test_unknown_ref_raises(self, tmp_path, bare_remote):
+        syncer = LocalRepoSyncer(cache_root=tmp_path / "cache")
+        with pytest.raises(RuntimeError, match="no-such-branch"):
+            syncer.sync_to(url=str(bare_remote), key="proj", ref="no-such-branch")
+
+    def test_partial_clone_with_sparse_checkout(self, tmp_path, bare_remote):
+        subprocess.run(["git", "config", "uploadpack.allowFilter", "true"], cwd=bare_remote, check=True)
+        work = tmp_path / "work"
+        for directory in ("src/app", "docs", "vendor"):
+            (work / directory).mkdir(parents=True)
+            (work / directory / "x.txt").write_text(directory)
+        subprocess.run(["git", "add", "-A"], cwd=work, check=True)
+        subprocess.run(["git", "commit", "-q", "-m", "dirs"], cwd=work, check=True)
+        subprocess.run(["git", "push", "-q", "origin", "main"], cwd=work, check=True)
+
+        cache = tmp_path / "cache"
+        syncer = LocalRepoSyncer(cache_root=cache, clone_filter="blob:none")
+        path = syncer.sync_to(url=str(bare_remote), key="proj", ref="main", sparse_paths=["src/app/x.txt"])
+        assert (path / "src" / "app" / "x.txt").read_text() == "src/app"
+        assert (path / "f.txt").exists()  # Top-level files are always checked out.
+        assert not (path / "vendor").exists() and not (path / "docs").exists()
+        # Blobs outside the sparse set (and of older commits) were never downloaded.
+        objects = subprocess.run(["git", "rev-list", "--objects", "--missing=print", "--all"], cwd=cache / "proj.git",
+                                 check=True, capture_output=True, text=True).stdout.splitlines()
+        assert sum(line.startswith("?") for line in objects) >= 2
+
+        # Other jobs still get full worktrees from the same store.
+        full = syncer.sync_to(url=str(bare_remote), key="proj", ref="main")
+        assert (full / "vendor" / "x.txt").read_text() == "vendor"
+
+
+    def _push_branches(self, tmp_path):
+        """Push `feature` (two commits ahead of main) and `other`; return feature's first commit."""
+        work = tmp_path / "work"
+        subprocess.run(["git", "checkout", "-q", "-b", "feature"], cwd=work, check=True)
+        for version in ("f1", "f2"):
+            (work / "f.txt").write_text(version)
+            subprocess.run(["git", "commit", "-q", "-am", version], cwd=work, check=True)
+        subprocess.run(["git", "push", "-q", "origin", "feature", "main:other"], cwd=work, check=True)
+        return subprocess.run(["git", "rev-parse", "feature~1"], cwd=work, check=True, capture_output=True,
+                              text=True).stdout.strip()
+
+    def _remote_refs(self, cache):
+        out = subprocess.run(["git", "for-each-ref", "--format=%(refname)", "refs/remotes"], cwd=cache / "proj.git",
+                             check=True, capture_output=True, text=True).stdout
+        return set(out.split())
+
+    def test_fetches_only_the_sha_and_target_branch(self, tmp_path, bare_remote):
+        sha = self._push_branches(tmp_path)
+        cache = tmp_path / "cache"
+        syncer = LocalRepoSyncer(cache_root=cache, clone_depth=1)
+        path = syncer.sync_to(url=str(bare_remote), key="proj", ref=sha, base_ref="main")
+        assert (path / "f.txt").read_text() == "f1"
+        assert self._remote_refs(cache) == {"refs/remotes/origin/main"}
+
+        # Everything is local now: the next sync doesn't contact the remote at all.
+        bare_remote.rename(tmp_path / "gone.git")
+        again = syncer.sync_to(url=str(bare_remote), key="proj", ref=sha, base_ref="main")
+        assert (again / "f.txt").read_text() == "f1"
+
+    def test_full_prune_runs_when_due(self, tmp_path, bare_remote):
+        self._push_branches(tmp_path)
+        cache = tmp_path / "cache"
+        LocalRepoSyncer(cache_root=cache, prune_interval_seconds=0).sync_to(url=str(bare_remote), key="proj",
+                                                                             ref="main")
+        assert self._remote_refs(cache) == {f"refs/remotes/origin/{b}" for b in ("main", "feature", "other")}
+
+        subprocess.run(["git", "push", "-q", "origin", "--delete", "other"], cwd=tmp_path / "work", check=True)
+        LocalRepoSyncer(cache_root=cache).sync_to(url=str(bare_remote), key="proj", ref="main")
+        assert "refs/remotes/origin/other" in self._remote_refs(cache)
+        LocalRepoSyncer(cache_root=cache, prune_interval_seconds=0).sync_to(url=str(bare_remote), key="proj",
+                                                                             ref="main")
+        assert "refs/remotes/origin/other" not in self._remote_refs(cache)
+
+class TestPrewarm:
+    def test_prewarm_fetches_recently_reviewed_projects(self, tmp_path, bare_remote):
+        cache = tmp_path / "cache"
+        syncer = LocalRepoSyncer(cache_root=cache)
+        syncer.release(syncer.sync_to(url=str(bare_remote), key="proj", ref="main"))
+        syncer.release(syncer.sync_to(url=str(bare_remote), key="idle", ref="main"))
+        two_days_ago = time.time() - 2 * 86400
+        os.utime(cache / "idle.git" / "last_used", (two_days_ago, two_days_ago))
+        assert syncer.recently_used(86400) == ["proj"]
+
+        work = tmp_path / "work"
+        (work / "f.txt").write_text("v2\n")
+        subprocess.run(["git", "commit", "-q", "-am", "v2"], cwd=work, check=True)
+        subprocess.run(["git", "push", "-q", "origin", "main"], cwd=work, check=True)
+        head = subprocess.run(["git", "rev-parse", "HEAD"], cwd=work, check=True, capture_output=True,
+                              text=True).stdout.strip()
+
+        assert prewarm_repo_cache(cache, active_hours=24, concurrency=2) == {"proj": "ok"}
+        fetched = subprocess.run(["git", "rev-parse", "refs/remotes/origin/main"], cwd=cache / "proj.git",
+                                 check=True, capture_output=True, text=True).stdout.strip()
+        assert fetched == head
+
+    def test_prewarm_skips_projects_being_synced(self, tmp_path, bare_remote):
+        cache = tmp_path / "cache"
+        syncer = LocalRepoSyncer(cache_root=cache)
+        syncer.release(syncer.sync_to(url=str(bare_remote), key="proj", ref="main"))
+        with open(cache / "proj.lock", "w") as held:
+            fcntl.flock(held.fileno(), fcntl.LOCK_EX)
+            results = prewarm_repo_cache(cache, active_hours=24)
+        assert "could not acquire lock" in results["proj"]
+
+    def test_review_does_not_wait_behind_prewarm(self, tmp_path, bare_remote):
+        cache = tmp_path / "cache"
+        syncer = LocalRepoSyncer(cache_root=cache)
+        first = syncer.sync_to(url=str(bare_remote), key="proj", ref="main")
+        sha = subprocess.run(["git", "rev-parse", "HEAD"], cwd=first, check=True, capture_output=True,
+                             text=True).stdout.strip()
+        syncer.release(first)
+        # Make the pre-warm fetch hang on the "server" side.
+        slow = tmp_path / "slow-upload-pack"
+        slow.write_text('#!/bin/sh\nsleep 30\nexec git-upload-pack "$@"\n')
+        slow.chmod(0o755)
+        subprocess.run(["git", "config", "remote.origin.uploadpack", str(slow)], cwd=cache / "proj.git", check=True)
+
+        errors = []
+
+        def prewarm():
+            try:
+                LocalRepoSyncer(cache_root=cache, lock_wait_seconds=0).prewarm("proj")
+            except RuntimeError as e:
+                errors.append(str(e))
+
+        warmer = threading.Thread(target=prewarm)
+        warmer.start()
+        time.sleep(1)  # Let the pre-warm take the lock and start fetching.
+        started = time.monotonic()
+        path = LocalRepoSyncer(cache_root=cache, lock_wait_seconds=20).sync_to(url=str(bare_remote), key="proj",
+                                                                               ref=sha)
+        warmer.join(timeout=10)
+        assert (path / "f.txt").exists()
+        assert time.monotonic() - started < 10
+        assert errors and "a review is waiting" in errors[0]
+
+    def test_default_lock_wait_outlasts_a_fetch(self, tmp_path):
+        assert LocalRepoSyncer(cache_root=tmp_path, clone_timeout=300).lock_wait_seconds > 300
+
+def test_sparse_directories_cover_touched_files():
+    assert _sparse_directories(["src/a.py", "src/b.py", "README.md", "/docs/x/y.md", ""]) == ["docs/x", "src"]
+
@@ -205,6 +205,143 @@ class TestAgentRunner:
         assert "[output truncated]" in tool_msg["content"]
         assert len(tool_msg["content"]) < 1000
 
+    def test_each_message_is_counted_once(self, monkeypatch):
+        counted = []
+        monkeypatch.setattr("biz.agent.runner.count_tokens_batch",
+                            lambda texts: counted.extend(texts) or [1] * len(texts))
+        responses = [
+            {"content": f"round {i}", "tool_calls": [
+                {"id": f"{i}a", "name": "counter", "arguments": {"n": i}},
+                {"id": f"{i}b", "name": "counter", "arguments": {"n": i + 100}},
+            ], "raw": None}
+            for i in range(4)
+        ] + [{"content": "done", "tool_calls": [], "raw": None}]
+        client = _adapter_returning(responses)
+        reg = ToolRegistry()
+        reg.register(_CounterTool())
+        runner = AgentRunner(adapter=LLMAdapter(client, use_native=True), registry=reg, max_iterations=10)
+        out = {}
+        assert runner.run([{"role": "user", "content": "?"}], out=out) == "done"
+        # 1 user message + 4 rounds x (assistant + 2 tool results), each counted exactly once.
+        assert len(counted) == len(out["messages"]) == 13
+
+    def test_provider_reported_usage_replaces_estimate(self):
+        responses = [
+            {"content": "calling", "tool_calls": [
+                {"id": "1", "name": "counter", "arguments": {"n": 1}},
+            ], "raw": None, "usage": {"model": "m", "input_tokens": 5000, "output_tokens": 20}},
+            {"content": "done", "tool_calls": [], "raw": None},
+        ]
+        client = _adapter_returning(responses)
+        reg = ToolRegistry()
+        reg.register(_CounterTool())
+        runner = AgentRunner(adapter=LLMAdapter(client, use_native=True), registry=reg,
+                             max_iterations=5, total_token_cap=4000)
+        with pytest.raises(TokenBudgetExceeded, match="token estimate 50[0-9]{2} "):
+            runner.run([{"role": "user", "content": "?"}])
+
+    def test_old_tool_outputs_are_compacted_instead_of_aborting(self):
+        from biz.utils.token_util import count_tokens
+
+        body = "def handler(request):\n    return render(request)\n" * 40
+
+        class _ReadTool(Tool):
+            name = "read_file"
+            description = ""
+            parameters = {"type": "object", "properties": {"path": {"type": "string"}}}
+
+            def execute(self, **kwargs):
+                return ToolResult(True, f"# {kwargs['path']}\n{body}")
+
+        responses = [
+            {"content": "reading", "tool_calls": [
+                {"id": str(i), "name": "read_file", "arguments": {"path": f"src/mod_{i}.py"}},
+            ], "raw": None}
+            for i in range(8)
+        ] + [{"content": "总分:80分", "tool_calls": [], "raw": None}]
+        client = _adapter_returning(responses)
+        reg = ToolRegistry()
+        reg.register(_ReadTool())
+        # Room for about four tool outputs; eight are read.
+        cap = 4 * count_tokens(body) + 200
+        runner = AgentRunner(adapter=LLMAdapter(client, use_native=True), registry=reg,
+                             max_iterations=10, total_token_cap=cap)
+        out = {}
+        initial = [{"role": "user", "content": "review the diff of src/mod_1.py"}]
+        assert runner.run(initial, out=out) == "总分:80分"
+        assert out["compacted"] > 0
+        tool_messages = {m["tool_call_id"]: m["content"] for m in out["messages"] if m["role"] == "tool"}
+        assert "elided" in tool_messages["0"] and 'read_file({"path": "src/mod_0.py"})' in tool_messages["0"]
+        # The latest output and the one about the file under review stay verbatim.
+        assert tool_messages["7"].startswith("# src/mod_7.py")
+        assert tool_messages["1"].startswith("# src/mod_1.py")
+        final_messages = client.chat_with_tools.call_args_list[-1].kwargs["messages"]
+        assert sum(count_tokens(m["content"]) for m in final_messages) <= cap
+
+    def test_tool_calls_of_a_round_run_concurrently(self):
+        import threading
+        barrier = threading.Barrier(2, timeout=5)
+
+        class _Meet(Tool):
+            name = "meet"
+            description = ""
+            parameters = {"type": "object", "properties": {"n": {"type": "integer"}}}
+
+            def execute(self, **kwargs):
+                barrier.wait()  # Deadlocks (and times out) if the calls run one after another.
+                return ToolResult(True, f"out {kwargs['n']}")
+
+        responses = [
+            {"content": "both", "tool_calls": [
+                {"id": "a", "name": "meet", "arguments": {"n": 1}},
+                {"id": "b", "name": "meet", "arguments": {"n": 2}},
+            ], "raw": None},
+            {"content": "done", "tool_calls": [], "raw": None},
+        ]
+        client = _adapter_returning(responses)
+        reg = ToolRegistry()
+        reg.register(_Meet())
+        runner = AgentRunner(adapter=LLMAdapter(client, use_native=True), registry=reg,
+                             max_iterations=5, tool_workers=2)
+        out = {}
+        assert runner.run([{"role": "user", "content": "?"}], out=out) == "done"
+        tool_messages = [(m["tool_call_id"], m["content"]) for m in out["messages"] if m["role"] == "tool"]
+        assert tool_messages == [("a", "out 1"), ("b", "out 2")]
+
+
+    def test_round_after_a_timed_out_call_does_not_queue_behind_it(self):
+        import threading
+        release = threading.Event()
+
+        class _Hang(Tool):
+            name = "hang"
+            description = ""
+            parameters = {"type": "object", "properties": {}}
+
+            def execute(self, **kwargs):
+                release.wait(5)
+                return ToolResult(True, "late")
+
+        responses = [
+            {"content": "", "tool_calls": [{"id": "a", "name": "hang", "arguments": {}}], "raw": None},
+            {"content": "", "tool_calls": [{"id": "b", "name": "counter", "arguments": {"n": 7}}], "raw": None},
+            {"content": "done", "tool_calls": [], "raw": None},
+        ]
+        client = _adapter_returning(responses)
+        reg = ToolRegistry()
+        reg.register(_Hang())
+        reg.register(_CounterTool())
+        runner = AgentRunner(adapter=LLMAdapter(client, use_native=True), registry=reg,
+                             max_iterations=5, tool_workers=1, round_timeout=0.2)
+        out = {}
+        try:
+            assert runner.run([{"role": "user", "content": "?"}], out=out) == "done"
+        finally:
+            release.set()
+        tool_messages = {m["tool_call_id"]: m["content"] for m in out["messages"] if m["role"] == "tool"}
+        assert "round deadline" in tool_messages["a"]
+        assert tool_messages["b"] == "7"
+
 
 # Imported here so pytest can collect the symbol from the module.
 from biz.agent.runner import TokenBudgetExceeded, InvalidToolCallStreak  # noqa: E402,F401
\ No newline at end of file
@@ -1,6 +1,8 @@
 from pathlib import Path
 
 import logging
+import threading
+import time
 import pytest
 
 from biz.agent.tool import Tool, ToolResult
@@ -83,6 +85,97 @@ class TestRegistry:
         assert result.success is False
         assert "kaboom" in (result.error or "")
 
+    def test_dispatch_all_runs_calls_concurrently_in_order(self):
+        from biz.agent.llm_adapter import ToolCall
+
+        barrier = threading.Barrier(3, timeout=5)
+
+        class _Sleepy(Tool):
+            name = "sleepy"
+            description = ""
+            parameters = {"type": "object", "properties": {"n": {"type": "integer"}}}
+            def execute(self, **kwargs):
+                barrier.wait()  # Only passes if all three calls run at the same time.
+                time.sleep(0.05 * (3 - kwargs["n"]))
+                return ToolResult(success=True, output=str(kwargs["n"]))
+
+        r = ToolRegistry()
+        r.register(_Sleepy())
+        calls = [ToolCall(id=str(n), name="sleepy", arguments={"n": n}) for n in range(3)]
+        results = r.dispatch_all(calls, max_workers=3, timeout=5)
+        assert [res.output for res in results] == ["0", "1", "2"]
+
+    def test_dispatch_all_fails_calls_past_the_round_deadline(self):
+        from biz.agent.llm_adapter import ToolCall
+
+        release = threading.Event()
+
+        class _Hang(Tool):
+            name = "hang"
+            description = ""
+            parameters = {"type": "object", "properties": {}}
+            def execute(self, **kwargs):
+                release.wait(5)
+                return ToolResult(success=True, output="late")
+
+        r = ToolRegistry()
+        r.register(_A())
+        r.register(_Hang())
+        try:
+            results = r.dispatch_all([ToolCall("1", "a", {}), ToolCall("2", "hang", {})], timeout=0.1)
+        finally:
+            release.set()
+        assert results[0].output == "A"
+        assert results[1].success is False and "round deadline" in results[1].error
+
+    def test_dispatch_all_is_sequential_with_unsafe_tools(self):
+        from biz.agent.llm_adapter import ToolCall
+
+        order = []
+
+        class _Write(Tool):
+            name = "write"
+            description = ""
+            parameters = {"type": "object", "properties": {}}
+            parallel_safe = False
+            def execute(self, **kwargs):
+                order.append(threading.get_ident())
+                return ToolResult(success=True, output="W")
+
+        r = ToolRegistry()
+        r.register(_Write())
+        results = r.dispatch_all([ToolCall("1", "write", {}), ToolCall("2", "write", {})])
+        assert [res.output for res in results] == ["W", "W"]
+        assert order == [threading.get_ident()] * 2
+
+    def test_dispatch_all_applies_the_deadline_to_sequential_calls(self):
+        from biz.agent.llm_adapter import ToolCall
+
+        release = threading.Event()
+        ran = []
+
+        class _HangingWrite(Tool):
+            name = "write"
+            description = ""
+            parameters = {"type": "object", "properties": {}}
+            parallel_safe = False
+            def execute(self, **kwargs):
+                ran.append(1)
+                release.wait(5)
+                return ToolResult(success=True, output="late")
+
+        r = ToolRegistry()
+        r.register(_HangingWrite())
+        try:
+            single = r.dispatch_all([ToolCall("1", "write", {})], timeout=0.1)
+            pair = r.dispatch_all([ToolCall("2", "write", {}), ToolCall("3", "write", {})], timeout=0.1)
+        finally:
+            release.set()
+        assert single[0].success is False and "round deadline" in single[0].error
+        assert [res.success for res in pair] == [False, False]
+        # The second write never starts while the first one may still be running.
+        assert len(ran) == 2
+
     def test_dispatch_logs_details_at_debug(self, caplog):
         """At DEBUG level, dispatch should log the tool name, args, and result
         length so the full agent trace is greppable from log files."""
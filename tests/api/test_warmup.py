@@ -0,0 +1,55 @@
+import os
+
+import pytest
+from flask import Flask
+
+from biz.api import warmup
+from biz.api.routes.home import home_bp
+from biz.utils import code_reviewer
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(warmup, "_state", {"status": "pending", "steps": {}})
+    app = Flask(__name__)
+    app.register_blueprint(home_bp)
+    return app.test_client()
+
+
+def test_ready_route_reports_503_until_warm_up_finishes(client, monkeypatch):
+    monkeypatch.setattr(warmup, "_STEPS", (("noop", lambda: "ok"),))
+    assert client.get("/review/ready").status_code == 503
+    warmup.warm_up()
+    response = client.get("/review/ready")
+    assert response.status_code == 200
+    assert response.get_json()["steps"]["noop"]["ok"] is True
+
+
+def test_failed_step_does_not_block_readiness(client, monkeypatch):
+    def broken():
+        raise ValueError("API key is required")
+
+    monkeypatch.setattr(warmup, "_STEPS", (("llm_client", broken), ("noop", lambda: "ok")))
+    state = warmup.warm_up()
+    assert state["status"] == "ready"
+    assert state["steps"]["llm_client"] == {"ok": False, "detail": "API key is required",
+                                            "ms": state["steps"]["llm_client"]["ms"]}
+    assert state["steps"]["noop"]["ok"] is True
+
+
+def test_default_steps_run_offline(client, monkeypatch):
+    monkeypatch.setenv("LLM_PROVIDER", "ollama")
+    monkeypatch.delenv("LLM_FALLBACK_PROVIDERS", raising=False)
+    state = warmup.warm_up()
+    assert all(step["ok"] for step in state["steps"].values()), state["steps"]
+    assert state["steps"]["llm_client"]["detail"] == "OllamaClient"
+
+
+def test_prompt_templates_are_reloaded_when_the_file_changes(tmp_path):
+    path = tmp_path / "prompt_templates.yml"
+    path.write_text("review:\n  system_prompt: a\n", encoding="utf-8")
+    first = code_reviewer.load_prompt_templates(str(path))
+    assert code_reviewer.load_prompt_templates(str(path)) is first
+    path.write_text("review:\n  system_prompt: b\n", encoding="utf-8")
+    os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 1_000_000))
+    assert code_reviewer.load_prompt_templates(str(path))["review"]["system_prompt"] == "b"
@@ -0,0 +1,113 @@
+import pytest
+import requests
+
+from benchmarks.stubs.common import LatencyModel, RateLimiter, serve_in_thread
+from benchmarks.stubs.llm_server import StubConfig, create_app
+from biz.utils.code_reviewer import CodeReviewer
+
+DIFF_PROMPT = "请审查以下代码变更:\n### src/app.py (+3 -1)\n@@ -1 +1 @@\n-x = 1\n+x = 2\n"
+TOOLS = [{"type": "function", "function": {
+    "name": "read_file", "description": "Read a file",
+    "parameters": {"type": "object", "properties": {"path": {"type": "string"}}, "required": ["path"]},
+}}]
+
+
+@pytest.fixture
+def stub_url(tmp_path, monkeypatch):
+    monkeypatch.setenv("LLM_CIRCUIT_FILE", str(tmp_path / "circuit.json"))
+    monkeypatch.setattr("biz.llm.resilience._breaker", None)
+    server, url = serve_in_thread(create_app(StubConfig(score_range=(77, 77), tool_rounds=1, seed=1)))
+    yield url
+    server.shutdown()
+
+
+def _messages():
+    return [{"role": "system", "content": "你是代码审查助手"}, {"role": "user", "content": DIFF_PROMPT}]
+
+
+def test_openai_compatible_clients(stub_url, monkeypatch):
+    from biz.llm.client.deepseek import DeepSeekClient
+    from biz.llm.client.openai import OpenAIClient
+
+    monkeypatch.setenv("OPENAI_API_KEY", "stub")
+    monkeypatch.setenv("OPENAI_API_BASE_URL", f"{stub_url}/v1")
+    monkeypatch.setenv("DEEPSEEK_API_KEY", "stub")
+    monkeypatch.setenv("DEEPSEEK_API_BASE_URL", stub_url)
+    for client in (OpenAIClient(), DeepSeekClient()):
+        assert CodeReviewer.parse_review_score(client.completions(_messages())) == 77
+        progress = []
+        streamed = client.stream_completions(_messages(), on_progress=progress.append)
+        assert len(progress) > 1 and CodeReviewer.parse_review_score(streamed) == 77
+        assert client.last_usage.input_tokens > 0
+
+
+def test_openai_tool_rounds_then_review(stub_url, monkeypatch):
+    from biz.llm.client.openai import OpenAIClient
+
+    monkeypatch.setenv("OPENAI_API_KEY", "stub")
+    monkeypatch.setenv("OPENAI_API_BASE_URL", f"{stub_url}/v1")
+    client = OpenAIClient()
+    first = client.chat_with_tools(_messages(), tools=TOOLS)
+    assert [tc["arguments"] for tc in first["tool_calls"]] == [{"path": "src/app.py"}] * 2
+    followup = _messages() + [
+        {"role": "assistant", "content": "", "tool_calls": [
+            {"id": tc["id"], "type": "function", "function": {"name": tc["name"], "arguments": "{}"}}
+            for tc in first["tool_calls"]]},
+    ] + [{"role": "tool", "tool_call_id": tc["id"], "content": "x = 2"} for tc in first["tool_calls"]]
+    final = client.chat_with_tools(followup, tools=TOOLS)
+    assert final["tool_calls"] == [] and "总分:77分" in final["content"]
+
+
+def test_anthropic_client(stub_url, monkeypatch):
+    from biz.llm.client.anthropic import AnthropicClient
+
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "stub")
+    monkeypatch.setenv("ANTHROPIC_API_BASE_URL", stub_url)
+    client = AnthropicClient()
+    assert "总分:77分" in client.completions(_messages())
+    assert client.last_usage.cached_tokens == 0
+    client.completions(_messages())
+    # the repeated system prompt is reported as a cache read
+    assert client.last_usage.cached_tokens > 0
+    assert "总分:77分" in client.stream_completions(_messages(), on_progress=lambda text: None)
+    tool_round = client.chat_with_tools(_messages(), tools=TOOLS)
+    assert len(tool_round["tool_calls"]) == 2
+
+
+def test_ollama_client(stub_url, monkeypatch):
+    from biz.llm.client.ollama_client import OllamaClient
+
+    monkeypatch.setenv("OLLAMA_API_BASE_URL", stub_url)
+    client = OllamaClient()
+    assert "总分:77分" in client.completions(_messages())
+    assert "总分:77分" in client.stream_completions(_messages(), on_progress=lambda text: None)
+    assert client.last_usage.output_tokens > 0
+
+
+def test_error_injection_and_rate_limit():
+    server, url = serve_in_thread(create_app(StubConfig(error_rate=1.0, error_statuses=(503,))))
+    try:
+        assert requests.post(f"{url}/v1/messages", json={"messages": []}).status_code == 503
+    finally:
+        server.shutdown()
+    server, url = serve_in_thread(create_app(StubConfig(rate_limit=1, rate_burst=1)))
+    try:
+        statuses = [requests.post(f"{url}/chat/completions", json={"messages": []}).status_code for _ in range(3)]
+        assert statuses[0] == 200 and 429 in statuses
+        stats = requests.get(f"{url}/stats").json()
+        assert stats["requests"]["openai"] == 3 and stats["statuses"]["429"] >= 1
+    finally:
+        server.shutdown()
+
+
+def test_latency_models():
+    import random
+
+    rng = random.Random(0)
+    assert LatencyModel.parse("fixed:250").sample(rng) == 0.25
+    assert 0.2 <= LatencyModel.parse("uniform:200,300").sample(rng) <= 0.3
+    assert LatencyModel.parse("lognormal:800,0.5").sample(rng) > 0
+    with pytest.raises(ValueError):
+        LatencyModel.parse("pareto:1")
+    limiter = RateLimiter(rate=1, burst=1)
+    assert limiter.acquire()[0] and not limiter.acquire()[0]
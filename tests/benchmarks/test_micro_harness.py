@@ -0,0 +1,35 @@
+from benchmarks.micro.harness import (Runner, Stats, check_regression, load_baselines, missing_baseline,
+                                      save_baselines)
+
+
+def _stats(min_seconds, median_seconds):
+    return Stats(rounds=5, iterations=1, min=min_seconds, median=median_seconds, mean=median_seconds, stddev=0.0)
+
+
+def test_runner_collects_at_least_min_rounds():
+    calls = []
+    stats = Runner(min_rounds=3, max_rounds=3, max_time=0, min_round_time=0, warmup=1).measure(lambda: calls.append(1))
+    assert stats.rounds == 3 and stats.iterations == 1 and len(calls) == 5
+    assert 0 <= stats.min <= stats.median
+
+
+def test_check_regression_compares_best_round_with_baseline_median():
+    baselines = {"bench": {"min": 0.5, "median": 1.0}}
+    assert check_regression("bench", _stats(1.4, 2.0), baselines, 0.5) is None
+    assert "1.60x" in check_regression("bench", _stats(1.6, 1.7), baselines, 0.5)
+    assert check_regression("new_bench", _stats(9.0, 9.0), baselines, 0.5) is None
+
+
+def test_save_baselines_merges_existing_entries(tmp_path):
+    path = tmp_path / "baselines.json"
+    assert load_baselines(path) == {}
+    save_baselines({"a": _stats(1.0, 2.0), "b": _stats(1.0, 2.0)}, path)
+    save_baselines({"a": _stats(3.0, 4.0)}, path)
+    baselines = load_baselines(path)
+    assert baselines["a"]["median"] == 4.0 and baselines["b"]["median"] == 2.0
+
+
+def test_missing_baseline_is_reported():
+    baselines = {"bench[estimate]": {"min": 0.5, "median": 1.0}}
+    assert missing_baseline("bench[estimate]", baselines) is None
+    assert "--bench-save" in missing_baseline("bench[tiktoken]", baselines)
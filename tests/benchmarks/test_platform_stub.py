@@ -0,0 +1,101 @@
+import pytest
+import requests
+
+from benchmarks.stubs.common import serve_in_thread
+from benchmarks.stubs.platform_server import PlatformConfig, create_app, generate_files
+
+
+def _serve(config):
+    return serve_in_thread(create_app(config))
+
+
+@pytest.fixture
+def stub_url():
+    server, url = _serve(PlatformConfig(files=7, hunk_lines=8, commits=2, overflow_files=5))
+    yield url
+    server.shutdown()
+
+
+def _gitlab_webhook(target_branch="main"):
+    return {"object_kind": "merge_request",
+            "object_attributes": {"iid": 3, "target_project_id": 12, "action": "open",
+                                  "target_branch": target_branch}}
+
+
+def _hub_webhook(base="main"):
+    return {"action": "opened",
+            "pull_request": {"number": 9, "base": {"ref": base}},
+            "repository": {"full_name": "acme/shop", "name": "shop", "owner": {"login": "acme"}}}
+
+
+def test_generated_changes_are_deterministic():
+    config = PlatformConfig(files=3)
+    assert [f.diff for f in generate_files(config, "gitlab/1/mr/1")] == \
+           [f.diff for f in generate_files(config, "gitlab/1/mr/1")]
+    assert generate_files(config, "gitlab/1/mr/1")[0].diff != generate_files(config, "gitlab/1/mr/2")[0].diff
+
+
+def test_gitlab_merge_request_handler(stub_url):
+    from biz.platforms.gitlab.webhook_handler import MergeRequestHandler
+
+    handler = MergeRequestHandler(_gitlab_webhook(), "token", stub_url)
+    changes = handler.get_merge_request_changes()
+    assert len(changes) == 5 and changes[0]["diff"].startswith("@@ ")
+    assert requests.get(f"{stub_url}/api/v4/projects/12/merge_requests/3/changes").json()["overflow"] is True
+    assert len(handler.get_merge_request_commits()) == 2
+    assert handler.target_branch_protected()
+    assert not MergeRequestHandler(_gitlab_webhook("feature/x"), "token", stub_url).target_branch_protected()
+
+    note_id = handler.create_merge_request_note("审查中…")
+    assert handler.update_merge_request_note(note_id, "总分:80分")
+    handler.add_merge_request_notes("done")
+    notes = requests.get(f"{stub_url}/_notes").json()["gitlab/12/mr/3"]
+    assert [n["body"] for n in notes] == ["总分:80分", "done"]
+
+
+def test_gitlab_diffs_pagination(stub_url):
+    first = requests.get(f"{stub_url}/api/v4/projects/12/merge_requests/3/diffs", params={"per_page": 4})
+    assert len(first.json()) == 4 and first.headers["X-Total"] == "7" and first.headers["X-Next-Page"] == "2"
+    last = requests.get(f"{stub_url}/api/v4/projects/12/merge_requests/3/diffs", params={"per_page": 4, "page": 2})
+    assert len(last.json()) == 3 and last.headers["X-Next-Page"] == ""
+
+
+def test_github_handler_via_api_url(stub_url, monkeypatch):
+    from biz.platforms.github.webhook_handler import PullRequestHandler
+
+    monkeypatch.setenv("GITHUB_API_URL", stub_url + "/")
+    handler = PullRequestHandler(_hub_webhook(), "token", "https://github.com")
+    # GitHub pages files at 30 by default; the handler only reads the first page.
+    assert len(handler.get_pull_request_changes()) == 7
+    assert handler.get_pull_request_commits()[0]["title"].startswith("feat:")
+    assert handler.target_branch_protected()
+    handler.add_pull_request_notes("LGTM")
+    assert requests.get(f"{stub_url}/_notes").json()["github/acme/shop/pr/9"][0]["body"] == "LGTM"
+
+    page = requests.get(f"{stub_url}/repos/acme/shop/pulls/9/files", params={"per_page": 5})
+    assert 'rel="next"' in page.headers["Link"]
+
+
+def test_gitea_handler(stub_url):
+    from biz.platforms.gitea.webhook_handler import PullRequestHandler, PushHandler
+
+    handler = PullRequestHandler(_hub_webhook("release/1.2"), "token", stub_url)
+    assert len(handler.get_pull_request_changes()) == 7
+    assert handler.get_pull_request_commits()[0]["author_name"] == "bench"
+    assert handler.target_branch_protected()
+    diff = requests.get(f"{stub_url}/api/v1/repos/acme/shop/git/commits/abc.diff").text
+    assert len(PushHandler._parse_diff_to_changes(diff)) == 7
+
+
+def test_rate_limit_and_stats():
+    server, url = _serve(PlatformConfig(files=1, rate_limit=0.001, rate_burst=1))
+    try:
+        assert requests.get(f"{url}/api/v4/projects/1/protected_branches").status_code == 200
+        limited = requests.get(f"{url}/api/v4/projects/1/protected_branches")
+        assert limited.status_code == 429 and int(limited.headers["Retry-After"]) >= 1
+        github = requests.get(f"{url}/repos/a/b/branches")
+        assert github.status_code == 403 and github.headers["X-RateLimit-Remaining"] == "0"
+        stats = requests.get(f"{url}/stats").json()
+        assert stats["statuses"] == {"200": 1, "429": 1, "403": 1}
+    finally:
+        server.shutdown()
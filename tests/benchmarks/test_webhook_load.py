@@ -0,0 +1,88 @@
+import threading
+
+import pytest
+from flask import Flask, jsonify, request
+
+from benchmarks.stubs.common import serve_in_thread
+from benchmarks.stubs.platform_server import PlatformConfig, create_app, job_key
+from benchmarks.webhook_load import Job, build_job, build_report, compute_stages, percentile, run_load
+
+
+@pytest.fixture
+def platform():
+    app = create_app(PlatformConfig(files=2, hunk_lines=4, commits=1))
+    server, url = serve_in_thread(app)
+    yield app, url
+    server.shutdown()
+
+
+def _fake_review_server(platform_url):
+    """Acknowledges webhooks at once and "reviews" them in a thread, like the forked worker."""
+    from biz.platforms.gitlab.webhook_handler import MergeRequestHandler
+
+    def work(payload):
+        handler = MergeRequestHandler(payload, "token", platform_url)
+        handler.get_merge_request_changes()
+        handler.get_merge_request_commits()
+        handler.add_merge_request_notes("Auto Review Result: \n总分:80分")
+
+    app = Flask(__name__)
+
+    @app.post("/review/webhook")
+    def webhook():
+        threading.Thread(target=work, args=(request.get_json(),)).start()
+        return jsonify({"message": "accepted"})
+
+    return serve_in_thread(app)
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert (percentile(values, 50), percentile(values, 95), percentile(values, 99)) == (50, 95, 99)
+    assert percentile([7.0], 99) == 7.0 and percentile([], 50) is None
+
+
+@pytest.mark.parametrize("platform_name, paths", [
+    ("gitlab", ["/api/v4/projects/1/merge_requests/100003/changes", "/api/v4/projects/1/merge_requests/100003/notes"]),
+    ("github", ["/repos/bench/shop/pulls/100003/files", "/repos/bench/shop/issues/100003/comments"]),
+    ("gitea", ["/api/v1/repos/bench/shop/pulls/100003/commits", "/api/v1/repos/bench/shop/issues/100003/comments"]),
+])
+def test_job_key_matches_worker_api_paths(platform_name, paths):
+    job = build_job(3, platform_name, "r1", "http://stub")
+    assert {job_key(path) for path in paths} == {job.key}
+
+
+def test_recorded_payload_is_retargeted():
+    recorded = {"action": "synchronize", "pull_request": {"number": 7, "head": {"ref": "x", "sha": "old"}},
+                "repository": {"full_name": "a/b"}}
+    first, second = (build_job(i, "github", "r1", "http://stub", recorded) for i in (0, 1))
+    assert first.key != second.key
+    assert first.payload["pull_request"]["head"] == {"ref": "x", "sha": first.payload["pull_request"]["head"]["sha"]}
+    assert first.payload["pull_request"]["head"]["sha"] != second.payload["pull_request"]["head"]["sha"]
+    assert recorded["pull_request"]["number"] == 7
+
+
+def test_compute_stages_ignores_progress_note():
+    job = Job(0, "gitlab", {}, {}, "k", sent_at=100.0, acked_at=100.01)
+    events = [{"t": 100.5, "method": "GET"}, {"t": 100.6, "method": "POST"}, {"t": 100.7, "method": "GET"}]
+    notes = [{"body": "AI 审查进行中", "updated_ts": 100.6}, {"body": "总分:80分", "updated_ts": 103.7}]
+    compute_stages(job, events, notes)
+    assert {k: round(v) for k, v in job.stages.items()} == \
+           {"ingest": 10, "queue_wait": 490, "fetch": 200, "review": 3000, "e2e": 3700}
+
+
+def test_run_load_reports_stages(platform):
+    app, platform_url = platform
+    server, target = _fake_review_server(platform_url)
+    try:
+        jobs = [build_job(i, "gitlab", "r1", platform_url) for i in range(4)]
+        send_seconds = run_load(target, jobs, rate=50, notes=app.config["stub_notes"],
+                                events=app.config["stub_events"], drain_timeout=10)
+    finally:
+        server.shutdown()
+    report = build_report(jobs, app.config["stub_events"], app.config["stub_notes"], send_seconds,
+                          None, {}, {})
+    assert report["jobs"]["completed"] == 4 and report["jobs"]["incomplete"] == 0
+    for stage in ("ingest", "queue_wait", "fetch", "review", "e2e"):
+        assert report["stages_ms"][stage]["count"] == 4
+    assert report["stages_ms"]["e2e"]["p99"] >= report["stages_ms"]["review"]["p50"]
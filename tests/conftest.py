@@ -5,6 +5,12 @@ from pathlib import Path
 import pytest
 
 
+@pytest.fixture(autouse=True)
+def _triage_stats_file(tmp_path, monkeypatch):
+    """Keep triage stats recorded by worker tests out of the working tree's data/ directory."""
+    monkeypatch.setenv("TRIAGE_STATS_FILE", str(tmp_path / "triage_stats.json"))
+
+
 @pytest.fixture
 def tmp_repo(tmp_path: Path) -> Path:
     """Create a minimal local git repository for testing.
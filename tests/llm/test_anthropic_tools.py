@@ -0,0 +1,94 @@
+import json
+
+import httpx
+import pytest
+from anthropic import Anthropic
+
+from biz.agent.llm_adapter import LLMAdapter, LLMResponse, ToolCall
+from biz.agent.tool import ToolResult
+from biz.llm.client.anthropic import AnthropicClient
+
+TOOLS = [{"type": "function", "function": {
+    "name": "read_file", "description": "Read a file",
+    "parameters": {"type": "object", "properties": {"path": {"type": "string"}}, "required": ["path"]},
+}}]
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+    monkeypatch.delenv("ANTHROPIC_API_BASE_URL", raising=False)
+    monkeypatch.setenv("LLM_CIRCUIT_FILE", str(tmp_path / "circuit.json"))
+    monkeypatch.setattr("biz.llm.resilience._breaker", None)
+    return AnthropicClient()
+
+
+def _mock_api(client, response_body: dict) -> list:
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(json.loads(request.content))
+        return httpx.Response(200, json=response_body)
+
+    client.client = Anthropic(api_key="test-key", max_retries=0,
+                              http_client=httpx.Client(transport=httpx.MockTransport(handler)))
+    return requests
+
+
+def _response(content: list, stop_reason: str = "tool_use") -> dict:
+    return {"id": "msg_1", "type": "message", "role": "assistant", "model": "claude-test",
+            "content": content, "stop_reason": stop_reason, "stop_sequence": None,
+            "usage": {"input_tokens": 12, "output_tokens": 8}}
+
+
+class TestMessageConversion:
+    def test_tool_round_trip_is_converted_to_blocks(self, client):
+        adapter = LLMAdapter(client, use_native=True)
+        calls = [ToolCall("tu_1", "read_file", {"path": "a.py"}), ToolCall("tu_2", "read_file", {"path": "b.py"})]
+        messages = [
+            {"role": "system", "content": "sys"},
+            {"role": "user", "content": "review"},
+            adapter.build_assistant_message(LLMResponse(content="checking", tool_calls=calls)),
+            adapter.build_tool_message(calls[0], ToolResult(success=True, output="A")),
+            adapter.build_tool_message(calls[1], ToolResult(success=False, output="", error="missing")),
+        ]
+        request = client._build_request(messages, cache_conversation=False)
+        assert request["messages"] == [
+            {"role": "user", "content": "review"},
+            {"role": "assistant", "content": [
+                {"type": "text", "text": "checking"},
+                {"type": "tool_use", "id": "tu_1", "name": "read_file", "input": {"path": "a.py"}},
+                {"type": "tool_use", "id": "tu_2", "name": "read_file", "input": {"path": "b.py"}},
+            ]},
+            # results of parallel calls share one user turn
+            {"role": "user", "content": [
+                {"type": "tool_result", "tool_use_id": "tu_1", "content": "A"},
+                {"type": "tool_result", "tool_use_id": "tu_2", "content": "ERROR: missing"},
+            ]},
+        ]
+
+    def test_tools_are_converted_to_input_schema(self, client):
+        assert client._convert_tools(TOOLS) == [{
+            "name": "read_file", "description": "Read a file",
+            "input_schema": TOOLS[0]["function"]["parameters"],
+        }]
+
+
+class TestChatWithTools:
+    def test_parallel_tool_use_response(self, client):
+        requests = _mock_api(client, _response([
+            {"type": "text", "text": "Let me look."},
+            {"type": "tool_use", "id": "tu_1", "name": "read_file", "input": {"path": "a.py"}},
+            {"type": "tool_use", "id": "tu_2", "name": "read_file", "input": {"path": "b.py"}},
+        ]))
+        result = client.chat_with_tools([{"role": "user", "content": "review"}], tools=TOOLS)
+        assert result["content"] == "Let me look."
+        assert [tc["arguments"]["path"] for tc in result["tool_calls"]] == ["a.py", "b.py"]
+        assert result["usage"]["input_tokens"] == 12
+        assert requests[0]["tools"][0]["name"] == "read_file"
+        assert requests[0]["messages"][-1]["content"][-1]["cache_control"] == {"type": "ephemeral"}
+
+    def test_final_text_response(self, client):
+        _mock_api(client, _response([{"type": "text", "text": "总分:90分"}], stop_reason="end_turn"))
+        result = client.chat_with_tools([{"role": "user", "content": "review"}], tools=TOOLS)
+        assert (result["content"], result["tool_calls"]) == ("总分:90分", [])
@@ -0,0 +1,71 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from biz.agent.llm_adapter import LLMAdapter
+from biz.agent.runner import AgentRunner
+from biz.llm.capabilities import ModelCapabilities, get_capabilities
+from biz.llm.client.base import BaseClient
+from biz.llm.client.router import RoutingClient
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    get_capabilities.cache_clear()
+    yield
+    get_capabilities.cache_clear()
+
+
+class _Client(BaseClient):
+    def __init__(self, provider, default_model=None):
+        self.provider = provider
+        self.default_model = default_model
+
+    def completions(self, messages, model=None):
+        return ""
+
+
+class TestRegistry:
+    def test_provider_defaults(self):
+        caps = get_capabilities("anthropic", "claude-sonnet-4-5")
+        assert caps.tools and caps.parallel_tool_calls and caps.prompt_caching
+        assert caps.max_context == 200_000
+
+    def test_model_prefix_override(self):
+        assert get_capabilities("deepseek", "deepseek-chat").tools
+        assert not get_capabilities("deepseek", "deepseek-reasoner").tools
+
+    def test_unknown_provider_is_all_off(self):
+        assert get_capabilities("nope") == ModelCapabilities()
+
+    def test_env_overrides(self, monkeypatch):
+        monkeypatch.setenv("LLM_CAPABILITY_OVERRIDES",
+                           '{"ollama": {"max_context": 32768}, "ollama:qwen2.5-coder": {"tools": true}}')
+        assert get_capabilities("ollama", "qwen2.5-coder") == ModelCapabilities(
+            tools=True, streaming=True, max_context=32768)
+        assert not get_capabilities("ollama", "llama3").tools
+
+    def test_invalid_overrides_are_ignored(self, monkeypatch):
+        monkeypatch.setenv("LLM_CAPABILITY_OVERRIDES", "{not json")
+        assert get_capabilities("openai").tools
+
+
+def test_client_uses_default_model():
+    assert not _Client("deepseek", "deepseek-reasoner").capabilities().tools
+    assert _Client("deepseek", "deepseek-reasoner").capabilities("deepseek-chat").tools
+
+
+def test_router_combines_providers():
+    router = RoutingClient({"anthropic": _Client("anthropic"), "zhipuai": _Client("zhipuai")},
+                           health=MagicMock())
+    caps = router.capabilities()
+    assert caps.tools
+    # zhipuai is skipped for tool calls, so only anthropic's window matters
+    assert caps.max_context == 200_000
+    assert not caps.prompt_caching
+
+
+def test_runner_caps_tokens_to_context_window():
+    adapter = LLMAdapter(_Client("ollama", "llama3"))
+    runner = AgentRunner(adapter=adapter, registry=MagicMock(), total_token_cap=80_000)
+    assert runner.total_token_cap == int(8_192 * 0.8)
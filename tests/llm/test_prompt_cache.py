@@ -0,0 +1,54 @@
+import os
+
+import pytest
+
+from biz.agent.prompts import load_prompt
+from biz.llm.client.anthropic import AnthropicClient
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+    monkeypatch.delenv("ANTHROPIC_API_BASE_URL", raising=False)
+    return AnthropicClient()
+
+
+CONVERSATION = [
+    {"role": "system", "content": "static instructions"},
+    {"role": "user", "content": "diff"},
+    {"role": "assistant", "content": "looking"},
+    {"role": "user", "content": "tool output"},
+]
+
+
+class TestAnthropicCacheControl:
+    def test_system_prompt_is_cache_breakpoint(self, client):
+        request = client._build_request(CONVERSATION[:2], cache_conversation=False)
+        assert request["system"] == [
+            {"type": "text", "text": "static instructions", "cache_control": {"type": "ephemeral"}}]
+        assert request["messages"] == [{"role": "user", "content": "diff"}]
+
+    def test_conversation_marks_last_message(self, client):
+        request = client._build_request(CONVERSATION, cache_conversation=True)
+        assert request["messages"][-1]["content"] == [
+            {"type": "text", "text": "tool output", "cache_control": {"type": "ephemeral"}}]
+        # earlier turns stay byte-identical so the cached prefix matches next round
+        assert request["messages"][:2] == [{"role": "user", "content": "diff"},
+                                           {"role": "assistant", "content": "looking"}]
+
+    def test_does_not_mutate_block_content(self, client):
+        blocks = [{"type": "text", "text": "x"}]
+        client._build_request([{"role": "user", "content": blocks}], cache_conversation=True)
+        assert blocks == [{"type": "text", "text": "x"}]
+
+    def test_can_be_disabled(self, client, monkeypatch):
+        monkeypatch.setenv("ANTHROPIC_PROMPT_CACHE", "0")
+        request = client._build_request(CONVERSATION, cache_conversation=True)
+        assert "cache_control" not in request["system"][0]
+        assert request["messages"][-1]["content"] == "tool output"
+
+
+def test_agentic_system_prompt_is_stable_across_jobs():
+    """The system prompt is the cacheable prefix; it must not embed per-job values."""
+    system = load_prompt("agentic_code_review_prompt")["system_message"]["content"]
+    assert "{" not in system
@@ -0,0 +1,150 @@
+import httpx
+import openai
+import pytest
+
+from biz.llm import resilience
+from biz.llm.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryPolicy,
+    call_with_resilience,
+    is_transient_error,
+    retry_after_seconds,
+)
+
+
+def _status_error(status, headers=None):
+    request = httpx.Request("POST", "https://example.invalid/v1/chat/completions")
+    response = httpx.Response(status, headers=headers or {}, request=request)
+    return openai.APIStatusError("error", response=response, body=None)
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(resilience.time, "sleep", sleeps.append)
+    return sleeps
+
+
+@pytest.fixture
+def breaker(tmp_path):
+    return CircuitBreaker(str(tmp_path / "circuit.json"), failure_threshold=2, cooldown=60)
+
+
+def _flaky(errors, result="ok"):
+    calls = []
+
+    def func(timeout):
+        calls.append(timeout)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+    func.calls = calls
+    return func
+
+
+class TestClassification:
+    def test_retryable_statuses(self):
+        assert is_transient_error(_status_error(429))
+        assert is_transient_error(_status_error(503))
+        assert not is_transient_error(_status_error(400))
+        assert not is_transient_error(_status_error(401))
+
+    def test_timeouts_and_connection_errors(self):
+        request = httpx.Request("POST", "https://example.invalid")
+        assert is_transient_error(openai.APITimeoutError(request=request))
+        assert is_transient_error(openai.APIConnectionError(request=request))
+        assert is_transient_error(httpx.ReadTimeout("slow"))
+        assert not is_transient_error(ValueError("bad"))
+
+    def test_retry_after_headers(self):
+        assert retry_after_seconds(_status_error(429, {"retry-after": "7"})) == 7
+        assert retry_after_seconds(_status_error(429, {"retry-after-ms": "1500"})) == 1.5
+        assert retry_after_seconds(_status_error(429)) is None
+
+
+class TestRetries:
+    def test_retries_transient_then_succeeds(self, tmp_path, no_sleep):
+        breaker = CircuitBreaker(str(tmp_path / "c.json"), failure_threshold=10)
+        func = _flaky([_status_error(503), _status_error(429, {"retry-after": "4"})])
+        policy = RetryPolicy(max_attempts=3, base_delay=0.01, max_delay=0.01)
+        assert call_with_resilience("p", func, policy=policy, breaker=breaker) == "ok"
+        assert len(func.calls) == 3
+        assert no_sleep[1] == 4  # Retry-After wins over the smaller backoff
+
+    def test_non_transient_error_is_not_retried(self, breaker):
+        func = _flaky([_status_error(400)])
+        with pytest.raises(openai.APIStatusError):
+            call_with_resilience("p", func, policy=RetryPolicy(), breaker=breaker)
+        assert len(func.calls) == 1
+        assert breaker.states().get("p", {}).get("failures", 0) == 0
+
+    def test_gives_up_after_max_attempts(self, tmp_path):
+        breaker = CircuitBreaker(str(tmp_path / "c.json"), failure_threshold=10)
+        func = _flaky([_status_error(500)] * 5)
+        with pytest.raises(openai.APIStatusError):
+            call_with_resilience("p", func, policy=RetryPolicy(max_attempts=2, base_delay=0), breaker=breaker)
+        assert len(func.calls) == 2
+
+    def test_timeout_is_bounded_by_deadline(self, breaker):
+        func = _flaky([])
+        call_with_resilience("p", func, policy=RetryPolicy(request_timeout=120, deadline=5), breaker=breaker)
+        assert func.calls[0] <= 5
+
+    def test_retry_past_deadline_gives_up(self, breaker):
+        func = _flaky([_status_error(429, {"retry-after": "600"})])
+        with pytest.raises(openai.APIStatusError):
+            call_with_resilience("p", func, policy=RetryPolicy(deadline=10), breaker=breaker)
+        assert len(func.calls) == 1
+
+
+class TestCircuitBreaker:
+    def test_opens_after_threshold_and_fails_fast(self, breaker):
+        func = _flaky([_status_error(503)] * 10)
+        with pytest.raises(openai.APIStatusError):
+            call_with_resilience("p", func, policy=RetryPolicy(max_attempts=2, base_delay=0), breaker=breaker)
+        assert breaker.states()["p"]["state"] == "open"
+        calls_before = len(func.calls)
+        with pytest.raises(CircuitOpenError):
+            call_with_resilience("p", func, policy=RetryPolicy(), breaker=breaker)
+        assert len(func.calls) == calls_before
+
+    def test_half_open_trial_closes_on_success(self, breaker, monkeypatch):
+        breaker.record_failure("p")
+        breaker.record_failure("p")
+        now = resilience.time.time()
+        monkeypatch.setattr(resilience.time, "time", lambda: now + 61)
+        breaker.before_call("p")
+        assert breaker.states()["p"]["state"] == "half_open"
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call("p")  # only one trial at a time
+        breaker.record_success("p")
+        assert breaker.states()["p"] == {"state": "closed", "failures": 0}
+
+    def test_half_open_trial_failure_reopens(self, breaker, monkeypatch):
+        breaker.record_failure("p")
+        breaker.record_failure("p")
+        now = resilience.time.time()
+        monkeypatch.setattr(resilience.time, "time", lambda: now + 61)
+        breaker.before_call("p")
+        breaker.record_failure("p")
+        assert breaker.states()["p"]["state"] == "open"
+
+    def test_providers_are_independent(self, breaker):
+        breaker.record_failure("a")
+        breaker.record_failure("a")
+        breaker.before_call("b")
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call("a")
+
+    def test_closed_breaker_does_not_rewrite_state(self, breaker):
+        breaker.before_call("p")
+        breaker.record_success("p")
+        assert not breaker.store.path.exists()
+
+        breaker.record_failure("p")
+        mtime = breaker.store.path.stat().st_mtime_ns
+        breaker.before_call("p")
+        assert breaker.store.path.stat().st_mtime_ns == mtime
+        breaker.record_success("p")  # resets the failure count
+        assert breaker.states()["p"] == {"state": "closed", "failures": 0}
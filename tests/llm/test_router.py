@@ -0,0 +1,147 @@
+import threading
+import time
+
+import pytest
+
+from biz.llm.client.router import RoutingClient
+from biz.llm.health import ProviderHealth
+
+
+class FakeClient:
+    def __init__(self, reply="ok", delay=0.0, error=None, tools=True):
+        self.reply = reply
+        self.delay = delay
+        self.error = error
+        self.tools = tools
+        self.calls = []
+        self.default_model = f"{reply}-model"
+
+    def completions(self, messages, model=None):
+        self.calls.append({"messages": messages, "model": model})
+        if self.delay:
+            time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self.reply
+
+    def chat_with_tools(self, messages, tools=None, model=None):
+        if not self.tools:
+            raise NotImplementedError
+        return {"content": self.completions(messages, model), "tool_calls": [], "raw": None}
+
+
+@pytest.fixture
+def health(tmp_path):
+    return ProviderHealth(str(tmp_path / "health.json"))
+
+
+class TestFailover:
+    def test_primary_success(self, health):
+        router = RoutingClient({"a": FakeClient("A"), "b": FakeClient("B")}, health=health)
+        assert router.completions([{"role": "user", "content": "?"}]) == "A"
+
+    def test_fails_over_on_error_and_records_health(self, health):
+        a = FakeClient("A", error=RuntimeError("503"))
+        router = RoutingClient({"a": a, "b": FakeClient("B")}, health=health)
+        assert router.completions([{"role": "user", "content": "?"}]) == "B"
+        assert health.snapshot("a")["error_rate"] == 1.0
+        assert health.snapshot("b")["samples"] == 1
+
+    def test_all_fail_raises(self, health):
+        router = RoutingClient({
+            "a": FakeClient(error=RuntimeError("down")),
+            "b": FakeClient(error=RuntimeError("also down")),
+        }, health=health)
+        with pytest.raises(RuntimeError, match="all LLM providers failed"):
+            router.completions([{"role": "user", "content": "?"}])
+
+    def test_unhealthy_primary_is_demoted(self, health):
+        for _ in range(5):
+            health.record("a", 1.0, ok=False)
+        a, b = FakeClient("A"), FakeClient("B")
+        router = RoutingClient({"a": a, "b": b}, health=health)
+        assert router.completions([{"role": "user", "content": "?"}]) == "B"
+        assert a.calls == []
+
+    def test_model_override_only_applies_to_primary(self, health):
+        a = FakeClient("A", error=RuntimeError("x"))
+        b = FakeClient("B")
+        router = RoutingClient({"a": a, "b": b}, health=health)
+        router.completions([{"role": "user", "content": "?"}], model="a-large")
+        assert a.calls[0]["model"] == "a-large"
+        assert b.calls[0]["model"] is None
+
+    def test_tools_skip_providers_without_native_support(self, health):
+        router = RoutingClient({"a": FakeClient("A", tools=False), "b": FakeClient("B")}, health=health)
+        assert router.chat_with_tools([{"role": "user", "content": "?"}])["content"] == "B"
+
+    def test_tools_unsupported_everywhere_raises_not_implemented(self, health):
+        router = RoutingClient({"a": FakeClient(tools=False), "b": FakeClient(tools=False)}, health=health)
+        with pytest.raises(NotImplementedError):
+            router.chat_with_tools([{"role": "user", "content": "?"}])
+
+
+class TestHedging:
+    def test_slow_primary_is_hedged(self, health):
+        slow, fast = FakeClient("SLOW", delay=1.0), FakeClient("FAST")
+        router = RoutingClient({"a": slow, "b": fast}, health=health, hedge_enabled=True,
+                               hedge_min_delay=0.05, hedge_max_delay=0.05)
+        start = time.monotonic()
+        assert router.completions([{"role": "user", "content": "?"}]) == "FAST"
+        assert time.monotonic() - start < 0.8
+
+    def test_fast_primary_is_not_hedged(self, health):
+        fast, other = FakeClient("A"), FakeClient("B")
+        router = RoutingClient({"a": fast, "b": other}, health=health, hedge_enabled=True,
+                               hedge_min_delay=0.5, hedge_max_delay=0.5)
+        assert router.completions([{"role": "user", "content": "?"}]) == "A"
+        assert other.calls == []
+
+    def test_hedge_delay_follows_p95(self, health):
+        for latency in (0.1, 0.2, 0.3, 0.4, 5.0):
+            health.record("a", latency, ok=True)
+        router = RoutingClient({"a": FakeClient(), "b": FakeClient()}, health=health,
+                               hedge_enabled=True, hedge_min_delay=0.5, hedge_max_delay=3.0)
+        assert router._hedge_delay("a") == 3.0
+        assert router._hedge_delay("b") == 3.0  # no samples: wait the maximum
+
+    def test_primary_error_before_hedge_fails_over(self, health):
+        a = FakeClient("A", error=RuntimeError("boom"))
+        router = RoutingClient({"a": a, "b": FakeClient("B")}, health=health, hedge_enabled=True,
+                               hedge_min_delay=5, hedge_max_delay=5)
+        assert router.completions([{"role": "user", "content": "?"}]) == "B"
+
+
+class TestProviderHealthConcurrency:
+    def test_concurrent_records_are_not_lost(self, health):
+        threads = [threading.Thread(target=health.record, args=("a", 0.1, True)) for _ in range(20)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert health.snapshot("a")["samples"] == 20
+
+
+
+class TestDeepSeekPrimary:
+    def test_failing_deepseek_primary_fails_over(self, health, tmp_path, monkeypatch):
+        from unittest.mock import patch
+
+        from biz.llm import resilience
+        from biz.llm.client.deepseek import DeepSeekClient
+        from biz.utils.code_reviewer import CodeReviewer
+
+        monkeypatch.setattr(resilience, "_breaker", resilience.CircuitBreaker(str(tmp_path / "circuit.json")))
+        deepseek = DeepSeekClient(api_key="sk-test")
+        router = RoutingClient({"deepseek": deepseek, "b": FakeClient("B")}, health=health)
+        messages = [{"role": "user", "content": "hi"}]
+        with patch.object(deepseek.client.chat.completions, "create", side_effect=RuntimeError("401 Unauthorized")):
+            assert router.completions(messages) == "B"
+            assert health.snapshot("deepseek")["error_rate"] == 1.0
+
+            # Only once every provider has failed does CodeReviewer turn the error into DeepSeek's hint.
+            router.clients["b"] = FakeClient(error=RuntimeError("down"))
+            with patch("biz.utils.code_reviewer.Factory") as MockFactory:
+                MockFactory.return_value.getClient.return_value = router
+                reviewer = CodeReviewer()
+            assert reviewer.call_llm(messages) == "DeepSeek API认证失败，请检查API密钥是否正确"
@@ -0,0 +1,118 @@
+import json
+from unittest.mock import MagicMock
+
+import httpx
+import pytest
+from anthropic import Anthropic
+from openai import OpenAI
+
+from biz.llm.client.anthropic import AnthropicClient
+from biz.llm.client.openai import OpenAIClient
+from biz.llm.usage import collect_usage
+from biz.utils.review_progress import ThrottledProgress
+
+
+@pytest.fixture(autouse=True)
+def _isolated_breaker(tmp_path, monkeypatch):
+    monkeypatch.setenv("LLM_CIRCUIT_FILE", str(tmp_path / "circuit.json"))
+    monkeypatch.setattr("biz.llm.resilience._breaker", None)
+
+
+def _sse(events) -> bytes:
+    lines = []
+    for event in events:
+        if isinstance(event, tuple):
+            lines.append(f"event: {event[0]}\ndata: {json.dumps(event[1])}\n\n")
+        else:
+            lines.append(f"data: {event if isinstance(event, str) else json.dumps(event)}\n\n")
+    return "".join(lines).encode()
+
+
+def _transport(body: bytes, seen: list) -> httpx.MockTransport:
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(json.loads(request.content))
+        return httpx.Response(200, content=body, headers={"content-type": "text/event-stream"})
+
+    return httpx.MockTransport(handler)
+
+
+def _openai_chunk(content=None, usage=None) -> dict:
+    choices = [] if content is None else [{"index": 0, "delta": {"content": content}, "finish_reason": None}]
+    return {"id": "c1", "object": "chat.completion.chunk", "created": 0, "model": "gpt-test",
+            "choices": choices, "usage": usage}
+
+
+def test_openai_stream_reports_progress_and_usage(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    client = OpenAIClient()
+    seen = []
+    client.client = OpenAI(api_key="test-key", base_url="http://llm.test/v1", max_retries=0,
+                           http_client=httpx.Client(transport=_transport(_sse([
+                               _openai_chunk("总分:"), _openai_chunk("85分"),
+                               _openai_chunk(usage={"prompt_tokens": 40, "completion_tokens": 6, "total_tokens": 46}),
+                               "[DONE]",
+                           ]), seen)))
+    progress = []
+    with collect_usage() as usage:
+        text = client.stream_completions([{"role": "user", "content": "review"}], on_progress=progress.append)
+    assert text == "总分:85分"
+    assert progress == ["总分:", "总分:85分"]
+    assert seen[0]["stream"] is True and seen[0]["stream_options"] == {"include_usage": True}
+    assert (usage.input_tokens, usage.output_tokens, usage.model) == (40, 6, "gpt-test")
+
+
+def test_anthropic_stream_reports_progress_and_usage(monkeypatch):
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+    monkeypatch.delenv("ANTHROPIC_API_BASE_URL", raising=False)
+    client = AnthropicClient()
+    seen = []
+    message = {"id": "m1", "type": "message", "role": "assistant", "model": "claude-test", "content": [],
+               "stop_reason": None, "stop_sequence": None,
+               "usage": {"input_tokens": 30, "output_tokens": 1, "cache_read_input_tokens": 100}}
+    client.client = Anthropic(api_key="test-key", max_retries=0, http_client=httpx.Client(transport=_transport(_sse([
+        ("message_start", {"type": "message_start", "message": message}),
+        ("content_block_start", {"type": "content_block_start", "index": 0,
+                                 "content_block": {"type": "text", "text": ""}}),
+        ("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                 "delta": {"type": "text_delta", "text": "LGTM "}}),
+        ("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                 "delta": {"type": "text_delta", "text": "总分:90分"}}),
+        ("content_block_stop", {"type": "content_block_stop", "index": 0}),
+        ("message_delta", {"type": "message_delta", "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                           "usage": {"output_tokens": 9}}),
+        ("message_stop", {"type": "message_stop"}),
+    ]), seen)))
+    progress = []
+    with collect_usage() as usage:
+        text = client.stream_completions([{"role": "system", "content": "sys"}, {"role": "user", "content": "diff"}],
+                                         on_progress=progress.append)
+    assert text == "LGTM 总分:90分"
+    assert progress == ["LGTM ", "LGTM 总分:90分"]
+    assert seen[0]["stream"] is True
+    assert (usage.input_tokens, usage.cached_tokens, usage.output_tokens) == (130, 100, 9)
+
+
+def test_default_implementation_reports_once():
+    from biz.llm.client.base import BaseClient
+
+    class _Plain(BaseClient):
+        def completions(self, messages, model=None):
+            return "done"
+
+    progress = []
+    assert _Plain().stream_completions([], on_progress=progress.append) == "done"
+    assert progress == ["done"]
+
+
+def test_throttled_progress(monkeypatch):
+    clock = iter([0.0, 1.0, 6.0, 7.0])
+    monkeypatch.setattr("biz.utils.review_progress.time.monotonic", lambda: next(clock))
+    publish = MagicMock()
+    progress = ThrottledProgress(publish, min_interval=5)
+    for text in ("a", "ab", "abc", "abcd"):
+        progress(text)
+    assert [c.args[0] for c in publish.call_args_list] == ["a", "abc"]
+
+
+def test_throttled_progress_swallows_publish_errors():
+    ThrottledProgress(MagicMock(side_effect=RuntimeError("gitlab down")), min_interval=0)("x")
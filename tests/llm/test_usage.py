@@ -0,0 +1,81 @@
+import threading
+from types import SimpleNamespace
+
+from biz.llm.client.base import BaseClient
+from biz.llm.usage import LLMUsage, UsageCollector, collect_usage, extract_usage, record_usage
+
+
+class TestExtractUsage:
+    def test_openai_shape_with_cached_tokens(self):
+        response = SimpleNamespace(model="gpt-4o-mini", usage=SimpleNamespace(
+            prompt_tokens=1200, completion_tokens=300,
+            prompt_tokens_details=SimpleNamespace(cached_tokens=1024)))
+        assert extract_usage(response) == LLMUsage("gpt-4o-mini", 1200, 300, 1024)
+
+    def test_deepseek_cache_hit_tokens(self):
+        response = SimpleNamespace(model="deepseek-chat", usage=SimpleNamespace(
+            prompt_tokens=900, completion_tokens=100, prompt_tokens_details=None, prompt_cache_hit_tokens=640))
+        assert extract_usage(response).cached_tokens == 640
+
+    def test_anthropic_shape_counts_cache_in_input(self):
+        response = SimpleNamespace(model="claude", usage=SimpleNamespace(
+            input_tokens=50, output_tokens=200, cache_read_input_tokens=2000, cache_creation_input_tokens=0))
+        usage = extract_usage(response)
+        assert (usage.input_tokens, usage.output_tokens, usage.cached_tokens) == (2050, 200, 2000)
+
+    def test_ollama_shape(self):
+        usage = extract_usage({"model": "qwen", "prompt_eval_count": 30, "eval_count": 12})
+        assert (usage.input_tokens, usage.output_tokens) == (30, 12)
+
+    def test_unknown_shape_is_zero(self):
+        assert extract_usage("plain text") == LLMUsage()
+
+
+class TestCollectUsage:
+    def test_nested_collectors_both_receive_calls(self):
+        with collect_usage() as outer:
+            record_usage(LLMUsage("m1", 10, 5, 0, 100))
+            with collect_usage() as inner:
+                record_usage(LLMUsage("m2", 20, 5, 4, 50))
+        assert (outer.calls, outer.input_tokens, outer.llm_latency_ms) == (2, 30, 150)
+        assert (inner.calls, inner.cached_tokens) == (1, 4)
+
+    def test_no_collector_is_noop(self):
+        record_usage(LLMUsage("m", 1, 1))
+
+    def test_main_model_and_columns(self):
+        collector = UsageCollector()
+        for model in ("a", "b", "b"):
+            collector.add(LLMUsage(model, 1, 2, 0, 10))
+        assert collector.to_columns() == {
+            "llm_model": "b", "input_tokens": 3, "output_tokens": 6, "cached_tokens": 0, "llm_latency_ms": 30,
+        }
+
+    def test_concurrent_adds(self):
+        collector = UsageCollector()
+        threads = [threading.Thread(target=lambda: [collector.add(LLMUsage("m", 1)) for _ in range(100)])
+                   for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert collector.input_tokens == 800
+
+
+class _StubClient(BaseClient):
+    provider = "stub-usage"
+
+    def completions(self, messages, model=None):
+        response = self._call_with_resilience(lambda timeout: SimpleNamespace(
+            model="stub-1", usage=SimpleNamespace(prompt_tokens=7, completion_tokens=3)))
+        return "ok" if response else ""
+
+
+def test_client_call_sets_last_usage_and_reports(tmp_path, monkeypatch):
+    monkeypatch.setenv("LLM_CIRCUIT_FILE", str(tmp_path / "circuit.json"))
+    monkeypatch.setattr("biz.llm.resilience._breaker", None)
+    client = _StubClient()
+    with collect_usage() as usage:
+        client.completions([{"role": "user", "content": "hi"}])
+    assert client.last_usage.input_tokens == 7
+    assert (usage.calls, usage.output_tokens, usage.model) == (1, 3, "stub-1")
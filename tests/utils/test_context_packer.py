@@ -0,0 +1,126 @@
+from biz.utils.context_packer import (
+    classify_file,
+    format_omitted_note,
+    is_whitespace_only_hunk,
+    pack_changes,
+    split_hunks,
+)
+from biz.utils.diff_serializer import serialize_changes
+from biz.utils.token_util import count_tokens
+
+
+def _change(path: str, diff: str) -> dict:
+    return {"new_path": path, "diff": diff, "additions": 1, "deletions": 1}
+
+
+def _hunk(start: int, body_lines: int, marker: str = "x") -> str:
+    body = "".join(f"+    value_{marker}_{i} = compute_{marker}({i})\n" for i in range(body_lines))
+    return f"@@ -{start},1 +{start},{body_lines} @@\n{body}"
+
+
+class TestClassifyFile:
+    def test_lockfile(self):
+        assert classify_file("frontend/package-lock.json") == "lockfile"
+        assert classify_file("go.sum") == "lockfile"
+
+    def test_vendored(self):
+        assert classify_file("vendor/github.com/x/y.go") == "vendored"
+        assert classify_file("web/node_modules/lib/index.js") == "vendored"
+
+    def test_generated_by_path_and_marker(self):
+        assert classify_file("static/app.min.js") == "generated"
+        assert classify_file("api/service_pb2.py") == "generated"
+        assert classify_file("pkg/types.go", "@@ -1 +1 @@\n+// Code generated by mockgen. DO NOT EDIT.\n") == "generated"
+
+    def test_test_doc_source(self):
+        assert classify_file("tests/test_api.py") == "test"
+        assert classify_file("src/app.spec.ts") == "test"
+        assert classify_file("docs/guide.md") == "doc"
+        assert classify_file("biz/service/review_service.py") == "source"
+
+
+class TestHunks:
+    def test_split_hunks(self):
+        diff = _hunk(1, 2) + _hunk(10, 3)
+        hunks = split_hunks(diff)
+        assert len(hunks) == 2
+        assert hunks[1].startswith("@@ -10,1")
+
+    def test_whitespace_only_hunk(self):
+        assert is_whitespace_only_hunk("@@ -1 +1 @@\n-if x:\n-  y()\n+if x:\n+    y()  \n")
+        assert not is_whitespace_only_hunk("@@ -1 +1 @@\n-x = 1\n+x = 2\n")
+
+
+class TestPackChanges:
+    def test_within_budget_returns_changes_unchanged(self):
+        changes = [_change("a.py", _hunk(1, 2))]
+        result = pack_changes(changes, 10_000)
+        assert result.changes == changes
+        assert result.omitted == []
+
+    def test_source_preferred_over_lockfile_that_comes_first(self):
+        lock = _change("package-lock.json", _hunk(1, 300, "lock"))
+        src = _change("src/core.py", _hunk(1, 20, "core"))
+        budget = count_tokens(src["diff"]) + 400
+
+        result = pack_changes([lock, src], budget)
+
+        kept_paths = [c["new_path"] for c in result.changes]
+        assert kept_paths == ["src/core.py"]
+        assert {"path": "package-lock.json", "reason": "lockfile"} in result.omitted
+        assert result.used_tokens <= budget
+
+    def test_whitespace_hunks_deprioritised(self):
+        ws = "@@ -1,2 +1,2 @@\n" + "".join(f"-x{i}=1\n+x{i} = 1\n" for i in range(200))
+        real = _hunk(500, 10, "real")
+        change = _change("src/mod.py", ws + real)
+        budget = count_tokens(real) + 400
+
+        result = pack_changes([change], budget)
+
+        assert len(result.changes) == 1
+        assert result.changes[0]["diff"].startswith("@@ -500,1")
+        assert result.omitted == [{"path": "src/mod.py", "reason": "partial (1/2 hunks)"}]
+
+    def test_oversized_source_hunk_is_truncated_not_dropped(self):
+        big = _change("src/big.py", _hunk(1, 2000, "big"))
+        result = pack_changes([big], 1000)
+        assert len(result.changes) == 1
+        assert {"path": "src/big.py", "reason": "truncated"} in result.omitted
+        assert count_tokens(result.changes[0]["diff"]) <= 1000
+
+    def test_many_small_files_fit_when_serialized(self):
+        changes = [_change(f"biz/platforms/handlers/pkg_{i}/module_{i}_handler.py", _hunk(1, 1, f"m{i}"))
+                   for i in range(300)]
+        result = pack_changes(changes, 2000)
+        serialized = serialize_changes(result.changes) + format_omitted_note(result.omitted)
+        assert count_tokens(serialized) <= 2000
+        assert result.omitted
+
+    def test_long_path_headers_are_counted(self):
+        docs = [_change(f"docs/reference/services/billing/subsystems/component_{i}/overview.md", _hunk(1, 1, f"d{i}"))
+                for i in range(250)]
+        src = _change("biz/service/billing.py", _hunk(1, 150, "billing"))
+        result = pack_changes(docs + [src], 4000)
+
+        serialized = serialize_changes(result.changes) + format_omitted_note(result.omitted)
+        assert count_tokens(serialized) <= 4000
+        assert result.changes[-1] == src
+        assert any(item["reason"] == "doc" for item in result.omitted)
+
+    def test_format_omitted_note(self):
+        note = format_omitted_note([
+            {"path": "yarn.lock", "reason": "lockfile"},
+            {"path": "src/a.py", "reason": "partial (1/3 hunks)"},
+        ])
+        assert "yarn.lock: 依赖锁文件" in note
+        assert "src/a.py: 仅包含部分 hunk (1/3 hunks)" in note
+        assert format_omitted_note([]) == ""
+
+    def test_format_omitted_note_stays_within_reserve(self):
+        omitted = [{"path": f"src/module_{i}/handlers.py", "reason": "budget"} for i in range(200)]
+        note = format_omitted_note(omitted, max_tokens=300)
+        assert count_tokens(note) <= 300
+        assert "src/module_0/handlers.py: 超出 token 预算" in note
+        listed = note.count("handlers.py")
+        assert f"- 其余 {200 - listed} 个文件未列出" in note
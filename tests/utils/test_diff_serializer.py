@@ -0,0 +1,47 @@
+from biz.utils.diff_serializer import compare_token_counts, serialize_changes
+
+
+def _change(path: str, diff: str, additions: int = 1, deletions: int = 1) -> dict:
+    return {"new_path": path, "diff": diff, "additions": additions, "deletions": deletions}
+
+
+class TestSerializeChanges:
+    def test_empty_changes_serialize_to_empty_string(self):
+        assert serialize_changes([]) == ""
+
+    def test_header_and_raw_diff_per_file(self):
+        out = serialize_changes([
+            _change("src/a.py", "@@ -1 +1 @@\n-x = 1\n+x = 2\n"),
+            _change("src/b.py", "@@ -3 +3 @@\n-y\n+z", additions=1, deletions=1),
+        ])
+        assert out == (
+            "### src/a.py (+1 -1)\n"
+            "@@ -1 +1 @@\n-x = 1\n+x = 2\n"
+            "### src/b.py (+1 -1)\n"
+            "@@ -3 +3 @@\n-y\n+z\n"
+        )
+
+    def test_no_repr_artifacts(self):
+        out = serialize_changes([_change("a.py", "@@ -1 +1 @@\n-'a'\n+\"b\"\n")])
+        assert "'diff':" not in out
+        assert "\\n" not in out
+        assert "-'a'\n" in out
+
+    def test_non_dict_items_are_kept_as_text(self):
+        assert serialize_changes(["+ x"]) == "+ x\n"
+
+
+class TestTokenBenchmark:
+    def test_compact_format_uses_fewer_tokens_than_repr(self):
+        diff = "".join(
+            f"@@ -{i},3 +{i},3 @@\n     context line {i}\n-    old_value = '{i}'\n+    new_value = \"{i}\"\n"
+            for i in range(1, 200, 5)
+        )
+        changes = [_change(f"pkg/module_{n}.py", diff, additions=40, deletions=40) for n in range(10)]
+
+        counts = compare_token_counts(changes)
+
+        assert counts["compact_tokens"] < counts["repr_tokens"]
+        # Escaped newlines/quotes and dict keys in the repr cost at least ~5% extra,
+        # even under the character-based offline estimator.
+        assert counts["saved_tokens"] >= counts["repr_tokens"] * 0.05
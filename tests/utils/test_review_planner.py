@@ -0,0 +1,79 @@
+from unittest.mock import patch
+
+from biz.utils.review_planner import PlannerPolicy, analyze_changes, plan_review
+
+POLICY = PlannerPolicy(cheap_model="cheap", strong_model="strong")
+
+
+def _change(path: str, diff: str, additions: int = 1, deletions: int = 0) -> dict:
+    return {"new_path": path, "diff": diff, "additions": additions, "deletions": deletions}
+
+
+def _lines(n: int, marker: str = "v") -> str:
+    return "@@ -1,1 +1,%d @@\n" % n + "".join(f"+    {marker}_{i} = {i}\n" for i in range(n))
+
+
+class TestAnalyzeChanges:
+    def test_counts_cross_file_symbol_references(self):
+        changes = [
+            _change("app/service.py", "@@ -1 +1 @@\n+def compute_total(items):\n+    return sum(items)\n"),
+            _change("app/views.py", "@@ -5 +5 @@\n-    total = 0\n+    total = compute_total(order.items)\n"),
+        ]
+        assert analyze_changes(changes).cross_file_refs == 1
+
+    def test_hunk_header_context_counts_as_changed_symbol(self):
+        changes = [
+            _change("a.py", "@@ -10,2 +10,2 @@ def validate_order(order):\n-    x = 1\n+    x = 2\n"),
+            _change("b.py", "@@ -1 +1 @@\n+validate_order(o)\n"),
+        ]
+        assert analyze_changes(changes).cross_file_refs == 1
+
+    def test_lockfiles_do_not_count_toward_size(self):
+        changes = [_change("a.py", "+x = 1\n"), _change("package-lock.json", "+{}\n", additions=500)]
+        stats = analyze_changes(changes)
+        assert (stats.files, stats.languages, stats.lines) == (1, {"python"}, 1)
+
+
+class TestPlanReview:
+    def test_small_change_uses_diff_only_and_cheap_model(self):
+        plan = plan_review([_change("README.md", "-teh\n+the\n", 1, 1)], POLICY)
+        assert (plan.strategy, plan.tier, plan.model) == ("diff_only", "small", "cheap")
+
+    def test_medium_change_uses_strong_model_without_agent(self):
+        plan = plan_review([_change("a.py", _lines(120), 120)], POLICY)
+        assert (plan.strategy, plan.tier, plan.model) == ("diff_only", "medium", "strong")
+
+    def test_large_change_goes_agentic_with_scaled_budget(self):
+        changes = [_change(f"pkg/m{i}.py", _lines(40, f"m{i}"), 40) for i in range(12)]
+        plan = plan_review(changes, POLICY)
+        assert (plan.strategy, plan.tier, plan.model) == ("agentic", "large", "strong")
+        assert POLICY.min_iterations <= plan.max_iterations <= POLICY.max_iterations
+        assert POLICY.min_token_cap <= plan.total_token_cap <= POLICY.total_token_cap
+
+    def test_cross_file_references_trigger_agentic(self):
+        changes = [
+            _change("svc.py", "+def rename_me(x):\n+def other_one(y):\n+class PaymentGateway:\n", 3),
+            _change("api.py", "+rename_me(1)\n+other_one(2)\n+PaymentGateway()\n", 3),
+        ]
+        assert plan_review(changes, POLICY).strategy == "agentic"
+
+    def test_many_languages_trigger_agentic(self):
+        changes = [_change(p, _lines(30, p[0]), 30) for p in ("a.py", "b.ts", "c.go")]
+        assert plan_review(changes, POLICY).strategy == "agentic"
+
+    def test_docs_and_config_are_not_languages(self):
+        changes = [_change(p, _lines(10, p[0]), 10) for p in ("app/a.py", "README.md", "deploy/ci.yml")]
+        assert analyze_changes(changes).languages == {"python"}
+        assert plan_review(changes, POLICY).strategy == "diff_only"
+
+
+def test_worker_auto_strategy_passes_model_to_reviewer(monkeypatch):
+    from biz.queue.worker import _review_with_strategy
+
+    monkeypatch.setenv("REVIEW_STRATEGY", "auto")
+    monkeypatch.setenv("REVIEW_CHEAP_MODEL", "tiny-model")
+    with patch("biz.queue.worker.CodeReviewer") as MockCR:
+        MockCR.return_value.review_and_strip_code.return_value = "OK"
+        out = _review_with_strategy([_change("a.py", "-x = 1\n+x = 2\n", 1, 1)], "c", {}, "")
+    assert out == "OK"
+    MockCR.assert_called_once_with(model="tiny-model")
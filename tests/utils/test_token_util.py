@@ -0,0 +1,72 @@
+import pytest
+
+from biz.utils import token_util
+
+
+class _CharEncoding:
+    """One token per character; records the length of every encoded text."""
+
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, text, disallowed_special="all"):
+        self.encoded.append(len(text))
+        return [ord(c) for c in text]
+
+    def encode_batch(self, texts, disallowed_special="all"):
+        return [self.encode(text) for text in texts]
+
+    def decode(self, tokens):
+        return "".join(chr(t) for t in tokens)
+
+
+@pytest.fixture
+def char_encoding(monkeypatch):
+    encoding = _CharEncoding()
+    monkeypatch.setattr(token_util, "_encoding_cache", {token_util.DEFAULT_ENCODING: encoding})
+    monkeypatch.setattr(token_util, "_count_memo", type(token_util._count_memo)())
+    return encoding
+
+
+@pytest.fixture
+def offline(monkeypatch):
+    attempts = []
+
+    def get_encoding(name):
+        attempts.append(name)
+        raise OSError("network unreachable")
+
+    monkeypatch.setattr(token_util, "_encoding_cache", {})
+    monkeypatch.setattr(token_util, "_encoding_failed", set())
+    monkeypatch.setattr(token_util.tiktoken, "get_encoding", get_encoding)
+    return attempts
+
+
+def test_truncate_encodes_only_a_bounded_prefix(char_encoding):
+    text = "x" * 1_000_000
+    assert token_util.truncate_text_by_tokens(text, 100) == "x" * 100
+    assert max(char_encoding.encoded) <= 100 * token_util._PREFIX_CHARS_PER_TOKEN
+
+
+def test_truncate_returns_short_text_unchanged(char_encoding):
+    assert token_util.truncate_text_by_tokens("short", 100) == "short"
+    assert token_util.truncate_text_by_tokens("abcdef", 0) == ""
+
+
+def test_batch_counts_are_memoised(char_encoding):
+    long_text = "y" * token_util._MEMO_MIN_CHARS
+    assert token_util.count_tokens_batch([long_text, "ab", ""]) == [len(long_text), 2, 0]
+    char_encoding.encoded.clear()
+    assert token_util.count_tokens(long_text) == len(long_text)
+    assert char_encoding.encoded == []
+
+
+def test_failed_encoding_load_is_not_retried(offline):
+    assert token_util.count_tokens("hello world, hello tokens") == 6
+    assert token_util.truncate_text_by_tokens("abcdefgh" * 10, 2) == "abcdefgh"
+    assert offline == [token_util.DEFAULT_ENCODING]
+
+
+def test_fallback_estimate_counts_chinese_runs(offline):
+    assert token_util._estimate_tokens_simple("中文" * 10 + "abcd" * 5) == 10 + 5
+    assert token_util._estimate_tokens_simple("") == 0
@@ -0,0 +1,115 @@
+from unittest.mock import patch
+
+from biz.utils.code_reviewer import CodeReviewer
+from biz.utils.triage import TriageStats, classify_change, classify_hunk, format_triage_result, triage_changes
+
+
+def _change(path: str, diff: str, additions: int = 1, deletions: int = 1) -> dict:
+    return {"new_path": path, "diff": diff, "additions": additions, "deletions": deletions}
+
+
+class TestClassifyHunk:
+    def test_whitespace_only(self):
+        assert classify_hunk("a.py", "@@ -1 +1 @@\n-x = 1  \n+x = 1\n") == "whitespace"
+
+    def test_python_comment_edit(self):
+        hunk = "@@ -1,2 +1,2 @@\n-# compute the total\n+# compute the order total\n x = 1\n"
+        assert classify_hunk("a.py", hunk) == "comment"
+
+    def test_java_trailing_comment_edit(self):
+        hunk = "@@ -3 +3 @@\n-    int retries = 3; // retry count\n+    int retries = 3; /* max retries */\n"
+        assert classify_hunk("Foo.java", hunk) == "comment"
+
+    def test_code_change_next_to_comment(self):
+        hunk = "@@ -1,2 +1,2 @@\n # retries\n-retries = 3\n+retries = 5\n"
+        assert classify_hunk("a.py", hunk) == "code"
+
+    def test_version_bump(self):
+        assert classify_hunk("package.json", '@@ -2 +2 @@\n-  "version": "1.2.3",\n+  "version": "1.3.0",\n') == "version"
+        assert classify_hunk("requirements.txt", "@@ -1 +1 @@\n-requests==2.31.0\n+requests==2.32.3\n") == "version"
+
+    def test_numeric_constant_is_not_version(self):
+        assert classify_hunk("a.py", "@@ -1 +1 @@\n-timeout = 1.5\n+timeout = 2.5\n") == "code"
+
+
+class TestTriageChanges:
+    def test_lockfile_and_comment_changes_are_trivial(self):
+        changes = [
+            _change("package-lock.json", "@@ -1 +1 @@\n-a\n+b\n", 900, 800),
+            _change("a.py", "@@ -1 +1 @@\n-# old\n+# new\n"),
+        ]
+        result = triage_changes(changes)
+        assert result.trivial
+        assert [f["kind"] for f in result.files] == ["lockfile", "comment"]
+        assert result.lines == 2
+
+    def test_code_change_is_not_trivial(self):
+        assert not triage_changes([_change("a.py", "@@ -1 +1 @@\n-x = 1\n+x = 2\n")]).trivial
+
+    def test_new_file_is_not_trivial(self):
+        from biz.platforms.gitlab.webhook_handler import filter_changes
+
+        changes = filter_changes([{"new_path": "a.py", "diff": "@@ -0,0 +1 @@\n+# header\n", "new_file": True}])
+        assert classify_change(changes[0]) == "code"
+        assert not triage_changes(changes).trivial
+
+    def test_generated_marker_needs_to_be_in_file_header(self):
+        header = "@@ -1,3 +1,3 @@\n // Code generated by protoc-gen-go. DO NOT EDIT.\n package api\n-var x = 1\n+var x = 2\n"
+        assert classify_change(_change("api/service.go", header)) == "generated"
+        assert classify_change(_change("web/app.min.js", "@@ -1 +1 @@\n-a\n+b\n")) == "generated"
+
+    def test_hand_written_source_with_marker_is_reviewed(self):
+        # A code generator's template emits the marker; the file itself is hand-written.
+        diff = ("@@ -10,2 +10,3 @@ def render(out):\n"
+                "     out.write(header)\n"
+                "+    out.write('# auto-generated, DO NOT EDIT')\n"
+                "     out.write(body)\n")
+        result = triage_changes([_change("tools/gen/codegen.py", diff, 1, 0)])
+        assert not result.trivial
+        assert result.files == [{"path": "tools/gen/codegen.py", "kind": "code"}]
+
+    def test_build_directory_is_not_enough_to_skip(self):
+        assert classify_change(_change("src/build/config.py", "@@ -1 +1 @@\n-x = 1\n+x = 2\n")) == "code"
+
+    def test_max_lines_threshold(self, monkeypatch):
+        monkeypatch.setenv("TRIAGE_MAX_LINES", "10")
+        result = triage_changes([_change("a.py", "@@ -1 +1 @@\n-# old\n+# new\n", 20, 20)])
+        assert not result.trivial and result.lines == 40
+
+    def test_skip_kinds_is_configurable(self, monkeypatch):
+        monkeypatch.setenv("TRIAGE_SKIP_KINDS", "whitespace,lockfile")
+        assert not triage_changes([_change("a.py", "@@ -1 +1 @@\n-# old\n+# new\n")]).trivial
+
+    def test_disabled(self, monkeypatch):
+        monkeypatch.setenv("TRIAGE_ENABLED", "0")
+        assert not triage_changes([_change("a.py", "@@ -1 +1 @@\n-x = 1 \n+x = 1\n")]).trivial
+
+    def test_unstructured_changes_are_not_trivial(self):
+        assert not triage_changes([]).trivial
+        assert not triage_changes(["raw diff text"]).trivial
+
+
+def test_formatted_result_carries_neutral_score(monkeypatch):
+    monkeypatch.setenv("TRIAGE_NEUTRAL_SCORE", "75")
+    result = triage_changes([_change("a.py", "@@ -1 +1 @@\n-# old\n+# new\n")])
+    text = format_triage_result(result)
+    assert "a.py" in text and "注释修改" in text
+    assert CodeReviewer.parse_review_score(text) == 75
+
+
+def test_stats_report_skip_rate():
+    stats = TriageStats()
+    stats.record(triage_changes([_change("a.py", "@@ -1 +1 @@\n-# old\n+# new\n")]))
+    stats.record(triage_changes([_change("a.py", "@@ -1 +1 @@\n-x = 1\n+x = 2\n")]))
+    summary = stats.summary()
+    assert (summary["total"], summary["skipped"], summary["skip_rate"]) == (2, 1, 0.5)
+    assert summary["skipped_by_kind"] == {"comment": 1}
+
+
+def test_worker_skips_llm_for_trivial_changes():
+    from biz.queue.worker import _review_with_strategy
+
+    with patch("biz.queue.worker.CodeReviewer") as MockCR:
+        out = _review_with_strategy([_change("yarn.lock", "@@ -1 +1 @@\n-a\n+b\n")], "c", {}, "")
+    MockCR.assert_not_called()
+    assert "总分:80分" in out
@@ -508,6 +508,49 @@ def generate_project_code_line_chart(df, figsize=_DEFAULT_CHART_FIGSIZE, xtick_f
     plt.close(fig)
 
 
+def generate_llm_usage_summary(df):
+    """展示大模型用量汇总，并按项目、模型统计 token 与耗时"""
+    usage_columns = ['input_tokens', 'output_tokens', 'cached_tokens', 'llm_latency_ms']
+    if df.empty or not all(col in df.columns for col in usage_columns + ['llm_model']):
+        return
+
+    usage_df = df.copy()
+    usage_df[usage_columns] = usage_df[usage_columns].fillna(0)
+    usage_df['llm_model'] = usage_df['llm_model'].fillna('').replace('', '未知')
+    st.markdown(
+        f"**输入 Token:** {int(usage_df['input_tokens'].sum())}，"
+        f"**输出 Token:** {int(usage_df['output_tokens'].sum())}，"
+        f"**缓存命中 Token:** {int(usage_df['cached_tokens'].sum())}，"
+        f"**平均大模型耗时:** {usage_df['llm_latency_ms'].mean() / 1000:.1f}s"
+    )
+    with st.expander("按项目 / 模型统计大模型用量"):
+        grouped = usage_df.groupby(['project_name', 'llm_model']).agg(
+            reviews=('input_tokens', 'size'),
+            input_tokens=('input_tokens', 'sum'),
+            output_tokens=('output_tokens', 'sum'),
+            cached_tokens=('cached_tokens', 'sum'),
+            avg_latency_ms=('llm_latency_ms', 'mean'),
+            total_latency_ms=('llm_latency_ms', 'sum'),
+        ).reset_index()
+        # 吞吐：每秒大模型耗时产出的 token 数
+        latency_s = grouped.pop('total_latency_ms') / 1000
+        grouped['output_tokens_per_s'] = (grouped['output_tokens'] / latency_s.where(latency_s > 0)).fillna(0).round(1)
+        st.dataframe(
+            grouped,
+            use_container_width=True,
+            column_config={
+                "project_name": "项目名称",
+                "llm_model": "模型",
+                "reviews": "评审次数",
+                "input_tokens": "输入 Token",
+                "output_tokens": "输出 Token",
+                "cached_tokens": "缓存命中 Token",
+                "avg_latency_ms": st.column_config.NumberColumn("平均耗时(ms)", format="%d"),
+                "output_tokens_per_s": "输出 Token/秒",
+            },
+        )
+
+
 # 退出登录函数
 def logout():
     # 清除session状态
@@ -599,6 +642,7 @@ def main_page():
             total_records = len(df)
             average_score = df["score"].mean() if not df.empty else 0
             st.markdown(f"**总记录数:** {total_records}，**平均得分:** {average_score:.2f}")
+            generate_llm_usage_summary(df)
 
             # 所有统计图同一行排列（画布与坐标轴字号收窄以适配宽幅多列）
             chart_title_css = "<div style='text-align:center;font-size:clamp(11px,0.95vw,14px);line-height:1.2;margin:0 0 0.2rem 0;'><b>{}</b></div>"
@@ -631,7 +675,8 @@ def main_page():
     # Merge Request 数据展示
     mr_columns = ["project_name", "author", "source_branch", "target_branch", "updated_at", "commit_messages", "delta",
                   "score",
-                  "url", 'additions', 'deletions']
+                  "url", 'additions', 'deletions', 'llm_model', 'input_tokens', 'output_tokens', 'cached_tokens',
+                  'llm_latency_ms']
 
     mr_column_config = {
         "project_name": "项目名称",
@@ -654,6 +699,11 @@ def main_page():
         ),
         "additions": None,
         "deletions": None,
+        "llm_model": "模型",
+        "input_tokens": "输入 Token",
+        "output_tokens": "输出 Token",
+        "cached_tokens": "缓存命中 Token",
+        "llm_latency_ms": "大模型耗时(ms)",
     }
 
     display_data(mr_tab, ReviewService().get_mr_review_logs, mr_columns, mr_column_config)
@@ -661,7 +711,8 @@ def main_page():
     # Push 数据展示
     if show_push_tab:
         push_columns = ["project_name", "author", "branch", "updated_at", "commit_messages", "delta", "score",
-                        'additions', 'deletions']
+                        'additions', 'deletions', 'llm_model', 'input_tokens', 'output_tokens', 'cached_tokens',
+                        'llm_latency_ms']
 
         push_column_config = {
             "project_name": "项目名称",
@@ -678,6 +729,11 @@ def main_page():
             ),
             "additions": None,
             "deletions": None,
+            "llm_model": "模型",
+            "input_tokens": "输入 Token",
+            "output_tokens": "输出 Token",
+            "cached_tokens": "缓存命中 Token",
+            "llm_latency_ms": "大模型耗时(ms)",
         }
 
         display_data(push_tab, ReviewService().get_push_review_logs, push_columns, push_column_config)